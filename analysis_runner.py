@@ -0,0 +1,383 @@
+"""
+Ejecución en paralelo de los análisis de `main.py`.
+
+Descripción:
+    Los análisis son independientes entre sí y la mayor parte de su coste es la
+    construcción de las figuras de Plotly (CPU), por lo que se reparten entre un
+    pool de procesos.
+
+    Las fuentes de `data_access` se leen de SQLite una sola vez, con la unión de
+    las columnas declaradas por todos los análisis, y se envían a cada proceso como
+    buffers Arrow IPC. Cada proceso los deserializa al arrancar y cada análisis
+    selecciona de ellos sus columnas declaradas.
+
+    Ejecución incremental: junto a las salidas se guarda, por análisis, una huella
+    del contenido de sus columnas de entrada y de la versión de su código. Si ninguna
+    de las dos cambia y sus ficheros siguen existiendo, el análisis se omite. Junto a
+    ellas se guarda la versión de los datos de la base de datos (`db.get_data_version`):
+    si tampoco ha cambiado, el análisis se omite sin llegar a leer sus entradas.
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import hashlib
+import inspect
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import polars as pl
+
+import data_access
+import db
+import instrumentation
+
+# DataFrames compartidos del proceso (fuente -> DataFrame), cargados por `_init_worker`
+_frames = {}
+
+# =============================================================================
+# 1. CARGA DE LAS ENTRADAS COMPARTIDAS
+# =============================================================================
+
+def shared_columns(analyses):
+    """
+    Calcula, para cada fuente, la unión de las columnas que leen los análisis.
+
+    :param analyses: Lista de tuplas (función decorada con `requires`, argumentos extra).
+    :return: Diccionario fuente -> lista de columnas (en orden de aparición).
+    """
+    columnas = {}
+    for func, _ in analyses:
+        for source, cols in func.inputs.items():
+            destino = columnas.setdefault(source, [])
+            destino.extend(c for c in cols if c not in destino)
+    return columnas
+
+@instrumentation.timed("analysis.load")
+def load_shared_frames(analyses):
+    """Lee una sola vez de la base de datos todas las columnas que necesitan los análisis."""
+    return {
+        source: data_access.scan(source).select(cols).collect()
+        for source, cols in shared_columns(analyses).items()
+    }
+
+def to_ipc(frames):
+    """Serializa cada DataFrame a un buffer Arrow IPC (bytes)."""
+    buffers = {}
+    for source, df in frames.items():
+        buf = io.BytesIO()
+        df.write_ipc(buf)
+        buffers[source] = buf.getvalue()
+    return buffers
+
+def from_ipc(buffers):
+    """Reconstruye los DataFrames a partir de sus buffers Arrow IPC."""
+    return {source: pl.read_ipc(io.BytesIO(data)) for source, data in buffers.items()}
+
+# =============================================================================
+# 2. HUELLAS PARA LA EJECUCIÓN INCREMENTAL
+# =============================================================================
+
+def frame_fingerprint(df):
+    """
+    Huella del contenido de un DataFrame, independiente del orden de las filas
+    (las consultas a SQLite no garantizan un orden estable).
+    """
+    texto = df.sort(pl.all(), nulls_last=True).write_csv()
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+def input_fingerprint(func, frames, cache=None):
+    """
+    Huella de las columnas que lee un análisis.
+
+    :param func: Función decorada con `requires`.
+    :param frames: DataFrames compartidos (fuente -> DataFrame).
+    :param cache: Diccionario opcional para reutilizar huellas entre análisis.
+    :return: Diccionario fuente -> huella.
+    """
+    cache = {} if cache is None else cache
+    huellas = {}
+    for source, cols in sorted(func.inputs.items()):
+        clave = (source, tuple(sorted(cols)))
+        if clave not in cache:
+            cache[clave] = frame_fingerprint(frames[source].select(sorted(cols)))
+        huellas[source] = cache[clave]
+    return huellas
+
+def _stable_repr(valor):
+    """
+    Representación estable de un valor de datos (diccionarios y conjuntos ordenados).
+
+    :raises TypeError: Si el valor no es un dato (funciones, clases, módulos, conexiones...).
+    """
+    if valor is None or isinstance(valor, (bool, int, float, str, bytes)):
+        return repr(valor)
+    if isinstance(valor, dict):
+        return "{" + ", ".join(sorted(f"{_stable_repr(k)}: {_stable_repr(v)}" for k, v in valor.items())) + "}"
+    if isinstance(valor, (set, frozenset)):
+        return "{" + ", ".join(sorted(_stable_repr(v) for v in valor)) + "}"
+    if isinstance(valor, (list, tuple)):
+        return "[" + ", ".join(_stable_repr(v) for v in valor) + "]"
+    raise TypeError(type(valor).__name__)
+
+def _code_names(code):
+    """Nombres globales que usa un objeto código, incluidos los de sus lambdas y comprensiones."""
+    nombres = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            nombres |= _code_names(const)
+    return nombres
+
+# Hash del código fuente de cada módulo del proyecto (nombre -> hash)
+_module_hashes = {}
+
+def _module_hash(module):
+    if module.__name__ not in _module_hashes:
+        _module_hashes[module.__name__] = hashlib.sha256(inspect.getsource(module).encode("utf-8")).hexdigest()
+    return _module_hashes[module.__name__]
+
+def code_fingerprint(func, extra, salt=""):
+    """
+    Huella de la versión del código de un análisis. Incluye:
+    - su código fuente y el de las funciones del mismo módulo a las que llama,
+      directa o indirectamente,
+    - el valor de las variables globales de datos que usan (p. ej. las listas `COLUMNAS_*`),
+    - el código fuente de los módulos del proyecto que usan (p. ej. `output_sink`),
+    - sus entradas y salidas declaradas, sus argumentos extra y `salt`
+      (p. ej. el modo de renderizado).
+    """
+    directorio = os.path.dirname(os.path.abspath(inspect.getsourcefile(func)))
+    fuentes, datos, modulos = [], {}, {}
+    pendientes, vistas = [func], set()
+    while pendientes:
+        actual = pendientes.pop()
+        if actual in vistas:
+            continue
+        vistas.add(actual)
+        fuentes.append(inspect.getsource(actual))
+        for nombre in sorted(_code_names(actual.__code__)):
+            if nombre not in actual.__globals__:
+                continue  # Atributo o built-in
+            valor = actual.__globals__[nombre]
+            if inspect.isfunction(valor):
+                if valor.__module__ == func.__module__:
+                    pendientes.append(valor)
+            elif inspect.ismodule(valor):
+                ruta = getattr(valor, "__file__", None)
+                if ruta is not None and os.path.dirname(os.path.abspath(ruta)) == directorio:
+                    modulos[valor.__name__] = _module_hash(valor)
+            else:
+                try:
+                    datos[nombre] = _stable_repr(valor)
+                except TypeError:
+                    pass
+
+    h = hashlib.sha256()
+    for fuente in fuentes:
+        h.update(fuente.encode("utf-8"))
+    for clave, valor in sorted(datos.items()) + sorted(modulos.items()):
+        h.update(f"{clave}={valor}\n".encode("utf-8"))
+    declaradas = {
+        "inputs": func.inputs,
+        "outputs": getattr(func, "outputs", ()),
+        "figures": getattr(func, "figures", ()),
+    }
+    h.update(_stable_repr(declaradas).encode("utf-8"))
+    h.update(repr(extra).encode("utf-8"))
+    h.update(f"{salt}|polars={pl.__version__}".encode("utf-8"))
+    return h.hexdigest()
+
+def _state_path(state_dir, func):
+    return os.path.join(state_dir, f"{func.__name__}.json")
+
+def _load_state(state_dir, func):
+    try:
+        with open(_state_path(state_dir, func), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def is_unchanged(state_dir, func, code, data_version, paths):
+    """
+    Indica, sin leer la base de datos, si un análisis está al día: su código no ha
+    cambiado, la base de datos no se ha modificado desde su última ejecución correcta
+    (`db.get_data_version`) y todas sus salidas existen.
+    """
+    guardada = _load_state(state_dir, func)
+    return (
+        data_version is not None
+        and guardada is not None
+        and guardada.get("code") == code
+        and guardada.get("data_version") == data_version
+        and all(os.path.exists(p) for p in paths)
+    )
+
+def is_up_to_date(state_dir, func, huella, paths):
+    """Indica si la huella guardada (entradas y código) coincide y todas las salidas del análisis existen."""
+    guardada = _load_state(state_dir, func)
+    return (
+        guardada is not None
+        and {clave: guardada.get(clave) for clave in huella} == huella
+        and all(os.path.exists(p) for p in paths)
+    )
+
+def save_state(state_dir, func, huella, data_version=None):
+    """Guarda la huella de un análisis ejecutado correctamente y la versión de los datos con la que se calculó."""
+    os.makedirs(state_dir, exist_ok=True)
+    with open(_state_path(state_dir, func), "w", encoding="utf-8") as f:
+        json.dump({**huella, "data_version": data_version}, f, indent=2, sort_keys=True)
+
+def clear_state(state_dir, func):
+    """Elimina la huella de un análisis (fuerza su ejecución la próxima vez)."""
+    try:
+        os.remove(_state_path(state_dir, func))
+    except FileNotFoundError:
+        pass
+
+# =============================================================================
+# 3. EJECUCIÓN
+# =============================================================================
+
+def _init_worker(buffers, configure, configure_args):
+    """Inicializa un proceso del pool: configura el renderizado y carga las entradas."""
+    global _frames
+    if configure is not None:
+        configure(*configure_args)
+    _frames = from_ipc(buffers)
+
+def _run_analysis(func, extra):
+    """
+    Ejecuta un análisis con sus columnas declaradas.
+
+    :return: Tupla (nombre, segundos, error o None).
+    """
+    start = time.perf_counter()
+    try:
+        inputs = [_frames[source].select(cols) for source, cols in func.inputs.items()]
+        func(*inputs, *extra)
+    except Exception as e:
+        return func.__name__, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+    return func.__name__, time.perf_counter() - start, None
+
+def _run_in_worker(func, extra):
+    """
+    Ejecuta un análisis en un proceso del pool y devuelve, junto a su resultado, la
+    instrumentación registrada durante su ejecución para incorporarla al proceso principal.
+    """
+    instrumentation.reset()
+    return _run_analysis(func, extra), instrumentation.snapshot()
+
+def _execute(analyses, frames, workers, configure, configure_args):
+    global _frames
+    if workers <= 1:
+        # Sin pool: se ejecuta en este proceso sin serializar los DataFrames
+        if configure is not None:
+            configure(*configure_args)
+        _frames = frames
+        return [_run_analysis(func, extra) for func, extra in analyses]
+
+    # 'spawn' en lugar de 'fork': el proceso principal ya ha usado Polars, y un hijo creado con
+    # fork hereda su pool de hilos en un estado inconsistente y se bloquea en la primera consulta
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(to_ipc(frames), configure, configure_args),
+    ) as pool:
+        futures = [pool.submit(_run_in_worker, func, extra) for func, extra in analyses]
+        resultados = []
+        for future in futures:
+            resultado, instantanea = future.result()
+            instrumentation.merge(instantanea)
+            resultados.append(resultado)
+        return resultados
+
+def run_analyses(analyses, workers=None, configure=None, configure_args=(),
+                 state_dir=None, outputs=None, force=False, salt=""):
+    """
+    Ejecuta los análisis, en paralelo si `workers` > 1.
+
+    Si se indica `state_dir`, solo se ejecutan los análisis cuyas entradas o
+    código han cambiado desde la última ejecución correcta, o a los que les falta
+    alguna salida.
+
+    :param analyses: Lista de tuplas (función decorada con `requires`, argumentos extra).
+    :param workers: Número de procesos (por defecto, uno por CPU hasta el número de análisis).
+    :param configure: Función que prepara cada proceso (p. ej. activar o no los gráficos).
+    :param configure_args: Argumentos de `configure`.
+    :param state_dir: Directorio donde se guardan las huellas de cada análisis.
+    :param outputs: Función que devuelve las rutas de las salidas de un análisis.
+    :param force: Ejecuta todos los análisis aunque estén al día.
+    :param salt: Texto que se añade a la huella de código (p. ej. el modo de renderizado).
+    :return: Lista de tuplas (nombre, segundos o None si se omite, error o None)
+             en el orden de `analyses`.
+    """
+    # Primero, sin leer la base de datos: si no ha cambiado desde la última ejecución
+    # correcta de un análisis y tampoco su código, se omite directamente. La versión se
+    # lee antes que los datos, de modo que una carga simultánea solo puede provocar una
+    # ejecución de más, nunca una de menos.
+    candidatos = list(analyses)
+    codigos = {}
+    version = None
+    if state_dir is not None:
+        version = db.get_data_version()
+        with instrumentation.span("analysis.fingerprint"):
+            codigos = {func.__name__: code_fingerprint(func, extra, salt) for func, extra in analyses}
+            if not force:
+                candidatos = [
+                    (func, extra) for func, extra in analyses
+                    if not is_unchanged(state_dir, func, codigos[func.__name__], version,
+                                        outputs(func) if outputs is not None else [])
+                ]
+
+    # El resto lee sus entradas y compara su contenido con el de la última ejecución
+    frames = load_shared_frames(candidatos) if candidatos else {}
+
+    huellas = {}
+    pendientes = list(candidatos)
+    if state_dir is not None:
+        cache = {}
+        pendientes = []
+        with instrumentation.span("analysis.fingerprint"):
+            for func, extra in candidatos:
+                huellas[func.__name__] = {
+                    "inputs": input_fingerprint(func, frames, cache),
+                    "code": codigos[func.__name__],
+                }
+                paths = outputs(func) if outputs is not None else []
+                if force or not is_up_to_date(state_dir, func, huellas[func.__name__], paths):
+                    pendientes.append((func, extra))
+
+    if workers is None:
+        workers = min(len(pendientes), os.cpu_count() or 1)
+
+    ejecutados = {}
+    if pendientes:
+        for nombre, segundos, error in _execute(pendientes, frames, workers, configure, configure_args):
+            ejecutados[nombre] = (nombre, segundos, error)
+            instrumentation.record(f"analysis.{nombre}", segundos)
+
+    if state_dir is not None:
+        for func, _ in candidatos:
+            # Los que estaban al día por contenido también anotan la versión actual,
+            # para omitirlos sin leer la base de datos la próxima vez
+            if func.__name__ not in ejecutados or ejecutados[func.__name__][2] is None:
+                save_state(state_dir, func, huellas[func.__name__], version)
+            else:
+                clear_state(state_dir, func)
+
+    return [ejecutados.get(func.__name__, (func.__name__, None, None)) for func, _ in analyses]
+
+def print_report(results, total):
+    """Muestra el tiempo de cada análisis y el tiempo total de la ejecución."""
+    ancho = max(len(nombre) for nombre, _, _ in results)
+    for nombre, segundos, error in results:
+        if segundos is None:
+            print(f"{nombre:<{ancho}}        -    sin cambios")
+            continue
+        estado = "ok" if error is None else f"ERROR {error}"
+        print(f"{nombre:<{ancho}}  {segundos:7.2f} s  {estado}")
+    print(f"{'Total':<{ancho}}  {total:7.2f} s")
@@ -0,0 +1,211 @@
+"""
+Generador de datos sintéticos para los benchmarks.
+
+Descripción:
+    Genera, a escala 1x, 10x o 100x de las cuatro ligas actuales, las mismas
+    respuestas que sirve ESPN:
+
+    - Clasificación de cada liga (JSON de la API de standings).
+    - Página de equipos de cada liga (HTML con los enlaces a cada equipo).
+    - Página de la plantilla de cada equipo (HTML con la tabla de porteros y la
+      de jugadores de campo, con las mismas columnas que espndeportes.espn.com).
+
+    Los ficheros se escriben en un árbol que reproduce las rutas de las URLs
+    (`<destino>/apis/v2/sports/soccer/<liga>/standings`, `<destino>/futbol/...`),
+    de modo que `server.py` los sirve tal cual. `leagues.json` enumera las ligas
+    y sus rutas. La generación es determinista (semilla fija).
+
+Uso:
+    python benchmarks/generate.py --scale 10
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import argparse
+import html
+import json
+import os
+import random
+import sys
+
+# Directorio por defecto de los datos generados (uno por escala)
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Escalas soportadas: número de veces las cuatro ligas actuales
+SCALES = (1, 10, 100)
+
+# Equipos por liga a escala 1x (LaLiga, Premier League, Serie A, Bundesliga)
+TEAMS_PER_LEAGUE = (20, 20, 20, 18)
+
+# Tamaño de cada plantilla
+GOALKEEPERS = 3
+FIELD_PLAYERS = 23
+
+SEASON = "2025-26"
+SEED = 2024
+
+# Nacionalidades tal como aparecen en ESPN Deportes (en español)
+NATIONALITIES = [
+    "España", "Inglaterra", "Italia", "Alemania", "Francia", "Portugal", "Brasil", "Argentina",
+    "Países Bajos", "Bélgica", "Croacia", "Uruguay", "Colombia", "Marruecos", "Senegal", "Nigeria",
+    "Estados Unidos", "México", "Japón", "Suiza", "Dinamarca", "Noruega", "Suecia", "Polonia",
+]
+
+# Algunos de los extremos que analiza main.py, para que sus análisis tengan filas
+WINGERS = [
+    "Vinícius Júnior", "Nico Williams", "Antony", "Lamine Yamal", "Raphinha", "Marcus Rashford",
+    "Mohamed Salah", "Rafael Leão", "Jérémy Doku", "Alejandro Garnacho",
+]
+
+GK_HEADERS = ["Nombre", "POS", "Edad", "EST", "P", "NAC", "AP", "SUB", "A", "GA", "A", "FC", "FS", "TA", "TR"]
+FIELD_HEADERS = ["Nombre", "POS", "Edad", "EST", "P", "NAC", "AP", "TT", "SUB", "G", "A", "TM", "FC", "FS", "TA", "TR"]
+
+
+def league_specs(scale):
+    """
+    Ligas sintéticas de una escala: nombre, abreviatura, rutas y número de equipos.
+
+    :param scale: Multiplicador sobre las cuatro ligas actuales.
+    :return: Lista de diccionarios, uno por liga.
+    """
+    ligas = []
+    for k in range(len(TEAMS_PER_LEAGUE) * scale):
+        codigo = f"syn.{k + 1}"
+        slug = f"liga-sintetica-{k + 1}"
+        ligas.append({
+            "name": f"Liga Sintetica {k + 1}",
+            "abbreviation": f"SYN{k + 1}",
+            "teams": TEAMS_PER_LEAGUE[k % len(TEAMS_PER_LEAGUE)],
+            "standings_path": f"/apis/v2/sports/soccer/{codigo}/standings",
+            "teams_path": f"/futbol/equipos/_/liga/{codigo.upper()}/{slug}",
+        })
+    return ligas
+
+def _write(root, path, content):
+    destino = os.path.join(root, path.lstrip("/"))
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    with open(destino, "w", encoding="utf-8") as f:
+        f.write(content)
+    return len(content.encode("utf-8"))
+
+def _standings(rng, liga, equipos):
+    jornada = 2 * (liga["teams"] - 1) - rng.randint(0, 8)
+    entries = []
+    for posicion, (nombre, _, _) in enumerate(equipos, start=1):
+        wins = rng.randint(0, jornada)
+        ties = rng.randint(0, jornada - wins)
+        losses = jornada - wins - ties
+        goles_favor = rng.randint(wins, wins * 3 + ties + 10)
+        goles_contra = rng.randint(losses, losses * 3 + ties + 10)
+        stats = {
+            "gamesPlayed": jornada, "wins": wins, "ties": ties, "losses": losses,
+            "points": 3 * wins + ties, "pointsFor": goles_favor, "pointsAgainst": goles_contra,
+            "pointDifferential": goles_favor - goles_contra, "rank": posicion,
+        }
+        entries.append({
+            "team": {"name": nombre, "logos": [{"href": f"https://a.espncdn.com/i/teamlogos/soccer/500/{posicion}.png"}]},
+            "stats": [{"name": clave, "value": valor} for clave, valor in stats.items()],
+        })
+    return {
+        "abbreviation": liga["abbreviation"],
+        "name": liga["name"],
+        "children": [{"abbreviation": SEASON, "standings": {"entries": entries}}],
+    }
+
+def _teams_page(liga, equipos):
+    enlaces = "".join(
+        f'<li><a href="/futbol/equipo/_/id/{team_id}/{slug}">{html.escape(nombre)}</a></li>'
+        for nombre, team_id, slug in equipos
+    )
+    return f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(liga["name"])}</title></head><body><ul>{enlaces}</ul></body></html>'
+
+def _player_cells(rng, nombre, dorsal, posicion):
+    # La primera celda junta nombre y dorsal, como en ESPN ("Nombre" + "<span>7</span>")
+    return [
+        f'<a href="#">{html.escape(nombre)}</a><span>{dorsal}</span>',
+        posicion,
+        str(rng.randint(17, 38)),
+        f"1,{rng.randint(65, 99)} m",
+        f"{rng.randint(60, 95)} kg",
+        rng.choice(NATIONALITIES),
+    ]
+
+def _table(headers, rows):
+    cabecera = "".join(f"<th>{h}</th>" for h in headers)
+    # ESPN añade una celda vacía al final de cada fila (columna sin nombre que se descarta)
+    cuerpo = "".join("<tr>" + "".join(f"<td>{c}</td>" for c in fila) + "<td></td></tr>" for fila in rows)
+    return f'<table class="Table"><thead><tr>{cabecera}</tr></thead><tbody>{cuerpo}</tbody></table>'
+
+def _squad_page(rng, nombre_equipo, team_id, extremos):
+    porteros = []
+    for i in range(GOALKEEPERS):
+        apariciones = rng.randint(0, 34)
+        porteros.append(_player_cells(rng, f"Portero {team_id}-{i + 1}", i + 1 if i < 2 else 13, "P") + [
+            str(apariciones), str(rng.randint(0, 3)), str(rng.randint(0, apariciones * 4)),
+            str(rng.randint(0, apariciones * 2)), str(rng.randint(0, 1)), str(rng.randint(0, 3)),
+            str(rng.randint(0, 5)), str(rng.randint(0, 4)), str(rng.randint(0, 1)) if apariciones else "--",
+        ])
+    campo = []
+    for i in range(FIELD_PLAYERS):
+        nombre = extremos.pop() if extremos and i == 10 else f"Jugador {team_id}-{i + 1}"
+        apariciones = rng.randint(0, 34)
+        titular = rng.randint(0, apariciones)
+        campo.append(_player_cells(rng, nombre, i + 2, rng.choice("DDMMMA")) + [
+            str(apariciones), str(titular), str(apariciones - titular), str(rng.randint(0, 20)),
+            str(rng.randint(0, 12)), str(rng.randint(0, 40)), str(rng.randint(0, 50)),
+            str(rng.randint(0, 60)), str(rng.randint(0, 10)), str(rng.randint(0, 2)) if apariciones else "--",
+        ])
+    return (
+        f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(nombre_equipo)}</title></head><body>'
+        f"{_table(GK_HEADERS, porteros)}{_table(FIELD_HEADERS, campo)}</body></html>"
+    )
+
+def generate(scale, out_dir=None):
+    """
+    Genera los datos sintéticos de una escala.
+
+    :param scale: Multiplicador sobre las cuatro ligas actuales (1, 10, 100...).
+    :param out_dir: Directorio de destino (por defecto fixtures/<scale>x).
+    :return: Ruta del manifiesto `leagues.json`.
+    """
+    out_dir = out_dir or os.path.join(FIXTURES_DIR, f"{scale}x")
+    rng = random.Random(SEED)
+    ligas = league_specs(scale)
+    extremos = list(WINGERS)
+    team_id = 1000
+    total_bytes = 0
+    total_equipos = 0
+
+    for k, liga in enumerate(ligas):
+        equipos = []
+        for n in range(liga["teams"]):
+            team_id += 1
+            # El nombre del equipo coincide con el que el scraper deduce del slug de la URL
+            slug = f"equipo-{k + 1}-{n + 1}"
+            equipos.append((slug.replace("-", " ").title(), team_id, slug))
+
+        total_bytes += _write(out_dir, liga["standings_path"], json.dumps(_standings(rng, liga, equipos)))
+        total_bytes += _write(out_dir, liga["teams_path"], _teams_page(liga, equipos))
+        for nombre, tid, slug in equipos:
+            total_bytes += _write(out_dir, f"/futbol/equipo/plantel/_/id/{tid}/{slug}", _squad_page(rng, nombre, tid, extremos))
+        total_equipos += len(equipos)
+
+    manifiesto = os.path.join(out_dir, "leagues.json")
+    with open(manifiesto, "w", encoding="utf-8") as f:
+        json.dump({"scale": scale, "teams": total_equipos, "bytes": total_bytes, "leagues": ligas}, f, indent=2, ensure_ascii=False)
+    print(f"{scale}x: {len(ligas)} ligas, {total_equipos} equipos, {total_bytes / 1e6:.1f} MB en {out_dir}")
+    return manifiesto
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos de ESPN para los benchmarks")
+    parser.add_argument("--scale", type=int, action="append",
+                        help=f"Escala a generar (se puede repetir; por defecto {', '.join(map(str, SCALES))})")
+    parser.add_argument("--out", default=None, help="Directorio de destino (solo con una escala)")
+    args = parser.parse_args(argv)
+    for scale in args.scale or SCALES:
+        generate(scale, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,414 @@
+"""
+Benchmarks de la carga (ETL) y de los análisis sin acceder a ESPN.
+
+Descripción:
+    Levanta `server.py` en un proceso aparte (para no competir por el GIL con el
+    código medido), apunta los cargadores a él y mide estos escenarios:
+
+    - load_standings:                descarga e inserción de las clasificaciones.
+    - get_squad_links:               páginas de equipos de cada liga.
+    - process_team_squad:            descarga y análisis de todas las plantillas (pool de hilos).
+    - convert_to_polars:             tipado de las tablas de porteros y jugadores de campo.
+    - insert_teams:                  upsert de equipos y estadísticas en una base de datos vacía.
+    - insert_players_from_dataframe: carga inicial de jugadores y recarga sin cambios.
+    - load_squads:                   carga en streaming de extremo a extremo.
+    - analysis.load y analysis.<x>:  lectura compartida y cada análisis de `main.py`.
+
+    Cada escenario se repite `--repeat` veces (se guardan todos los tiempos, la
+    mediana y el mínimo) y se ejecuta una vez más con tracemalloc para medir el
+    pico de memoria de Python. Los resultados se guardan en
+    `benchmarks/results/<fecha>_<commit>_<escala>x.json` para compararlos entre
+    commits con `--compare`.
+
+Uso:
+    python benchmarks/generate.py --scale 1
+    python benchmarks/run.py --scale 1 --repeat 3
+    python benchmarks/run.py --replay .http_cache          # páginas reales grabadas
+    python benchmarks/run.py --compare results/A.json results/B.json
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+sys.path.insert(0, REPO_DIR)
+
+import generate  # noqa: E402
+
+# =============================================================================
+# 1. SERVIDOR Y ENTORNO
+# =============================================================================
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(root=None, cache_dir=None, latency_ms=0.0):
+    """
+    Arranca `server.py` en un proceso aparte y espera a que responda.
+
+    :return: Tupla (proceso, URL base).
+    """
+    port = _free_port()
+    origen = ["--root", root] if root else ["--cache", cache_dir]
+    proceso = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "server.py"), *origen, "--port", str(port), "--latency", str(latency_ms)],
+        stdout=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(base + "/", timeout=1)
+        except urllib.error.HTTPError:
+            return proceso, base  # 404: el servidor ya atiende peticiones
+        except OSError:
+            time.sleep(0.1)
+        else:
+            return proceso, base
+    proceso.kill()
+    raise RuntimeError("El servidor de benchmarks no ha arrancado")
+
+def git_commit():
+    """Commit actual del repositorio y si hay cambios sin confirmar."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido", False
+    return commit, dirty
+
+def max_rss_mb():
+    """Pico de memoria residente del proceso hasta el momento (MB)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+# =============================================================================
+# 2. MEDICIÓN
+# =============================================================================
+
+class Bench:
+    """Ejecuta y registra los escenarios de una sesión de benchmarks."""
+
+    def __init__(self, repeat, memory=True):
+        self.repeat = repeat
+        self.memory = memory
+        self.scenarios = []
+
+    def measure(self, nombre, run, setup=None):
+        """
+        Mide un escenario.
+
+        :param nombre: Nombre del escenario.
+        :param run: run(estado) -> número de unidades procesadas (para el throughput).
+        :param setup: setup() -> estado; se ejecuta antes de cada repetición, fuera del tiempo medido.
+        :return: Valor devuelto por `run` en la última repetición.
+        """
+        tiempos = []
+        items = 0
+        for _ in range(self.repeat):
+            with contextlib.redirect_stdout(io.StringIO()):
+                estado = setup() if setup else None
+                gc.collect()
+                start = time.perf_counter()
+                items = run(estado)
+                tiempos.append(time.perf_counter() - start)
+
+        pico = None
+        if self.memory:
+            with contextlib.redirect_stdout(io.StringIO()):
+                estado = setup() if setup else None
+                gc.collect()
+                tracemalloc.start()
+                run(estado)
+            pico = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            tracemalloc.stop()
+
+        mediana = statistics.median(tiempos)
+        resultado = {
+            "name": nombre,
+            "items": items,
+            "seconds": tiempos,
+            "median": mediana,
+            "min": min(tiempos),
+            "throughput": items / mediana if mediana > 0 else None,
+            "peak_python_mb": pico,
+            "max_rss_mb": max_rss_mb(),
+        }
+        self.scenarios.append(resultado)
+        memoria = f"{pico:8.1f} MB" if pico is not None else "       -   "
+        print(f"{nombre:<45} {items:>7} uds  {mediana:8.3f} s  {resultado['throughput'] or 0:10.1f} uds/s  {memoria}")
+        return items
+
+# =============================================================================
+# 3. ESCENARIOS
+# =============================================================================
+
+def run_scenarios(bench, base, leagues, work_dir, render=False):
+    """
+    Ejecuta todos los escenarios contra el servidor `base`.
+
+    :param leagues: Lista de tuplas (nombre, ruta de la clasificación, ruta de la página de equipos).
+    :param work_dir: Directorio de trabajo (bases de datos, caché HTTP y salidas de los análisis).
+    """
+    os.chdir(work_dir)  # main.py crea data_output/ y graficos/ en el directorio actual
+    import league_registry
+
+    # Registro de ligas que apunta al servidor local (con los alias y códigos de país de ligas.json)
+    registro = os.path.join(work_dir, "ligas.json")
+    with open(registro, "w", encoding="utf-8") as f:
+        json.dump({
+            "leagues": [{"name": nombre, "standings_url": base + standings, "teams_url": base + equipos}
+                        for nombre, standings, equipos in leagues],
+            "team_aliases": league_registry.team_aliases(),
+            "country_codes": league_registry.country_codes(),
+        }, f, ensure_ascii=False)
+    league_registry.set_registry_path(registro)
+
+    import analysis_runner
+    import carga_datos
+    import carga_datos_jugadores
+    import db
+    import http_cache
+    import http_client
+    import main as analisis
+
+    # El servidor es local: sin límite de peticiones por host
+    http_client.REQUESTS_PER_SECOND = 1e6
+    http_client.BURST = 1e6
+
+    contador = {"n": 0}
+
+    def nuevo(prefijo):
+        contador["n"] += 1
+        return os.path.join(work_dir, f"{prefijo}_{contador['n']}")
+
+    def cache_vacia():
+        # Cada repetición descarga de nuevo: la caché HTTP empieza vacía
+        http_cache.CACHE_DIR = nuevo("cache")
+
+    def db_vacia():
+        cache_vacia()
+        db.set_db_path(nuevo("bench") + ".db")
+        db.init_db()
+
+    # --- Clasificaciones ---
+    def cargar_clasificaciones(_):
+        if carga_datos.load_standings(show_plots=False):
+            raise RuntimeError("Fallo al cargar las clasificaciones")
+        return len(leagues)
+    bench.measure("load_standings", cargar_clasificaciones, setup=db_vacia)
+
+    # Datos de entrada de los escenarios de base de datos (fuera del tiempo medido)
+    clasificaciones = [carga_datos.parse_standings(http_client.get_json(base + standings)) for _, standings, _ in leagues]
+    equipos = {nombre: datos for _, liga_equipos, *_ in clasificaciones for nombre, datos in liga_equipos.items()}
+
+    # --- Enlaces de equipos ---
+    enlaces = []
+    def obtener_enlaces(_):
+        enlaces.clear()
+        for liga in league_registry.leagues():
+            enlaces.extend(carga_datos_jugadores.get_squad_links(liga["name"], liga["teams_url"], concurrency=liga["concurrency"]))
+        return len(enlaces)
+    bench.measure("get_squad_links", obtener_enlaces, setup=cache_vacia)
+
+    # --- Plantillas (descarga + análisis HTML) ---
+    tablas = {"gk": [], "field": []}
+    def procesar_plantillas(_):
+        tablas["gk"], tablas["field"] = [], []
+        with ThreadPoolExecutor(max_workers=carga_datos_jugadores.MAX_WORKERS) as pool:
+            for gk, field in pool.map(carga_datos_jugadores.process_team_squad, enlaces):
+                tablas["gk"].extend(gk)
+                tablas["field"].extend(field)
+        return len(enlaces)
+    bench.measure("process_team_squad", procesar_plantillas, setup=cache_vacia)
+
+    # --- Tipado ---
+    jugadores = {}
+    def convertir(_):
+        jugadores["gk"] = carga_datos_jugadores.convert_to_polars(tablas["gk"], "PORTEROS")
+        jugadores["field"] = carga_datos_jugadores.convert_to_polars(tablas["field"], "JUGADORES DE CAMPO")
+        return jugadores["gk"].height + jugadores["field"].height
+    bench.measure("convert_to_polars", convertir)
+
+    # --- Equipos ---
+    def db_con_ligas():
+        db_vacia()
+        for liga, *_ in clasificaciones:
+            db.insert_leagues(liga)
+    def insertar_equipos(_):
+        db.insert_teams(equipos)
+        return len(equipos)
+    bench.measure("insert_teams", insertar_equipos, setup=db_con_ligas)
+
+    # Plantilla de base de datos con ligas y equipos, copiada para cada repetición
+    plantilla = nuevo("equipos") + ".db"
+    with contextlib.redirect_stdout(io.StringIO()):
+        db_con_ligas()
+        db.insert_teams(equipos)
+    db.close_connection()
+    shutil.copy(db.DB_PATH, plantilla)
+
+    def db_con_equipos():
+        cache_vacia()
+        db.set_db_path(nuevo("bench") + ".db")
+        shutil.copy(plantilla, db.DB_PATH)
+
+    # --- Jugadores ---
+    filas = jugadores["gk"].height + jugadores["field"].height
+    def insertar_jugadores(_):
+        db.insert_players_from_dataframe(jugadores["gk"], jugadores["field"])
+        return filas
+    bench.measure("insert_players_from_dataframe", insertar_jugadores, setup=db_con_equipos)
+
+    def db_con_jugadores():
+        db_con_equipos()
+        db.insert_players_from_dataframe(jugadores["gk"], jugadores["field"])
+    bench.measure("insert_players_from_dataframe (sin cambios)", insertar_jugadores, setup=db_con_jugadores)
+
+    # --- Carga en streaming de extremo a extremo ---
+    def cargar_plantillas(_):
+        if carga_datos.load_squads():
+            raise RuntimeError("Fallo al cargar las plantillas")
+        return len(enlaces)
+    bench.measure("load_squads", cargar_plantillas, setup=db_con_equipos)
+
+    # --- Análisis de main.py sobre la base de datos completa ---
+    with contextlib.redirect_stdout(io.StringIO()):
+        db_con_jugadores()
+    analisis.configure(render, False, ["csv"], "directory")
+    frames = {}
+    def cargar_fuentes(_):
+        frames.update(analysis_runner.load_shared_frames(analisis.ANALISIS))
+        return sum(df.height for df in frames.values())
+    bench.measure("analysis.load", cargar_fuentes)
+
+    for func, extra in analisis.ANALISIS:
+        inputs = [frames[source].select(cols) for source, cols in func.inputs.items()]
+        bench.measure(
+            f"analysis.{func.__name__}",
+            lambda _, func=func, extra=extra, inputs=inputs: (func(*inputs, *extra), sum(df.height for df in inputs))[1],
+        )
+
+# =============================================================================
+# 4. RESULTADOS
+# =============================================================================
+
+def save_results(bench, scale, source, render):
+    """Guarda los resultados de la sesión y devuelve la ruta del fichero."""
+    import polars as pl
+
+    commit, dirty = git_commit()
+    fecha = datetime.now()
+    resultados = {
+        "date": fecha.isoformat(timespec="seconds"),
+        "commit": commit,
+        "dirty": dirty,
+        "scale": scale,
+        "source": source,
+        "render": render,
+        "repeat": bench.repeat,
+        "python": platform.python_version(),
+        "polars": pl.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scenarios": bench.scenarios,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    etiqueta = f"{scale}x" if source == "synthetic" else "replay"
+    path = os.path.join(RESULTS_DIR, f"{fecha.strftime('%Y%m%d-%H%M%S')}_{commit}{'-dirty' if dirty else ''}_{etiqueta}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    return path
+
+def compare(anterior, nuevo):
+    """Compara dos ficheros de resultados escenario a escenario (mediana y pico de memoria)."""
+    with open(anterior, encoding="utf-8") as f:
+        a = json.load(f)
+    with open(nuevo, encoding="utf-8") as f:
+        b = json.load(f)
+    print(f"{'':<45} {a['commit']:>10} {b['commit']:>10}   ratio   memoria (MB)")
+    escenarios_a = {s["name"]: s for s in a["scenarios"]}
+    for s in b["scenarios"]:
+        previo = escenarios_a.get(s["name"])
+        if previo is None:
+            print(f"{s['name']:<45} {'-':>10} {s['median']:9.3f}s")
+            continue
+        ratio = s["median"] / previo["median"] if previo["median"] else float("inf")
+        memoria = ""
+        if previo.get("peak_python_mb") is not None and s.get("peak_python_mb") is not None:
+            memoria = f"{previo['peak_python_mb']:.1f} -> {s['peak_python_mb']:.1f}"
+        print(f"{s['name']:<45} {previo['median']:9.3f}s {s['median']:9.3f}s  {ratio:6.2f}x  {memoria}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de la carga y los análisis con un servidor local")
+    parser.add_argument("--scale", type=int, default=1, help="Escala de los datos sintéticos (1, 10, 100)")
+    parser.add_argument("--replay", metavar="CACHE_DIR", help="Reproduce una caché HTTP grabada en lugar de datos sintéticos")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones de cada escenario")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia añadida por el servidor (ms)")
+    parser.add_argument("--render", action="store_true", help="Incluye el renderizado de los gráficos en los análisis")
+    parser.add_argument("--no-memory", action="store_true", help="No mide el pico de memoria (evita la pasada con tracemalloc)")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTERIOR", "NUEVO"), help="Compara dos ficheros de resultados")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare)
+
+    if args.replay:
+        source, root, cache_dir = "replay", None, os.path.abspath(args.replay)
+        import league_registry
+        # Las ligas del registro, con las rutas de sus URLs (el servidor reproduce la caché por ruta)
+        leagues = [(l["name"], urlparse(l["standings_url"]).path, urlparse(l["teams_url"]).path) for l in league_registry.leagues()]
+    else:
+        source, cache_dir = "synthetic", None
+        root = os.path.join(generate.FIXTURES_DIR, f"{args.scale}x")
+        manifiesto = os.path.join(root, "leagues.json")
+        if not os.path.exists(manifiesto):
+            generate.generate(args.scale, root)
+        with open(manifiesto, encoding="utf-8") as f:
+            leagues = [(l["name"], l["standings_path"], l["teams_path"]) for l in json.load(f)["leagues"]]
+
+    proceso, base = start_server(root, cache_dir, args.latency)
+    work_dir = tempfile.mkdtemp(prefix="espn-bench-")
+    cwd = os.getcwd()
+    bench = Bench(max(1, args.repeat), memory=not args.no_memory)
+    print(f"Benchmarks ({source}, {len(leagues)} ligas) contra {base}, trabajo en {work_dir}")
+    try:
+        run_scenarios(bench, base, leagues, work_dir, render=args.render)
+    finally:
+        os.chdir(cwd)
+        proceso.terminate()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    path = save_results(bench, args.scale if source == "synthetic" else None, source, args.render)
+    print(f"Resultados guardados en {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
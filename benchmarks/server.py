@@ -0,0 +1,127 @@
+"""
+Servidor local que sustituye a ESPN en los benchmarks.
+
+Descripción:
+    Sirve por HTTP, en 127.0.0.1, uno de estos orígenes:
+
+    - Un árbol de datos sintéticos de `generate.py` (la ruta de la URL es la ruta
+      del fichero).
+    - Una caché HTTP grabada en una carga real (`.http_cache`, ver `http_cache.py`):
+      cada respuesta se sirve en la ruta de la URL con la que se descargó, así que
+      se pueden reproducir las páginas reales de ESPN sin acceder a la red.
+
+    Opcionalmente añade una latencia fija por petición para simular la red.
+
+Uso:
+    python benchmarks/server.py --root benchmarks/fixtures/1x --port 8765
+    python benchmarks/server.py --cache .http_cache --latency 50
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+def index_cache(cache_dir):
+    """
+    Indexa una caché HTTP grabada por la ruta (y query) de cada URL.
+
+    :param cache_dir: Directorio de la caché (`<sha256>.json` + `<sha256>.body`).
+    :return: Diccionario ruta -> fichero con el cuerpo de la respuesta.
+    """
+    rutas = {}
+    for meta_path in glob.glob(os.path.join(cache_dir, "*.json")):
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                url = urlparse(json.load(f)["url"])
+        except (OSError, ValueError, KeyError):
+            continue
+        body_path = meta_path[: -len(".json")] + ".body"
+        if os.path.exists(body_path):
+            rutas[url.path + (f"?{url.query}" if url.query else "")] = body_path
+    return rutas
+
+def make_handler(root=None, cache=None, latency=0.0):
+    """
+    Crea la clase manejadora de peticiones para un origen.
+
+    :param root: Directorio de datos sintéticos.
+    :param cache: Índice de una caché grabada (ver `index_cache`).
+    :param latency: Segundos de espera antes de cada respuesta.
+    """
+    raiz = os.path.abspath(root) if root else None
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _resolve(self):
+            url = urlparse(self.path)
+            if cache is not None:
+                return cache.get(url.path + (f"?{url.query}" if url.query else "")) or cache.get(url.path)
+            path = os.path.abspath(os.path.join(raiz, url.path.lstrip("/")))
+            if path.startswith(raiz + os.sep) and os.path.isfile(path):
+                return path
+            return None
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            path = self._resolve()
+            if path is None:
+                self.send_error(404)
+                return
+            with open(path, "rb") as f:
+                body = f.read()
+            self.send_response(200)
+            tipo = "application/json" if body[:1] in (b"{", b"[") else "text/html; charset=utf-8"
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def serve(root=None, cache_dir=None, host="127.0.0.1", port=0, latency=0.0):
+    """
+    Arranca el servidor en un hilo en segundo plano.
+
+    :return: Tupla (servidor, URL base), p. ej. "http://127.0.0.1:8765".
+    """
+    cache = index_cache(cache_dir) if cache_dir else None
+    servidor = ThreadingHTTPServer((host, port), make_handler(root, cache, latency))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="servidor-benchmarks", daemon=True).start()
+    return servidor, f"http://{host}:{servidor.server_address[1]}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local con datos sintéticos o respuestas grabadas de ESPN")
+    origen = parser.add_mutually_exclusive_group(required=True)
+    origen.add_argument("--root", help="Directorio de datos sintéticos (generate.py)")
+    origen.add_argument("--cache", help="Caché HTTP grabada en una carga real (.http_cache)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia añadida por petición, en milisegundos")
+    args = parser.parse_args(argv)
+
+    servidor, base = serve(args.root, args.cache, port=args.port, latency=args.latency / 1000)
+    print(f"Sirviendo en {base} (Ctrl+C para terminar)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,57 @@
-import requests
+import argparse
+import sys
+import http_client
 import db
-import matplotlib.pyplot as plt
-from carga_datos_jugadores import load_players
+import instrumentation
+import league_registry
+from concurrent.futures import ThreadPoolExecutor
+from carga_datos_jugadores import stream_players
+from ingest_journal import IngestJournal
 
-# Definimos las ligas que queremos consultar
-ligas_urls = {
-    "LaLiga": "https://site.web.api.espn.com/apis/v2/sports/soccer/esp.1/standings",
-    "Premier League": "https://site.web.api.espn.com/apis/v2/sports/soccer/eng.1/standings",
-    "Serie A": "https://site.web.api.espn.com/apis/v2/sports/soccer/ita.1/standings",
-    "Bundesliga": "https://site.web.api.espn.com/apis/v2/sports/soccer/ger.1/standings"
-}
+# Las ligas que queremos consultar, con la URL de su clasificación y su vigencia en la
+# caché HTTP (`standings_refresh`), se definen en el registro de ligas (ligas.json)
+
+# Número de clasificaciones que se descargan en paralelo
+STANDINGS_WORKERS = 8
 
 # Se indica las estadísticas que queremos guardar en la base de datos
 estadisticas = ["gamesPlayed", "losses", "pointDifferential", "points", "pointsAgainst", "pointsFor", "ties", "rank", "wins"]
 
-# Recorrer cada liga
-for nombre_liga, url in ligas_urls.items():
-    r = requests.get(url).json()
-    
+def plot_league_goals(nombre_liga, listaEquipos, golesAFavor, golesEnContra):
+    """
+    Muestra las gráficas de goles a favor y en contra de los equipos de una liga.
+    matplotlib se importa aquí para que el modo headless no lo cargue nunca.
+    """
+    import matplotlib.pyplot as plt
+
+    plt.barh(listaEquipos, golesAFavor, color='skyblue') # Creamos la gráfica para los goles a favor
+    plt.xlabel('Goles a favor') # Se pone un título al eje x
+    plt.ylabel('Equipos') # Un título al eje y
+    plt.title(f'Goles a favor de los equipos en {nombre_liga}') # Un título para la gráfica con el nombre de la liga
+    plt.show() # Se muestra
+
+    plt.barh(listaEquipos, golesEnContra, color='tomato') # Creamos la gráfica para los goles en contra
+    plt.xlabel('Goles en contra')
+    plt.ylabel('Equipos')
+    plt.title(f'Goles en contra de los equipos en {nombre_liga}') # Un título para la gráfica con el nombre de la liga
+    plt.show()
+
+
+def parse_standings(r):
+    """
+    Extrae de la respuesta de la API de clasificación la liga y sus equipos.
+
+    :param r: JSON de la clasificación de una liga.
+    :return: Tupla (liga [nombre, año], equipos {nombre: datos}, nombres de los equipos,
+             goles a favor, goles en contra), estos tres últimos en el orden de la clasificación.
+    """
     # De cada liga queremos guardar en una lista la liga y el año, los goles a favor y en contra (para hacer posteriormente una gráfica) y la lista de equipos
     liga = []
     golesAFavor = []
     golesEnContra = []
     listaEquipos = []
     equipos = {"equipos": {}}
-    
+
     liga.append(r["abbreviation"]) # Añadimos el nombre de la liga y el año
     liga.append(r["children"][0]["abbreviation"])
 
@@ -37,7 +64,7 @@ for nombre_liga, url in ligas_urls.items():
         equipos["equipos"][nombreEquipo]["logo"] = equipo["team"]["logos"][0]["href"] # Obtenemos y guardamos el logo del equipo
         equipos["equipos"][nombreEquipo]["estadisticas"] = {} # Creamos un diccionario dentro de estadisticas para guardar las estadísticas
         listaEquipos.append(nombreEquipo) # Guardamos el nombre del equipo para poder mostrarlo luego en la gráfica
-        
+
         for estadistica in equipo["stats"]: # Recorremos las estadísticas del equipo
             if estadistica["name"] in estadisticas: # Si el nombre de las estadísticas se encuentran dentro del array creado anteriormente, obtendremos dicha estadística
                 equipos["equipos"][nombreEquipo]["estadisticas"][estadistica["name"]] = int(estadistica["value"]) # Guardamos el nombre de la estadística y el valor
@@ -46,24 +73,142 @@ for nombre_liga, url in ligas_urls.items():
                 elif estadistica["name"] == "pointsAgainst": # Si es pointsAgainst (goles en contra), lo guardamos en la lista de goles en contra
                     golesEnContra.append(int(estadistica["value"]))
 
-    db.create_tables() # Creamos las tablas correspondientes
-    db.insert_leagues(liga) # Insertamos la liga
-    db.insert_teams(list(equipos.values())[0]) # Insertamos los equipos correspondientes obtenidos anteriormente
+    return liga, equipos["equipos"], listaEquipos, golesAFavor, golesEnContra
 
-    # Gráficas por liga
-    plt.barh(listaEquipos, golesAFavor, color='skyblue') # Creamos la gráfica para los goles a favor
-    plt.xlabel('Goles a favor') # Se pone un título al eje x
-    plt.ylabel('Equipos') # Un título al eje y
-    plt.title(f'Goles a favor de los equipos en {nombre_liga}') # Un título para la gráfica con el nombre de la liga
-    plt.show() # Se muestra
 
-    plt.barh(listaEquipos, golesEnContra, color='tomato') # Creamos la gráfica para los goles en contra
-    plt.xlabel('Goles en contra')
-    plt.ylabel('Equipos')
-    plt.title(f'Goles en contra de los equipos en {nombre_liga}') # Un título para la gráfica con el nombre de la liga
-    plt.show()
+@instrumentation.timed("standings")
+def load_standings(show_plots=True):
+    """
+    Descarga la clasificación de cada liga y la inserta en la base de datos.
+
+    :param show_plots: Si es False no se muestra ninguna gráfica (modo headless).
+    :return: Número de ligas que no se han podido cargar.
+    """
+    errores = 0
+    ligas = league_registry.leagues()
+    if not ligas:
+        return errores
+
+    # Las clasificaciones se descargan en paralelo; la escritura y las gráficas se hacen
+    # en este hilo, liga a liga y en el orden del registro
+    with ThreadPoolExecutor(max_workers=min(STANDINGS_WORKERS, len(ligas)), thread_name_prefix="clasificacion") as executor:
+        descargas = [executor.submit(http_client.fetch, liga["standings_url"], ttl=liga["standings_refresh"]) for liga in ligas]
+
+        # Recorrer cada liga
+        for liga_registro, descarga in zip(ligas, descargas):
+            nombre_liga = liga_registro["name"]
+            try:
+                resp = descarga.result()
+            except http_client.HTTPClientError as e:
+                # Si una liga falla tras agotar los reintentos, seguimos con las demás
+                print(f"Error recuperando la clasificación de {nombre_liga}: {e}")
+                errores += 1
+                continue
+            try:
+                r = resp.json()
+                abreviatura = r["abbreviation"]
+            except (ValueError, KeyError, TypeError) as e:
+                # Un cuerpo que no es JSON válido (o sin la liga) cuenta como fallo de esa liga, no de toda la carga
+                print(f"Error en la clasificación de {nombre_liga}: respuesta no válida ({e!r})")
+                errores += 1
+                continue
+
+            # Si la clasificación no ha cambiado desde la última carga y la liga ya está en la base de datos, no hay nada que actualizar
+            if resp.unchanged and db.league_exists(abreviatura):
+                print(f"{nombre_liga}: clasificación sin cambios, se omite")
+                continue
+
+            try:
+                liga, equipos, listaEquipos, golesAFavor, golesEnContra = parse_standings(r)
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                print(f"Error en la clasificación de {nombre_liga}: estructura inesperada ({e!r})")
+                errores += 1
+                continue
+
+            db.insert_leagues(liga) # Insertamos la liga
+            db.insert_league_standings(liga[0], equipos) # Insertamos en bloque los equipos y sus estadísticas
+
+            # Gráficas por liga
+            if show_plots:
+                plot_league_goals(nombre_liga, listaEquipos, golesAFavor, golesEnContra)
+
+    return errores
+
+
+@instrumentation.timed("squads")
+def load_squads(force=()):
+    """
+    Descarga las plantillas y las guarda en la base de datos equipo a equipo, en
+    streaming: cada plantilla se confirma en cuanto se analiza, desde un único
+    hilo escritor, mientras se siguen descargando las demás.
+
+    El progreso se registra en el diario de la carga (`ingest_journal`): si una
+    ejecución se interrumpe, la siguiente continúa por los equipos pendientes; si
+    termina con equipos fallidos, la siguiente solo reintenta esos equipos.
+
+    :param force: Ligas que se vuelven a cargar por completo aunque ya estén confirmadas.
+    :return: Número de equipos que no se han podido cargar.
+    """
+    journal = IngestJournal(force=force)
+    team_map = db.load_team_map() # Los equipos ya están en la base de datos tras cargar las clasificaciones
+    totales = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+    escritos = 0
+
+    def guardar(team_info, df_porteros, df_campo):
+        nonlocal escritos
+        resultado = db.insert_players_from_dataframe(df_porteros, df_campo, team_map=team_map, verbose=False)
+        for clave, valor in resultado.items():
+            totales[clave] += valor
+        escritos += 1
+        print(f"[{escritos}] {team_info['league_name']} - {team_info['team_name']}: "
+              f"{resultado['inserted']} nuevos, {resultado['updated']} actualizados, {resultado['deleted']} bajas")
+
+    metrics = stream_players(guardar, journal=journal)
+    journal.finish()
+    print(f"Jugadores: {totales['inserted']} nuevos, {totales['updated']} actualizados, "
+          f"{totales['unchanged']} sin cambios, {totales['deleted']} bajas")
+    return sum(etapa.errors for etapa in metrics.values())
+
+
+def main(argv=None):
+    """
+    Punto de entrada de la carga (ETL): clasificaciones y, después, plantillas de jugadores.
+
+    :param argv: Argumentos de línea de comandos (por defecto sys.argv).
+    :return: Código de salida: 0 si todo se ha cargado, 1 si algo ha fallado.
+    """
+    parser = argparse.ArgumentParser(description="Carga las clasificaciones y plantillas de ESPN en soccer.db")
+    parser.add_argument("--headless", action="store_true",
+                        help="No muestra gráficas ni importa matplotlib (ejecuciones programadas)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Reproduce solo respuestas guardadas en la caché HTTP, sin acceder a la red")
+    parser.add_argument("--force", action="append", default=[], metavar="LIGA", choices=league_registry.league_names(),
+                        help="Vuelve a cargar por completo las plantillas de la liga indicada (se puede repetir)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Perfila la ejecución con cProfile (fichero .prof en metricas/)")
+    args = parser.parse_args(argv)
+
+    if args.offline:
+        http_client.set_offline()
+
+    with instrumentation.profiling("carga_datos", enabled=args.profile or None):
+        db.init_db() # Creamos las tablas correspondientes y aplicamos las migraciones pendientes
+
+        errores = load_standings(show_plots=not args.headless)
+
+        try:
+            errores += load_squads(force=args.force)
+        except Exception as e:
+            print(f"Error cargando los jugadores: {e}")
+            errores += 1
+
+    # Resumen de la ejecución (tiempos por etapa y contadores) para compararla con las anteriores
+    instrumentation.print_summary()
+    path = instrumentation.write_summary("carga_datos", extra={"errors": errores, "http": http_client.summary()})
+    print(f"Resumen de la ejecución en {path}")
+
+    return 1 if errores else 0
 
-db.create_player_tables()
 
-df_goalkeepers, df_players = load_players()
-db.insert_players_from_dataframe(df_goalkeepers, df_players)
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
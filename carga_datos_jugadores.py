@@ -3,67 +3,79 @@ Módulo de Scraping de Estadísticas de Fútbol (ESPN Deportes).
 
 Descripción:
     Este script extrae información detallada de las plantillas de equipos de fútbol
-    de las 4 grandes ligas europeas (LaLiga, Premier League, Serie A, Bundesliga).
+    de las ligas del registro (`ligas.json`, ver `league_registry`).
     Separa automáticamente a los porteros de los jugadores de campo y procesa
     datos como estatura, peso, dorsal y estadísticas de juego.
 
 Tecnologías:
-    - Requests & BeautifulSoup para la extracción HTML.
-    - Pandas para la limpieza preliminar y manejo de tablas HTML.
+    - Requests (sesión compartida de `http_client`) para la descarga.
+    - lxml para analizar cada página una sola vez y recorrer sus tablas directamente.
     - Polars para el tipado fuerte y procesamiento eficiente de datos.
 
 Autor: [David Caraballo Bulnes y Adrián García García]
 """
 
-import requests
-from bs4 import BeautifulSoup
+import http_client
+import ingest_pipeline
+import instrumentation
+import league_registry
+import lxml.html
 import polars as pl
-import pandas as pd
-import time
-import random
 import re
-from io import StringIO
-import warnings
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
+from urllib.parse import urljoin
 
 # =============================================================================
 # 1. CONFIGURACIÓN Y CONSTANTES
 # =============================================================================
 
-# Ignoramos advertencias de obsolescencia de Pandas (específicamente sobre read_html)
-warnings.simplefilter(action='ignore', category=FutureWarning)
+# Las ligas y sus URLs base en ESPN se leen del registro de ligas (ligas.json)
 
-# Cabeceras HTTP para simular un navegador real y evitar bloqueos (User-Agent Spoofing)
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-}
+# Número de hilos que descargan plantillas en paralelo (en total; cada liga además
+# limita sus descargas simultáneas con `concurrency` en ligas.json)
+MAX_WORKERS = 8
 
-# Diccionario maestro de ligas y sus URLs base en ESPN
-LEAGUES_URLS = {
-    "LaLiga": "https://espndeportes.espn.com/futbol/equipos/_/liga/ESP.1/laliga",
-    "Premier League": "https://espndeportes.espn.com/futbol/equipos/_/liga/ENG.1/premier-league",
-    "Serie A": "https://espndeportes.espn.com/futbol/equipos/_/liga/ITA.1/serie-a",
-    "Bundesliga": "https://espndeportes.espn.com/futbol/equipos/_/liga/GER.1/bundesliga"
-}
+# Hilos que analizan las páginas descargadas y capacidad de las colas entre etapas (carga en streaming)
+PARSE_WORKERS = 2
+QUEUE_SIZE = ingest_pipeline.QUEUE_SIZE
+
+# Vigencia (segundos) por defecto de las páginas de equipos y plantillas en la caché HTTP
+# (cada liga la fija con `squads_refresh` en ligas.json)
+SQUAD_TTL = 24 * 3600
+
+# Valores de celda que se consideran nulos (ESPN usa '--' o '-' para "sin dato")
+NULL_VALUES = {"", "-", "--", "nan", "None", "NA", "N/A", "null", "NULL"}
+
+# Espacios sobrantes dentro del texto de una celda (saltos de línea o 2+ espacios)
+WHITESPACE_RE = re.compile(r"[\r\n]+|\s{2,}")
+
+# Nombre y dorsal juntos en la primera celda: (Cualquier caracter al inicio) + (Espacio opcional) + (Dígitos al final)
+JERSEY_RE = re.compile(r"(.*?)\s*(\d+)$")
 
 # =============================================================================
 # 2. FUNCIONES DE EXTRACCIÓN Y LIMPIEZA
 # =============================================================================
 
-def get_squad_links(league_name, league_url):
+@instrumentation.timed("scrape.team_links")
+def get_squad_links(league_name, league_url, ttl=SQUAD_TTL, concurrency=None):
     """
     Obtiene los enlaces a la sección 'Plantel' de todos los equipos de una liga.
 
     Args:
         league_name (str): Nombre identificativo de la liga (ej: "LaLiga").
         league_url (str): URL de la página principal de la liga en ESPN.
+        ttl (int): Vigencia (segundos) en la caché HTTP de la página de la liga y de sus plantillas.
+        concurrency (int): Descargas simultáneas de plantillas de la liga (por defecto MAX_WORKERS).
 
     Returns:
-        list: Lista de diccionarios con metadatos del equipo (url, team_name, league_name).
+        list: Lista de diccionarios con metadatos del equipo (url, team_name, league_name, ttl, concurrency).
     """
     try:
-        resp = requests.get(league_url, headers=HEADERS)
-        resp.raise_for_status() # Verifica errores HTTP (404, 500, etc.)
-        soup = BeautifulSoup(resp.content, 'html.parser')
+        # La sesión compartida reintenta los errores transitorios y lanza excepción en los definitivos
+        resp = http_client.fetch(league_url, ttl=ttl)
+        doc = parse_html(resp.content)
         
         squad_links = []
         # Regex para capturar ID numérico y Slug del equipo desde la URL
@@ -71,8 +83,7 @@ def get_squad_links(league_name, league_url):
         pattern = re.compile(r"/futbol/equipo/_/id/(\d+)/([\w\.-]+)")
         seen_ids = set()
         
-        for a in soup.find_all('a', href=True):
-            href = a['href']
+        for href in doc.xpath('//a/@href'):
             match = pattern.search(href)
             if match:
                 team_id = match.group(1)
@@ -80,14 +91,16 @@ def get_squad_links(league_name, league_url):
                 
                 # Evitar duplicados procesando cada ID una sola vez
                 if team_id not in seen_ids:
-                    # Construcción de la URL específica de la plantilla
-                    full_url = f"https://espndeportes.espn.com/futbol/equipo/plantel/_/id/{team_id}/{team_slug}"
+                    # Construcción de la URL específica de la plantilla, en el mismo host que la página de la liga
+                    full_url = urljoin(league_url, f"/futbol/equipo/plantel/_/id/{team_id}/{team_slug}")
                     formatted_name = team_slug.replace('-', ' ').replace('esp.', '').title()
                     
                     squad_links.append({
                         "url": full_url,
                         "team_name": formatted_name,
-                        "league_name": league_name
+                        "league_name": league_name,
+                        "ttl": ttl,
+                        "concurrency": concurrency or MAX_WORKERS,
                     })
                     seen_ids.add(team_id)
         
@@ -96,118 +109,223 @@ def get_squad_links(league_name, league_url):
         print(f"Error recuperando equipos de {league_name}: {e}")
         return []
 
-def clean_pandas_dataframe(df, team_name, league_name):
+def parse_html(content):
     """
-    Realiza una limpieza preliminar en Pandas antes de la conversión a Polars.
-    
+    Analiza una página HTML con lxml (una única pasada sobre los bytes descargados).
+
+    Args:
+        content (bytes): Cuerpo de la respuesta.
+
+    Returns:
+        lxml.html.HtmlElement: Raíz del documento.
+    """
+    # Un parser por llamada: los parsers de lxml no deben compartirse entre hilos
+    return lxml.html.fromstring(content, parser=lxml.html.HTMLParser(encoding="utf-8"))
+
+def _cell_text(cell):
+    """Texto visible de una celda, con los espacios sobrantes normalizados."""
+    text = WHITESPACE_RE.sub(" ", cell.text_content().strip())
+    return None if text in NULL_VALUES else text
+
+def _row_cells(tr):
+    """Textos de las celdas (th/td) de una fila, repitiendo las que ocupan varias columnas."""
+    values = []
+    for cell in tr:
+        if cell.tag not in ("th", "td"):
+            continue
+        try:
+            span = max(1, int(cell.get("colspan", 1)))
+        except ValueError:
+            span = 1
+        values.extend([_cell_text(cell)] * span)
+    return values
+
+def _column_names(header, width):
+    """
+    Nombres de columna a partir de la cabecera: las celdas vacías o que faltan se
+    llaman 'Unnamed: N' y los nombres repetidos se numeran ('A', 'A.1', ...).
+    Después se pasan a mayúsculas.
+    """
+    names = [header[i] if i < len(header) and header[i] else f"Unnamed: {i}" for i in range(width)]
+    seen = {}
+    unique = []
+    for name in names:
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        unique.append(name if count == 0 else f"{name}.{count}")
+    return [name.upper() for name in unique]
+
+def parse_table(table):
+    """
+    Convierte una tabla HTML en un diccionario columna -> lista de textos,
+    recorriendo sus filas una sola vez.
+
+    La cabecera es la última fila de <thead> o, si no hay <thead>, la primera fila
+    compuesta solo por <th>. Se ignoran los elementos ocultos (display: none).
+
+    Args:
+        table (lxml.html.HtmlElement): Elemento <table>.
+
+    Returns:
+        dict: {nombre_columna: [str | None, ...]} o None si la tabla no tiene filas.
+    """
+    for hidden in table.xpath('.//*[contains(translate(@style, " ", ""), "display:none")]'):
+        hidden.drop_tree()
+
+    header_rows = table.xpath('./thead/tr')
+    body_rows = table.xpath('./tbody/tr') or table.xpath('./tr')
+    if not header_rows and body_rows and all(c.tag == "th" for c in body_rows[0] if c.tag in ("th", "td")):
+        header_rows, body_rows = [body_rows[0]], body_rows[1:]
+
+    header = _row_cells(header_rows[-1]) if header_rows else []
+    rows = [cells for cells in (_row_cells(tr) for tr in body_rows) if cells]
+    if not rows:
+        return None
+
+    width = max(len(header), max(len(r) for r in rows))
+    names = _column_names(header, width)
+    return {name: [r[i] if i < len(r) else None for r in rows] for i, name in enumerate(names)}
+
+def build_squad_frame(columns, team_name, league_name):
+    """
+    Construye el DataFrame de Polars de una tabla de plantilla.
+
     Tareas principales:
     1. Eliminar filas repetitivas de encabezados.
     2. Separar Nombre y Dorsal usando expresiones regulares.
     3. Insertar metadatos (Equipo, Liga).
 
     Args:
-        df (pd.DataFrame): DataFrame crudo extraído del HTML.
+        columns (dict): Columnas de la tabla (ver `parse_table`), con la primera llamada 'NOMBRE'.
         team_name (str): Nombre del club.
         league_name (str): Nombre de la liga.
 
     Returns:
-        pd.DataFrame: DataFrame limpio y estructurado.
+        pl.DataFrame: Columnas LIGA, EQUIPO, NOMBRE, DORSAL y el resto de la tabla, todas de texto.
     """
+    df = pl.DataFrame(columns, schema={name: pl.String for name in columns})
+
     # Eliminar filas donde el nombre se repite (encabezados intermedios en la tabla HTML)
-    if 'NOMBRE' in df.columns:
-        df = df[df['NOMBRE'] != 'NOMBRE']
-    
-    # Estandarización de valores nulos (ESPN usa '--' o '-')
-    df = df.replace(['--', '-'], None)
-    
+    df = df.filter(pl.col("NOMBRE").ne_missing("NOMBRE"))
+
     # --- Separación de Dorsal y Nombre ---
-    # Regex: (Cualquier caracter al inicio) + (Espacio opcional) + (Dígitos al final)
-    jersey_regex = r'(.*?)\s*(\d+)$'
-    names_str = df['NOMBRE'].astype(str)
-    extraction = names_str.str.extract(jersey_regex)
-    
-    # Grupo 0: Nombre limpio. Grupo 1: Dorsal numérico.
-    df['NOMBRE_LIMPIO'] = extraction[0].fillna(df['NOMBRE']).str.strip()
-    df['DORSAL'] = extraction[1] 
-    
-    # Actualizar columnas
-    df['NOMBRE'] = df['NOMBRE_LIMPIO']
-    df.drop(columns=['NOMBRE_LIMPIO'], inplace=True)
-    
-    # Inserción de columnas de metadatos al inicio
+    # Grupo 1: Nombre limpio. Grupo 2: Dorsal numérico.
+    jersey = JERSEY_RE.pattern
+    df = df.with_columns(
+        pl.coalesce(pl.col("NOMBRE").str.extract(jersey, 1), pl.col("NOMBRE")).str.strip_chars().alias("NOMBRE"),
+        pl.col("NOMBRE").str.extract(jersey, 2).alias("DORSAL"),
+    )
+
+    # Metadatos al inicio y reordenamiento visual de columnas (Liga, Equipo, Nombre, Dorsal...)
     # NOTA: Mantenemos los nombres de columna en ESPAÑOL según requerimiento
-    df.insert(0, 'EQUIPO', team_name)
-    df.insert(0, 'LIGA', league_name)
-    
-    # Reordenamiento visual de columnas (Liga, Equipo, Nombre, Dorsal...)
-    cols = list(df.columns)
-    if 'DORSAL' in cols:
-        cols.remove('DORSAL')
-        cols.insert(3, 'DORSAL')
-        df = df[cols]
-        
-    return df
+    rest = [c for c in df.columns if c not in ("NOMBRE", "DORSAL")]
+    return df.select(
+        pl.lit(league_name, dtype=pl.String).alias("LIGA"),
+        pl.lit(team_name, dtype=pl.String).alias("EQUIPO"),
+        "NOMBRE",
+        "DORSAL",
+        *rest,
+    )
 
-def process_team_squad(team_info):
+# Un semáforo por liga, creado bajo demanda, que limita sus descargas simultáneas
+_league_slots = {}
+_league_slots_lock = threading.Lock()
+
+def _league_slot(team_info):
+    with _league_slots_lock:
+        slot = _league_slots.get(team_info["league_name"])
+        if slot is None:
+            slot = threading.BoundedSemaphore(max(1, team_info.get("concurrency") or MAX_WORKERS))
+            _league_slots[team_info["league_name"]] = slot
+    return slot
+
+def fetch_squad(team_info):
     """
-    Descarga y procesa la plantilla de un equipo específico.
+    Descarga la página de la plantilla de un equipo (pasando por la caché HTTP),
+    respetando el máximo de descargas simultáneas de su liga.
+
+    Args:
+        team_info (dict): Diccionario con url, nombre y liga del equipo.
+
+    Returns:
+        bytes: Cuerpo de la página.
+
+    Raises:
+        http_client.HTTPClientError: Si la descarga falla definitivamente.
+    """
+    with _league_slot(team_info):
+        return http_client.fetch(team_info["url"], ttl=team_info.get("ttl", SQUAD_TTL)).content
+
+@instrumentation.timed("scrape.parse")
+def parse_squad(team_info, content):
+    """
+    Analiza la página de la plantilla de un equipo.
     Clasifica las tablas encontradas en 'Porteros' o 'Jugadores de Campo'
     basándose en las columnas estadísticas disponibles.
 
     Args:
         team_info (dict): Diccionario con url, nombre y liga del equipo.
+        content (bytes): Página descargada con `fetch_squad`.
 
     Returns:
-        tuple: (list[pd.DataFrame] gk_list, list[pd.DataFrame] field_list)
+        tuple: (list[pl.DataFrame] gk_list, list[pl.DataFrame] field_list)
     """
-    url = team_info["url"]
     team_name = team_info["team_name"]
     league_name = team_info["league_name"]
+    doc = parse_html(content)
     
-    try:
-        resp = requests.get(url, headers=HEADERS)
-        soup = BeautifulSoup(resp.content, 'html.parser')
-        html_tables = soup.find_all('table')
-        
-        gk_dfs_list = []
-        field_dfs_list = []
-        
-        for table in html_tables:
-            try:
-                # Uso de StringIO para evitar advertencias de depreciación de Pandas
-                html_io = StringIO(str(table))
-                df_temp = pd.read_html(html_io, flavor='bs4')[0]
-                df_temp.columns = [str(c).upper() for c in df_temp.columns]
-                
-                # Normalización del nombre de la primera columna
-                if 'NOMBRE' not in df_temp.columns and len(df_temp.columns) > 0:
-                    df_temp.rename(columns={df_temp.columns[0]: 'NOMBRE'}, inplace=True)
-                
-                cols = df_temp.columns
-                
-                # --- Lógica de Clasificación ---
-                # Si tiene 'GA' (Goles Admitidos) -> Es tabla de Porteros
-                if 'GA' in cols:
-                    gk_dfs_list.append(clean_pandas_dataframe(df_temp, team_name, league_name))
-                # Si tiene 'G' (Goles) y Posición -> Es tabla de Jugadores de Campo
-                elif ('G' in cols or 'TM' in cols) and 'POS' in cols:
-                    field_dfs_list.append(clean_pandas_dataframe(df_temp, team_name, league_name))
-            except Exception:
-                continue # Si una tabla falla, continuar con la siguiente
-
-        return gk_dfs_list, field_dfs_list
+    gk_dfs_list = []
+    field_dfs_list = []
     
+    for table in doc.iter('table'):
+        try:
+            columns = parse_table(table)
+            if not columns:
+                continue
+
+            # Normalización del nombre de la primera columna
+            if 'NOMBRE' not in columns:
+                first = next(iter(columns))
+                columns = {('NOMBRE' if c == first else c): v for c, v in columns.items()}
+            
+            cols = columns.keys()
+            
+            # --- Lógica de Clasificación ---
+            # Si tiene 'GA' (Goles Admitidos) -> Es tabla de Porteros
+            if 'GA' in cols:
+                gk_dfs_list.append(build_squad_frame(columns, team_name, league_name))
+            # Si tiene 'G' (Goles) y Posición -> Es tabla de Jugadores de Campo
+            elif ('G' in cols or 'TM' in cols) and 'POS' in cols:
+                field_dfs_list.append(build_squad_frame(columns, team_name, league_name))
+        except Exception:
+            continue # Si una tabla falla, continuar con la siguiente
+
+    return gk_dfs_list, field_dfs_list
+
+def process_team_squad(team_info):
+    """
+    Descarga y procesa la plantilla de un equipo específico (`fetch_squad` + `parse_squad`).
+
+    Args:
+        team_info (dict): Diccionario con url, nombre y liga del equipo.
+
+    Returns:
+        tuple: (list[pl.DataFrame] gk_list, list[pl.DataFrame] field_list)
+    """
+    try:
+        return parse_squad(team_info, fetch_squad(team_info))
     except Exception as e:
-        print(f"Error procesando {team_name}: {e}")
+        print(f"Error procesando {team_info['team_name']}: {e}")
         return [], []
 
+@instrumentation.timed("scrape.convert")
 def convert_to_polars(dfs_list, player_type):
     """
-    Consolida una lista de DataFrames de Pandas en un único DataFrame de Polars.
+    Consolida los DataFrames de texto de todas las tablas en un único DataFrame de Polars.
     Realiza limpieza de tipos, manejo de unidades (m, kg) y renombrado de columnas.
 
     Args:
-        dfs_list (list): Lista de DataFrames de Pandas.
+        dfs_list (list): Lista de DataFrames de Polars (ver `build_squad_frame`).
         player_type (str): "PORTEROS" o "JUGADORES DE CAMPO" para aplicar mapeos específicos.
 
     Returns:
@@ -217,20 +335,10 @@ def convert_to_polars(dfs_list, player_type):
         print(f"No hay datos disponibles para {player_type}.")
         return pl.DataFrame()
 
-    # 1. Unificación y Conversión a String
-    # Convertimos todo a string en Pandas para evitar errores de inferencia de tipos (ArrowInvalid)
-    # al pasar datos mixtos a Polars.
-    df_pd = pd.concat(dfs_list, ignore_index=True).astype(str)
-    
-    # 2. Creación del DataFrame de Polars
-    df_pl = pl.from_pandas(df_pd)
-    
-    # 3. Restauración de Nulos Reales
-    # Convertimos cadenas 'nan', 'None', etc., de vuelta a null real de Polars
-    df_pl = df_pl.select([
-        pl.col(col).replace(['nan', 'None', '<NA>', '--'], None) 
-        for col in df_pl.columns
-    ])
+    # 1-3. Unificación
+    # Todas las columnas son de texto y los nulos ya son null reales, así que basta con
+    # concatenar alineando las columnas por nombre (las que falten en una tabla quedan a null)
+    df_pl = pl.concat(dfs_list, how="diagonal")
 
     # 4. Limpieza Específica (Estatura y Peso)
     # Eliminamos unidades métricas y convertimos a número
@@ -280,17 +388,22 @@ def convert_to_polars(dfs_list, player_type):
     if cols_to_drop:
         df_pl = df_pl.drop(cols_to_drop)
     
+    instrumentation.count("scrape.rows", df_pl.height)
     return df_pl
 
 # =============================================================================
 # 3. FUNCIÓN PRINCIPAL DE EJECUCIÓN (Interfaz Pública)
 # =============================================================================
 
-def load_players():
+def load_players(max_workers=MAX_WORKERS):
     """
     Función orquestadora principal. 
-    Itera sobre todas las ligas configuradas, extrae los datos de todos los equipos,
-    consolida la información y retorna los DataFrames finales.
+    Recopila los enlaces de todos los equipos de las ligas configuradas y descarga
+    sus plantillas en paralelo con un pool de hilos. El ritmo de peticiones lo
+    controla el limitador por host de `http_client`, no el número de hilos.
+
+    Args:
+        max_workers (int): Número de hilos de descarga. Con 1 se procesa en serie.
 
     Returns:
         tuple: (pl.DataFrame porteros, pl.DataFrame jugadores_campo)
@@ -299,22 +412,164 @@ def load_players():
     master_gk = []
     master_field = []
     
-    # Iteración sobre el diccionario de ligas
-    for league_name, league_url in LEAGUES_URLS.items():
-        print(f"--- Procesando Liga: {league_name} ---")
-        
-        # 1. Obtener lista de equipos
-        teams_list = get_squad_links(league_name, league_url)
-        
-        # 2. Procesar cada equipo individualmente
-        for team_info in teams_list:
-            gk_dfs, field_dfs = process_team_squad(team_info)
-            
+    # 1. Obtener la lista de equipos de todas las ligas
+    teams_list = list(iter_teams())
+
+    # 2. Procesar los equipos en paralelo. `map` conserva el orden de entrada,
+    # por lo que el resultado es el mismo que en la ejecución en serie.
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for gk_dfs, field_dfs in executor.map(process_team_squad, teams_list):
             if gk_dfs: master_gk.extend(gk_dfs)
             if field_dfs: master_field.extend(field_dfs)
-            
-            # Pausa aleatoria para evitar saturación del servidor (Rate Limiting)
-            time.sleep(random.uniform(0.5, 1.5))
+
+    stats = http_client.summary()
+    print(f"Peticiones HTTP: {stats['requests']} ({stats['errors']} errores), {stats['bytes'] / 1e6:.1f} MB, latencia p50 {stats['p50_latency']:.2f}s")
 
     # Retorno de los DataFrames procesados en Polars
-    return convert_to_polars(master_gk, "PORTEROS"), convert_to_polars(master_field, "JUGADORES DE CAMPO")
\ No newline at end of file
+    return convert_to_polars(master_gk, "PORTEROS"), convert_to_polars(master_field, "JUGADORES DE CAMPO")
+
+def iter_teams(leagues=None):
+    """
+    Genera los equipos de las ligas del registro. Las páginas de equipos de todas
+    las ligas se descargan en paralelo y los equipos se entregan alternando las
+    ligas, de modo que las descargas de plantillas se reparten entre ellas (cada
+    una limitada por su `concurrency`).
+
+    Args:
+        leagues (list): Ligas a recorrer (por defecto, las activas de `league_registry`).
+
+    Yields:
+        dict: Metadatos del equipo (url, team_name, league_name, ttl, concurrency).
+    """
+    leagues = league_registry.leagues() if leagues is None else leagues
+    if not leagues:
+        return
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(leagues)), thread_name_prefix="ligas") as executor:
+        equipos = list(executor.map(
+            lambda liga: get_squad_links(liga["name"], liga["teams_url"], liga["squads_refresh"], liga["concurrency"]),
+            leagues,
+        ))
+    for liga, lista in zip(leagues, equipos):
+        print(f"--- Procesando Liga: {liga['name']} ({len(lista)} equipos) ---")
+    for ronda in zip_longest(*equipos):
+        yield from (team_info for team_info in ronda if team_info is not None)
+
+def parse_team(team_info, content):
+    """
+    Etapa de análisis de la carga en streaming: tablas de la plantilla ya tipadas.
+
+    Returns:
+        tuple: (pl.DataFrame porteros, pl.DataFrame jugadores_campo) del equipo; vacíos si no hay tablas.
+    """
+    gk_dfs, field_dfs = parse_squad(team_info, content)
+    return (
+        convert_to_polars(gk_dfs, "PORTEROS") if gk_dfs else pl.DataFrame(),
+        convert_to_polars(field_dfs, "JUGADORES DE CAMPO") if field_dfs else pl.DataFrame(),
+    )
+
+def _journaled_stages(write, journal):
+    """
+    Etapas de `stream_players` que anotan en el diario el progreso de cada equipo:
+    omiten los ya confirmados en la ejecución en curso y no analizan ni escriben las
+    páginas cuyo contenido no ha cambiado desde la última vez que se confirmaron.
+
+    Returns:
+        tuple: (origen, descarga, análisis, escritura, contadores de omitidos)
+    """
+    omitidos = {"confirmados": 0, "sin_cambios": 0}
+
+    def origen():
+        for team_info in iter_teams():
+            if journal.is_done(team_info):
+                omitidos["confirmados"] += 1
+                continue
+            yield team_info
+
+    def descargar(team_info):
+        try:
+            content = fetch_squad(team_info)
+        except Exception as e:
+            journal.mark(team_info, "failed", error=str(e))
+            raise
+        huella = journal.content_hash(content)
+        journal.mark(team_info, "fetched", huella)
+        return content, huella
+
+    def analizar(team_info, descargado):
+        content, huella = descargado
+        if journal.is_unchanged(team_info, huella):
+            return None, huella
+        try:
+            frames = parse_team(team_info, content)
+        except Exception as e:
+            journal.mark(team_info, "failed", huella, str(e))
+            raise
+        journal.mark(team_info, "parsed", huella)
+        return frames, huella
+
+    def escribir(team_info, analizado):
+        frames, huella = analizado
+        try:
+            if frames is None:
+                omitidos["sin_cambios"] += 1
+                print(f"{team_info['league_name']} - {team_info['team_name']}: plantilla sin cambios, se omite")
+            else:
+                write(team_info, *frames)
+        except Exception as e:
+            journal.mark(team_info, "failed", huella, str(e))
+            journal.flush()
+            raise
+        journal.mark(team_info, "committed", huella)
+        journal.flush()
+
+    return origen(), descargar, analizar, escribir, omitidos
+
+def stream_players(write, max_workers=MAX_WORKERS, parse_workers=PARSE_WORKERS, queue_size=QUEUE_SIZE, journal=None):
+    """
+    Carga en streaming: descarga, analiza y entrega cada plantilla a `write` en cuanto
+    está lista, en lugar de reunir todas las ligas en memoria.
+
+    Las etapas se comunican por colas acotadas (ver `ingest_pipeline`), así que la
+    memoria no crece con el número de equipos y la base de datos escribe mientras
+    la red sigue descargando.
+
+    Args:
+        write (callable): write(team_info, df_porteros, df_campo); se invoca siempre desde
+            el hilo que llama, de modo que puede escribir en SQLite directamente.
+        max_workers (int): Hilos de descarga.
+        parse_workers (int): Hilos de análisis.
+        queue_size (int): Capacidad de cada cola entre etapas.
+        journal (ingest_journal.IngestJournal): Diario de la carga (opcional). Si se indica,
+            se omiten los equipos ya confirmados en la ejecución en curso y las páginas sin
+            cambios, y se registra la etapa alcanzada por cada equipo.
+
+    Returns:
+        dict: Métricas por etapa ("fetch", "parse", "write") -> ingest_pipeline.StageMetrics.
+    """
+    print("Iniciando carga de jugadores en streaming...")
+    if journal is None:
+        source, fetch, parse, escribir, omitidos = iter_teams(), fetch_squad, parse_team, lambda team_info, frames: write(team_info, *frames), None
+    else:
+        source, fetch, parse, escribir, omitidos = _journaled_stages(write, journal)
+
+    metrics = ingest_pipeline.run_pipeline(
+        source,
+        fetch=fetch,
+        parse=parse,
+        write=escribir,
+        fetch_workers=max_workers,
+        parse_workers=parse_workers,
+        queue_size=queue_size,
+        label=lambda team_info: f"{team_info['league_name']} - {team_info['team_name']}",
+    )
+
+    stats = http_client.summary()
+    print(f"Peticiones HTTP: {stats['requests']} ({stats['errors']} errores), {stats['bytes'] / 1e6:.1f} MB, latencia p50 {stats['p50_latency']:.2f}s")
+    for nombre, etapa in metrics.items():
+        m = etapa.as_dict()
+        instrumentation.record(f"pipeline.{nombre}", m["busy"], llamadas=m["items"] + m["errors"])
+        instrumentation.count(f"pipeline.{nombre}_errors", m["errors"])
+    if omitidos is not None:
+        print(f"Equipos omitidos: {omitidos['confirmados']} ya confirmados en esta ejecución, {omitidos['sin_cambios']} sin cambios")
+    ingest_pipeline.print_metrics(metrics)
+    return metrics
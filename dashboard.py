@@ -0,0 +1,132 @@
+"""
+Recursos compartidos de los gráficos y cuadro de mando único.
+
+Descripción:
+    Por defecto, cada HTML de `graficos/` incrusta el bundle completo de plotly.js
+    (varios MB). Este módulo permite compartirlo:
+
+    - `ensure_plotlyjs` escribe una sola copia de `plotly.min.js` en el directorio de
+      los gráficos, a la que hacen referencia los HTML generados con
+      `include_plotlyjs="directory"`.
+    - `build` reúne todas las figuras (a partir de sus especificaciones JSON) en un
+      único `dashboard.html` basado en la portada `index.html`, que carga plotly.js
+      una sola vez.
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import html
+import json
+import os
+import re
+
+# Página de la que se toman el estilo, la cabecera y los títulos de cada gráfico
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "index.html")
+
+# Nombre del bundle compartido de plotly.js
+PLOTLYJS = "plotly.min.js"
+
+# Estilos que se añaden a los de la plantilla para mostrar las figuras a ancho completo
+ESTILOS_DASHBOARD = """
+        .grid.dashboard { grid-template-columns: 1fr; }
+        .grid.dashboard .card { cursor: default; }
+        .grid.dashboard .plot { width: 100%; min-height: 600px; }
+"""
+
+
+def ensure_plotlyjs(directorio):
+    """
+    Escribe `plotly.min.js` en `directorio` si todavía no existe.
+    Se llama antes de lanzar los procesos del pool, para que no lo escriban a la vez.
+
+    :param directorio: Directorio de los gráficos.
+    :return: Ruta del fichero.
+    """
+    path = os.path.join(directorio, PLOTLYJS)
+    if not os.path.exists(path):
+        from plotly.offline import get_plotlyjs
+
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(get_plotlyjs())
+        os.replace(tmp, path)
+    return path
+
+def card_titles(template=TEMPLATE):
+    """
+    Extrae de la portada el título y la descripción de la tarjeta de cada gráfico.
+
+    :return: Diccionario nombre del gráfico -> (título, descripción).
+    """
+    try:
+        with open(template, encoding="utf-8") as f:
+            contenido = f.read()
+    except OSError:
+        return {}
+    patron = re.compile(r'<a href="graficos/(\w+)\.html" class="card">\s*<h3>(.*?)</h3>\s*<p>(.*?)</p>', re.S)
+    return {nombre: (titulo, descripcion) for nombre, titulo, descripcion in patron.findall(contenido)}
+
+def _card(indice, nombre, titulo, descripcion):
+    return f"""
+            <div class="card">
+                <h3>{titulo}</h3>
+                <p>{descripcion}</p>
+                <div id="figura-{indice}" class="plot" data-figura="{html.escape(nombre)}"></div>
+            </div>
+"""
+
+def build(nombres, specs_dir, out_path, template=TEMPLATE):
+    """
+    Genera un único HTML con todas las figuras indicadas.
+
+    :param nombres: Nombres de los gráficos, en el orden en que se muestran.
+    :param specs_dir: Directorio con la especificación JSON de cada figura (`<nombre>.json`).
+    :param out_path: Ruta del HTML generado (junto a `plotly.min.js`).
+    :param template: Portada de la que se toman estilo, cabecera y títulos.
+    :return: Número de figuras incluidas.
+    """
+    titulos = card_titles(template)
+    figuras = {}
+    tarjetas = []
+    for nombre in nombres:
+        try:
+            with open(os.path.join(specs_dir, nombre + ".json"), encoding="utf-8") as f:
+                figuras[nombre] = json.load(f)
+        except (OSError, ValueError):
+            continue
+        titulo, descripcion = titulos.get(nombre, (html.escape(nombre.replace("_", " ")), ""))
+        tarjetas.append(_card(len(tarjetas), nombre, titulo, descripcion))
+
+    # '</' se escapa para que ningún texto de las figuras cierre la etiqueta <script>
+    datos = json.dumps(figuras, ensure_ascii=False).replace("</", "<\\/")
+    script = f"""
+    <script src="{PLOTLYJS}"></script>
+    <script>
+        const FIGURAS = {datos};
+        document.querySelectorAll(".plot[data-figura]").forEach(function (div) {{
+            const figura = FIGURAS[div.dataset.figura];
+            Plotly.newPlot(div, figura.data, figura.layout, {{responsive: true}});
+        }});
+    </script>
+"""
+
+    try:
+        with open(template, encoding="utf-8") as f:
+            pagina = f.read()
+    except OSError:
+        pagina = '<!DOCTYPE html>\n<html lang="es">\n<head>\n<meta charset="UTF-8">\n<style>\n</style>\n</head>\n<body>\n<div class="grid">\n</div>\n</body>\n</html>\n'
+
+    # Se sustituyen las tarjetas enlazadas de la portada por las figuras
+    cuerpo = "".join(tarjetas)
+    pagina, sustituciones = re.subn(
+        r'<a href="graficos/.*?</a>(?=\s*</div>\s*</div>\s*<footer>)', lambda _: cuerpo, pagina, count=1, flags=re.S
+    )
+    if not sustituciones:
+        pagina = pagina.replace('<div class="grid">', '<div class="grid">' + cuerpo, 1)
+    pagina = pagina.replace('<div class="grid">', '<div class="grid dashboard">', 1)
+    pagina = pagina.replace("</style>", ESTILOS_DASHBOARD + "    </style>", 1)
+    pagina = pagina.replace("</body>", script + "</body>", 1)
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(pagina)
+    return len(figuras)
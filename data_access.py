@@ -0,0 +1,237 @@
+"""
+Capa de acceso a datos para los análisis de `main.py`.
+
+Descripción:
+    Expone las tablas de `soccer.db` que usan los análisis (clasificación, resúmenes
+    por liga y por equipo, jugadores de campo y porteros) como `LazyFrame` de Polars.
+    Las consultas no se ejecutan hasta que se materializa el LazyFrame (`collect`), y
+    solo se leen de SQLite las columnas que se proyectan: la proyección de Polars se
+    traduce directamente en el SELECT.
+
+    Cada análisis declara las columnas que necesita con el decorador `requires`, y
+    `load_inputs` carga exactamente esas columnas en el momento de ejecutarlo.
+    Con `produces` declara los ficheros que genera.
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import polars as pl
+from polars.io.plugins import register_io_source
+
+import db
+
+# =============================================================================
+# 1. DEFINICIÓN DE LAS FUENTES
+# =============================================================================
+
+# Cada fuente define su cláusula FROM/WHERE, el orden de sus filas y, para cada
+# columna expuesta, la expresión SQL que la calcula y su tipo en Polars. Sin un
+# ORDER BY explícito SQLite devuelve las filas en el orden del índice que elija.
+
+STANDINGS = {
+    "from": """
+        FROM stats s
+        INNER JOIN teams t ON s.team_id = t.id
+        INNER JOIN league l ON t.league_id = l.id_league
+    """,
+    # Orden de la clasificación al cargarla, como la consulta original de los equipos
+    "order": "ORDER BY t.id",
+    "columns": {
+        "name": ("t.name", pl.String),
+        "played": ("s.played", pl.Int64),
+        "wins": ("s.wins", pl.Int64),
+        "draws": ("s.draws", pl.Int64),
+        "losses": ("s.losses", pl.Int64),
+        "points": ("s.points", pl.Int64),
+        "goals_against": ("s.goals_against", pl.Int64),
+        "goals_for": ("s.goals_for", pl.Int64),
+        "position": ("s.position", pl.String),
+        "name_league": ("l.name_league", pl.String),
+    },
+}
+
+def _player_source(tabla, alias, columnas_especificas):
+    """Define la fuente de una tabla de jugadores (solo activos y de la temporada vigente)."""
+    columnas = {
+        "player_id": (f"{alias}.id", pl.Int64),
+        "player_name": (f"{alias}.name", pl.String),
+        "dorsal": (f"{alias}.dorsal", pl.Int64),
+        "position": (f"{alias}.position", pl.String),
+        "age": (f"{alias}.age", pl.Int64),
+        "nationality": (f"{alias}.nationality", pl.String),
+        "height": (f"{alias}.height", pl.Float64),
+        "weight": (f"{alias}.weight", pl.Int64),
+        "games_played": (f"{alias}.games_played", pl.Int64),
+    }
+    columnas.update({c: (f"{alias}.{c}", pl.Int64) for c in columnas_especificas})
+    columnas.update({
+        "fouls_committed": (f"{alias}.fouls_committed", pl.Int64),
+        "fouls_received": (f"{alias}.fouls_received", pl.Int64),
+        "yellow_cards": (f"{alias}.yellow_cards", pl.Int64),
+        "red_cards": (f"{alias}.red_cards", pl.Int64),
+        "player_team_id": (f"{alias}.team_id", pl.Int64),
+        "player_league_id": (f"{alias}.league_id", pl.Int64),
+        "team_id": ("t.id", pl.Int64),
+        "team_name": ("t.name", pl.String),
+        "team_logo": ("t.logo", pl.String),
+        "team_league_id": ("t.league_id", pl.Int64),
+        "id_league": ("l.id_league", pl.Int64),
+        "name_league": ("l.name_league", pl.String),
+        "league_year": ("CAST(l.year AS TEXT)", pl.String),
+    })
+    return {
+        "from": f"""
+            FROM {tabla} {alias}
+            INNER JOIN teams t ON {alias}.team_id = t.id
+            INNER JOIN league l ON {alias}.league_id = l.id_league AND {alias}.season = l.year
+            WHERE {alias}.active = 1
+        """,
+        "order": f"ORDER BY {alias}.id",
+        "columns": columnas,
+    }
+
+FIELD_PLAYERS = _player_source(
+    "field_players", "fp",
+    ["starts", "subs", "goals", "assists", "shots_on_target"],
+)
+
+GOALKEEPERS = _player_source(
+    "goalkeepers", "gk",
+    ["saves", "goals_conceded"],
+)
+
+# Resúmenes materializados por `db` al escribir la clasificación: una fila por liga
+# y una por equipo, ya agregadas, sin ningún cálculo al leerlas.
+LEAGUE_SUMMARY = {
+    "from": """
+        FROM league_summary ls
+        INNER JOIN league l ON ls.league_id = l.id_league
+    """,
+    "order": "ORDER BY ls.league_id",
+    "columns": {
+        "name_league": ("l.name_league", pl.String),
+        "teams": ("ls.teams", pl.Int64),
+        **{c: (f"ls.{c}", pl.Int64) for c in
+           ["played", "wins", "draws", "losses", "points", "goals_for", "goals_against"]},
+        **{c: (f"ls.{c}", pl.Float64) for c in
+           ["played_mean", "points_mean", "goals_against_mean", "matches_drawn", "win_rate",
+            "draw_rate", "avg_goals_against", "avg_league_goals", "mean_league_pts_match"]},
+    },
+}
+
+TEAM_SUMMARY = {
+    "from": """
+        FROM team_summary ts
+        INNER JOIN teams t ON ts.team_id = t.id
+        INNER JOIN league l ON ts.league_id = l.id_league
+    """,
+    # Mismo orden que la clasificación (ver STANDINGS), no el del índice por liga
+    "order": "ORDER BY ts.team_id",
+    "columns": {
+        "name": ("t.name", pl.String),
+        "name_league": ("l.name_league", pl.String),
+        **{c: (f"ts.{c}", pl.Int64) for c in
+           ["played", "points", "wins", "draws", "losses", "goals_for", "goals_against", "goal_diff"]},
+        **{c: (f"ts.{c}", pl.Float64) for c in
+           ["points_per_game", "avg_goals_for", "avg_goals_against"]},
+    },
+}
+
+SOURCES = {
+    "standings": STANDINGS,
+    "league_summary": LEAGUE_SUMMARY,
+    "team_summary": TEAM_SUMMARY,
+    "field_players": FIELD_PLAYERS,
+    "goalkeepers": GOALKEEPERS,
+}
+
+# =============================================================================
+# 2. LECTURA PEREZOSA CON PROYECCIÓN EN SQL
+# =============================================================================
+
+def scan(source_name):
+    """
+    Devuelve una fuente como LazyFrame. Al materializarlo, solo se seleccionan en
+    SQLite las columnas proyectadas y se respeta el límite de filas solicitado.
+
+    :param source_name: Nombre de la fuente en SOURCES ("standings", "league_summary", ...).
+    :return: pl.LazyFrame con el esquema completo de la fuente.
+    """
+    source = SOURCES[source_name]
+    schema = {name: dtype for name, (_, dtype) in source["columns"].items()}
+
+    def io_source(with_columns, predicate, n_rows, batch_size):
+        columnas = with_columns or list(schema)
+        select = ", ".join(f"{source['columns'][c][0]} AS {c}" for c in columnas)
+        query = f"SELECT {select} {source['from']} {source.get('order', '')}"
+        if n_rows is not None:
+            query += f" LIMIT {int(n_rows)}"
+
+        cursor = db.get_connection().execute(query)
+        esquema = {c: schema[c] for c in columnas}
+        while True:
+            rows = cursor.fetchmany(batch_size or 50_000)
+            if not rows:
+                break
+            df = pl.DataFrame(rows, schema=esquema, orient="row", strict=False)
+            yield df.filter(predicate) if predicate is not None else df
+
+    return register_io_source(io_source, schema=schema)
+
+def scan_standings():
+    """Clasificación vigente de todos los equipos con el nombre de su liga."""
+    return scan("standings")
+
+def scan_field_players():
+    """Jugadores de campo activos de la temporada vigente, con su equipo y su liga."""
+    return scan("field_players")
+
+def scan_goalkeepers():
+    """Porteros activos de la temporada vigente, con su equipo y su liga."""
+    return scan("goalkeepers")
+
+def scan_league_summary():
+    """Resumen materializado por liga (totales, medias por equipo y métricas por partido)."""
+    return scan("league_summary")
+
+def scan_team_summary():
+    """Resumen materializado por equipo (diferencia de goles y métricas por partido)."""
+    return scan("team_summary")
+
+# =============================================================================
+# 3. DECLARACIÓN DE ENTRADAS DE LOS ANÁLISIS
+# =============================================================================
+
+def requires(**inputs):
+    """
+    Decorador con el que cada análisis declara las fuentes y columnas que lee.
+    El orden de los argumentos es el orden en que `load_inputs` devuelve los DataFrames.
+
+    Ejemplo: @requires(standings=["name", "points", "name_league"])
+    """
+    def decorator(func):
+        func.inputs = inputs
+        return func
+    return decorator
+
+def produces(*nombres, graficos=None):
+    """
+    Decorador con el que cada análisis declara los ficheros que genera (sin extensión):
+    los `nombres` de sus tablas de resultados y, si difieren, los de sus `graficos`.
+
+    Ejemplo: @produces("Media_Edades_Equipos", graficos=["Media_Edades_Equipos", "Boxplot_Edades_Equipos"])
+    """
+    def decorator(func):
+        func.outputs = list(nombres)
+        func.figures = list(graficos) if graficos is not None else list(nombres)
+        return func
+    return decorator
+
+def load_inputs(func):
+    """
+    Carga las entradas declaradas por un análisis, leyendo solo sus columnas.
+
+    :param func: Función decorada con `requires`.
+    :return: Lista de pl.DataFrame, una por fuente declarada.
+    """
+    return [scan(source).select(columnas).collect() for source, columnas in func.inputs.items()]
@@ -1,12 +1,75 @@
+import atexit
+import hashlib
+import os
 import sqlite3
+import threading
 import unicodedata
 
+import polars as pl
+
+import instrumentation
+import league_registry
+
+# Ruta de la base de datos (configurable con la variable de entorno SOCCER_DB o con set_db_path)
+DB_PATH = os.environ.get("SOCCER_DB", "soccer.db")
+
+# PRAGMAs aplicados a la conexión compartida:
+# - WAL permite que los análisis lean mientras una carga escribe, sin bloqueos "database is locked".
+# - synchronous=NORMAL es seguro en modo WAL y evita un fsync por cada commit.
+# - mmap, caché de páginas de 64 MB y tablas temporales en memoria aceleran las consultas de análisis.
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+    "foreign_keys": "ON",
+}
+
+_connection = None
+_connection_lock = threading.Lock()
+
+def get_connection():
+    """
+    Devuelve la conexión SQLite del proceso, abriéndola y configurándola la primera vez.
+    Todas las funciones del módulo (y la capa de análisis) reutilizan esta misma conexión.
+    """
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+            for pragma, value in PRAGMAS.items():
+                conn.execute(f"PRAGMA {pragma} = {value}")
+            _connection = conn
+        return _connection
+
+@atexit.register
+def close_connection():
+    """Cierra la conexión compartida (se invoca automáticamente al terminar el proceso)."""
+    global _connection
+    with _connection_lock:
+        if _connection is not None:
+            _connection.close()
+            _connection = None
+
+def set_db_path(path):
+    """
+    Cambia la base de datos con la que trabaja el módulo, cerrando la conexión actual si existe.
+
+    :param path: Ruta del fichero SQLite.
+    """
+    global DB_PATH
+    close_connection()
+    DB_PATH = path
+
+
 def create_tables():
     """
     Crea la estructura base de datos relacional para Ligas, Equipos y Estadísticas Generales.
     Establece las relaciones mediante claves foráneas (Foreign Keys).
     """
-    conn = sqlite3.connect("soccer.db")
+    conn = get_connection()
     cursor = conn.cursor()
     
     # Tabla para almacenar las diferentes ligas y la temporada actual
@@ -26,18 +89,34 @@ def create_tables():
         "CREATE TABLE IF NOT EXISTS stats (id_stats INTEGER PRIMARY KEY, team_id INTEGER, points INTEGER, played INTEGER, goals_against INTEGER, goals_for INTEGER, wins INTEGER, draws INTEGER, losses INTEGER, position TEXT, FOREIGN KEY(team_id) REFERENCES teams(id))"
     )
     conn.commit()
-    conn.close()
+
+
+def league_exists(name_league):
+    """
+    Indica si una liga ya está registrada en la base de datos con equipos asociados.
+
+    :param name_league: Nombre de la liga tal y como lo devuelve la API.
+    :return: True si la liga existe y tiene equipos.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    row = cursor.execute(
+        "SELECT 1 FROM league l INNER JOIN teams t ON t.league_id = l.id_league WHERE l.name_league = ? LIMIT 1",
+        (name_league,),
+    ).fetchone()
+    return row is not None
 
 
 def insert_leagues(leagues):
     """
     Inserta o actualiza la información de las ligas en la base de datos.
-    Si la liga cambia de año (nueva temporada), purga los datos antiguos de equipos y estadísticas
-    para asegurar la integridad de la nueva campaña.
+    Si la liga cambia de año (nueva temporada), solo se vacía la clasificación vigente ('stats')
+    de los equipos de esa liga: las temporadas anteriores se conservan en 'stats_history'
+    y en las particiones por temporada de las tablas de jugadores.
     
     :param leagues: Tupla o lista con el formato (nombre_liga, año)
     """
-    conn = sqlite3.connect("soccer.db")
+    conn = get_connection()
     cursor = conn.cursor()
     
     # Extraemos los nombres de las ligas ya existentes para comprobar duplicados
@@ -57,58 +136,178 @@ def insert_leagues(leagues):
             "SELECT name_league, year FROM league WHERE name_league = ?", (leagues[0],)
         ).fetchone()
         
-        # Si el año de la API difiere del de la DB, actualizamos el año y reiniciamos estadísticas
+        # Si el año de la API difiere del de la DB, actualizamos el año y reiniciamos la clasificación vigente de esa liga
         if update_league[1] != leagues[1]:
             cursor.execute(
                 "UPDATE league SET year = ? WHERE name_league = ?",
                 (leagues[1], leagues[0]),
             )
-            # Borrado en cascada manual de las métricas de la temporada anterior
-            cursor.execute("DELETE FROM stats")
-            cursor.execute("DELETE FROM teams")
+            cursor.execute(
+                "DELETE FROM stats WHERE team_id IN (SELECT t.id FROM teams t INNER JOIN league l ON t.league_id = l.id_league WHERE l.name_league = ?)",
+                (leagues[0],),
+            )
+            league_id = cursor.execute("SELECT id_league FROM league WHERE name_league = ?", (leagues[0],)).fetchone()[0]
+            _refresh_summaries(cursor, league_id)
             
     conn.commit()
-    conn.close()
+
+
+# Upsert de equipos: el nombre es único, así que un equipo existente solo actualiza su logo y su liga
+SQL_UPSERT_TEAM = """
+    INSERT INTO teams (name, logo, league_id) VALUES (?, ?, ?)
+    ON CONFLICT(name) DO UPDATE SET logo = excluded.logo, league_id = excluded.league_id
+"""
+
+# Upsert de estadísticas: una fila por equipo (team_id único), resolviendo el id a partir del nombre
+SQL_UPSERT_STATS = """
+    INSERT INTO stats (team_id, position, points, played, goals_against, goals_for, wins, draws, losses)
+    VALUES ((SELECT id FROM teams WHERE name = ?), ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(team_id) DO UPDATE SET
+        position = excluded.position,
+        points = excluded.points,
+        played = excluded.played,
+        goals_against = excluded.goals_against,
+        goals_for = excluded.goals_for,
+        wins = excluded.wins,
+        draws = excluded.draws,
+        losses = excluded.losses
+"""
+
+# Foto de la clasificación de una liga en la jornada actual: se copia desde 'stats' a la partición
+# (liga, temporada, jornada) de 'stats_history', sustituyéndola si la jornada ya se había cargado
+SQL_SNAPSHOT_STATS = """
+    INSERT INTO stats_history (league_id, season, matchday, team_id, position, points, played, goals_against, goals_for, wins, draws, losses)
+    SELECT t.league_id, l.year, ?, s.team_id, s.position, s.points, s.played, s.goals_against, s.goals_for, s.wins, s.draws, s.losses
+    FROM stats s
+    INNER JOIN teams t ON s.team_id = t.id
+    INNER JOIN league l ON t.league_id = l.id_league
+    WHERE t.league_id = ?
+    ON CONFLICT(league_id, season, matchday, team_id) DO UPDATE SET
+        position = excluded.position,
+        points = excluded.points,
+        played = excluded.played,
+        goals_against = excluded.goals_against,
+        goals_for = excluded.goals_for,
+        wins = excluded.wins,
+        draws = excluded.draws,
+        losses = excluded.losses
+"""
+
+# Resúmenes materializados por liga y por equipo (ver migración 5). Se recalculan a partir de 'stats'
+# para una liga concreta dentro de la misma transacción en la que se escribe su clasificación.
+_LEAGUE_SUMMARY_COLUMNS = """
+    league_id, teams, played, wins, draws, losses, points, goals_for, goals_against,
+    played_mean, points_mean, goals_against_mean, matches_drawn,
+    win_rate, draw_rate, avg_goals_against, avg_league_goals, mean_league_pts_match
+"""
+_LEAGUE_SUMMARY_SELECT = """
+    SELECT league_id, teams, played, wins, draws, losses, points, goals_for, goals_against,
+           played_mean, points_mean, goals_against_mean, draws / 2.0,
+           CAST(wins AS REAL) / played, draws / 2.0 / played, CAST(goals_against AS REAL) / played,
+           goals_against_mean / played_mean, points_mean / played_mean
+    FROM (
+        SELECT t.league_id AS league_id, COUNT(*) AS teams,
+               SUM(s.played) AS played, SUM(s.wins) AS wins, SUM(s.draws) AS draws, SUM(s.losses) AS losses,
+               SUM(s.points) AS points, SUM(s.goals_for) AS goals_for, SUM(s.goals_against) AS goals_against,
+               AVG(s.played) AS played_mean, AVG(s.points) AS points_mean, AVG(s.goals_against) AS goals_against_mean
+        FROM stats s
+        INNER JOIN teams t ON s.team_id = t.id
+        {where}
+        GROUP BY t.league_id
+    )
+"""
+_TEAM_SUMMARY_COLUMNS = """
+    team_id, league_id, played, points, wins, draws, losses, goals_for, goals_against,
+    goal_diff, points_per_game, avg_goals_for, avg_goals_against
+"""
+_TEAM_SUMMARY_SELECT = """
+    SELECT s.team_id, t.league_id, s.played, s.points, s.wins, s.draws, s.losses, s.goals_for, s.goals_against,
+           s.goals_for - s.goals_against,
+           CAST(s.points AS REAL) / s.played,
+           CAST(s.goals_for AS REAL) / s.played,
+           CAST(s.goals_against AS REAL) / s.played
+    FROM stats s
+    INNER JOIN teams t ON s.team_id = t.id
+    {where}
+"""
+
+SQL_REFRESH_SUMMARIES = [
+    "DELETE FROM league_summary WHERE league_id = ?",
+    f"INSERT INTO league_summary ({_LEAGUE_SUMMARY_COLUMNS}) {_LEAGUE_SUMMARY_SELECT.format(where='WHERE t.league_id = ?')}",
+    "DELETE FROM team_summary WHERE league_id = ?",
+    f"INSERT INTO team_summary ({_TEAM_SUMMARY_COLUMNS}) {_TEAM_SUMMARY_SELECT.format(where='WHERE t.league_id = ?')}",
+]
+
+def _refresh_summaries(cursor, league_id):
+    """
+    Recalcula 'league_summary' y 'team_summary' de una liga. No confirma la transacción:
+    se llama dentro de la transacción que modifica la clasificación de la liga.
+    """
+    for sql in SQL_REFRESH_SUMMARIES:
+        cursor.execute(sql, (league_id,))
+
+def _stats_row(stat, nombreEquipo):
+    """Convierte el diccionario de estadísticas de la API en la tupla de parámetros de SQL_UPSERT_STATS."""
+    return (
+        nombreEquipo,
+        stat["rank"],
+        stat["points"],
+        stat["gamesPlayed"],
+        stat["pointsAgainst"],
+        stat["pointsFor"],
+        stat["wins"],
+        stat["ties"],
+        stat["losses"],
+    )
+
+
+@instrumentation.timed("db.standings")
+def insert_league_standings(league_name, teams):
+    """
+    Inserta o actualiza (Upsert) de una sola vez la clasificación completa de una liga:
+    todos sus equipos y sus estadísticas, con `executemany` y en una única transacción.
+    En la misma transacción guarda la foto de la jornada en 'stats_history' y
+    recalcula los resúmenes 'league_summary' y 'team_summary' de la liga.
+
+    :param league_name: Nombre de la liga (debe existir en la tabla 'league').
+    :param teams: Diccionario con la información estructurada de los equipos y sus estadísticas.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # Resolvemos el ID de la liga una sola vez para todos los equipos
+    league_id = cursor.execute(
+        "SELECT id_league FROM league WHERE name_league = ?", (league_name,)
+    ).fetchone()[0]
+
+    team_rows = [(t["nombre"], t["logo"], league_id) for t in teams.values()]
+    stats_rows = [_stats_row(t["estadisticas"], t["nombre"]) for t in teams.values()]
+
+    # La jornada de la foto es el mayor número de partidos jugados por un equipo de la liga
+    matchday = max((t["estadisticas"]["gamesPlayed"] for t in teams.values()), default=0)
+
+    # El bloque 'with' confirma la transacción al terminar (o la deshace si hay un error)
+    with conn:
+        cursor.executemany(SQL_UPSERT_TEAM, team_rows)
+        cursor.executemany(SQL_UPSERT_STATS, stats_rows)
+        cursor.execute(SQL_SNAPSHOT_STATS, (matchday, league_id))
+        _refresh_summaries(cursor, league_id)
 
 
 def insert_teams(teams):
     """
     Gestiona la inserción y actualización (Upsert) de los equipos extraídos de la API.
-    Itera el diccionario de equipos, vincula cada uno con su liga y llama a la inserción de sus estadísticas.
+    Agrupa los equipos por liga y delega en `insert_league_standings`, que escribe
+    cada liga en bloque.
     
     :param teams: Diccionario con la información estructurada de los equipos y sus estadísticas.
     """
-    conn = sqlite3.connect("soccer.db")
-    cursor = conn.cursor()
-    
-    # Obtenemos la lista de equipos actuales para decidir si hacer INSERT o UPDATE
-    prev_teams = cursor.execute("SELECT name FROM teams").fetchall()
-    
+    leagues = {}
     for team_name, team_data in teams.items():
-        # Sustituimos el nombre de la liga en el diccionario por el ID numérico de la tabla 'league'
-        team_data["league"] = cursor.execute(
-            "SELECT id_league FROM league WHERE name_league = ?", (team_data["league"],)
-        ).fetchone()[0]
-        
-        # Inserción de equipo nuevo
-        if (team_data["nombre"],) not in prev_teams:
-            cursor.execute(
-                "INSERT INTO teams (name, league_id, logo) VALUES (?, ?, ?)",
-                (team_data["nombre"], team_data["league"], team_data["logo"]),
-            )
-        # Actualización de equipo existente (por si cambia el logo o la liga por ascensos/descensos)
-        else:
-            cursor.execute(
-                "UPDATE teams SET name = ?, league_id = ?, logo = ? WHERE name = ?",
-                (team_data["nombre"], team_data["league"], team_data["logo"], team_data["nombre"]),
-            )
-        conn.commit()
-        
-        # Delegamos la inserción de las métricas puras a la función de estadísticas
-        insert_stats(team_data["estadisticas"], team_data["nombre"])
-        
-    conn.commit()
-    conn.close()
+        leagues.setdefault(team_data["league"], {})[team_name] = team_data
+
+    for league_name, league_teams in leagues.items():
+        insert_league_standings(league_name, league_teams)
 
 
 def insert_stats(stat, nombreEquipo):
@@ -116,60 +315,49 @@ def insert_stats(stat, nombreEquipo):
     Inserta o actualiza las métricas deportivas (clasificación, puntos, goles) 
     de un equipo específico en la tabla 'stats'.
     
+    Los resúmenes de su liga se recalculan en la misma transacción.
+
     :param stat: Diccionario con las estadísticas (rank, points, goals, etc.)
     :param nombreEquipo: Nombre del equipo al que pertenecen las estadísticas.
     """
-    conn = sqlite3.connect("soccer.db")
+    conn = get_connection()
     cursor = conn.cursor()
-    
-    # Recuperamos el ID del equipo recién insertado/actualizado para relacionar las estadísticas
-    team_id = cursor.execute("SELECT id FROM teams WHERE name = ?", (nombreEquipo,)).fetchone()
-    team_id = team_id[0]
-    
-    # Comprobamos si el equipo ya tiene estadísticas registradas
-    prev_stats = cursor.execute("SELECT team_id FROM stats").fetchall()
-    
-    if (team_id,) in prev_stats:
-        # Actualizamos la fila existente con los datos más recientes de la jornada
-        cursor.execute(
-            "UPDATE stats SET position = ?, points = ?, played = ?, goals_against = ?, goals_for = ?, wins = ?, draws = ?, losses = ? WHERE team_id = ?",
-            (
-                stat["rank"],
-                stat["points"],
-                stat["gamesPlayed"],
-                stat["pointsAgainst"],
-                stat["pointsFor"],
-                stat["wins"],
-                stat["ties"],
-                stat["losses"],
-                team_id,
-            ),
-        )
-    else:
-        # Insertamos el registro de estadísticas por primera vez para este equipo
-        cursor.execute(
-            "INSERT INTO stats (position, team_id, points, played, goals_against, goals_for, wins, draws, losses) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (
-                stat["rank"],
-                team_id,
-                stat["points"],
-                stat["gamesPlayed"],
-                stat["pointsAgainst"],
-                stat["pointsFor"],
-                stat["wins"],
-                stat["ties"],
-                stat["losses"],
-            ),
-        )
-    conn.commit()
-    conn.close()
+    with conn:
+        cursor.execute(SQL_UPSERT_STATS, _stats_row(stat, nombreEquipo))
+        league_id = cursor.execute("SELECT league_id FROM teams WHERE name = ?", (nombreEquipo,)).fetchone()[0]
+        _refresh_summaries(cursor, league_id)
+
+def get_standings_history(league_name, season=None):
+    """
+    Devuelve las fotos de la clasificación guardadas para una liga, de todas sus temporadas
+    o solo de una. Es una lectura por rango sobre la clave primaria de 'stats_history'.
+
+    :param league_name: Nombre de la liga.
+    :param season: Temporada concreta (ej: "2025-2026") o None para todas.
+    :return: Lista de tuplas (season, matchday, team_name, position, points, played, goals_against, goals_for, wins, draws, losses).
+    """
+    conn = get_connection()
+    query = """
+        SELECT h.season, h.matchday, t.name, h.position, h.points, h.played,
+               h.goals_against, h.goals_for, h.wins, h.draws, h.losses
+        FROM stats_history h
+        INNER JOIN league l ON h.league_id = l.id_league
+        INNER JOIN teams t ON h.team_id = t.id
+        WHERE l.name_league = ?
+    """
+    params = [league_name]
+    if season is not None:
+        query += " AND h.season = ?"
+        params.append(season)
+    query += " ORDER BY h.season, h.matchday, h.points DESC"
+    return conn.execute(query, params).fetchall()
 
 def create_player_tables():
     """
     Crea las tablas para jugadores de campo y porteros con claves foráneas
     hacia las tablas de equipos y ligas.
     """
-    conn = sqlite3.connect("soccer.db")
+    conn = get_connection()
     cursor = conn.cursor()
 
     # 1. Tabla de Jugadores de Campo (field_players)
@@ -228,7 +416,339 @@ def create_player_tables():
         )
     """)
     conn.commit()
-    conn.close()
+
+def _data_version_triggers(*tablas):
+    """Triggers que incrementan la versión de los datos con cada escritura en las tablas indicadas."""
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{tabla}_{evento.lower()}_data_version AFTER {evento} ON {tabla} "
+        "BEGIN UPDATE data_version SET version = version + 1 WHERE id = 1; END"
+        for tabla in tablas
+        for evento in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+# Migraciones del esquema, aplicadas en orden. La migración en la posición N (empezando en 1)
+# deja la base de datos en la versión N, que se guarda en PRAGMA user_version.
+MIGRATIONS = [
+    # 1. Restricciones de unicidad para los upserts y las búsquedas por nombre, e índices
+    #    sobre las claves foráneas que usan los JOIN de main.py
+    [
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_league_name ON league(name_league)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_teams_name ON teams(name)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_stats_team_id ON stats(team_id)",
+        "CREATE INDEX IF NOT EXISTS idx_teams_league_id ON teams(league_id)",
+        "CREATE INDEX IF NOT EXISTS idx_field_players_team_id ON field_players(team_id)",
+        "CREATE INDEX IF NOT EXISTS idx_field_players_league_id ON field_players(league_id)",
+        "CREATE INDEX IF NOT EXISTS idx_goalkeepers_team_id ON goalkeepers(team_id)",
+        "CREATE INDEX IF NOT EXISTS idx_goalkeepers_league_id ON goalkeepers(league_id)",
+    ],
+    # 2. Histórico por temporadas: fotos de la clasificación por (liga, temporada, jornada)
+    #    y columna 'season' en las tablas de jugadores para particionarlas por temporada
+    [
+        """
+        CREATE TABLE IF NOT EXISTS stats_history (
+            league_id INTEGER NOT NULL,
+            season TEXT NOT NULL,
+            matchday INTEGER NOT NULL,
+            team_id INTEGER NOT NULL,
+            position TEXT,
+            points INTEGER,
+            played INTEGER,
+            goals_against INTEGER,
+            goals_for INTEGER,
+            wins INTEGER,
+            draws INTEGER,
+            losses INTEGER,
+            PRIMARY KEY (league_id, season, matchday, team_id),
+            FOREIGN KEY(league_id) REFERENCES league(id_league),
+            FOREIGN KEY(team_id) REFERENCES teams(id)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_stats_history_team ON stats_history(team_id, season)",
+        # Conservamos la clasificación vigente como primera foto del histórico
+        """
+        INSERT OR IGNORE INTO stats_history (league_id, season, matchday, team_id, position, points, played, goals_against, goals_for, wins, draws, losses)
+        SELECT t.league_id, l.year, (SELECT MAX(s2.played) FROM stats s2 INNER JOIN teams t2 ON s2.team_id = t2.id WHERE t2.league_id = t.league_id),
+               s.team_id, s.position, s.points, s.played, s.goals_against, s.goals_for, s.wins, s.draws, s.losses
+        FROM stats s
+        INNER JOIN teams t ON s.team_id = t.id
+        INNER JOIN league l ON t.league_id = l.id_league
+        """,
+        "ALTER TABLE field_players ADD COLUMN season TEXT",
+        "ALTER TABLE goalkeepers ADD COLUMN season TEXT",
+        "UPDATE field_players SET season = (SELECT year FROM league WHERE id_league = field_players.league_id)",
+        "UPDATE goalkeepers SET season = (SELECT year FROM league WHERE id_league = goalkeepers.league_id)",
+        "CREATE INDEX IF NOT EXISTS idx_field_players_league_season ON field_players(league_id, season)",
+        "CREATE INDEX IF NOT EXISTS idx_goalkeepers_league_season ON goalkeepers(league_id, season)",
+    ],
+    # 3. Carga incremental de jugadores: clave natural (equipo, temporada, nombre, dorsal),
+    #    hash de la fila para detectar cambios y borrado lógico de los que dejan la plantilla
+    [
+        "DELETE FROM field_players WHERE id NOT IN (SELECT MIN(id) FROM field_players GROUP BY team_id, season, name, dorsal)",
+        "DELETE FROM goalkeepers WHERE id NOT IN (SELECT MIN(id) FROM goalkeepers GROUP BY team_id, season, name, dorsal)",
+        "ALTER TABLE field_players ADD COLUMN row_hash TEXT",
+        "ALTER TABLE goalkeepers ADD COLUMN row_hash TEXT",
+        "ALTER TABLE field_players ADD COLUMN active INTEGER NOT NULL DEFAULT 1",
+        "ALTER TABLE goalkeepers ADD COLUMN active INTEGER NOT NULL DEFAULT 1",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_field_players_natural_key ON field_players(team_id, season, name, dorsal)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_goalkeepers_natural_key ON goalkeepers(team_id, season, name, dorsal)",
+    ],
+    # 4. Versión de los datos que leen los análisis: un contador que incrementan los triggers de
+    #    cada tabla en cualquier escritura, más un token aleatorio que distingue esta base de datos
+    #    de otra con el mismo contador (main.py omite la lectura si la versión no ha cambiado)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            token TEXT NOT NULL,
+            version INTEGER NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO data_version (id, token, version) VALUES (1, lower(hex(randomblob(8))), 0)",
+        *_data_version_triggers("league", "teams", "stats", "field_players", "goalkeepers"),
+    ],
+    # 5. Resúmenes materializados por liga y por equipo, mantenidos al escribir la clasificación
+    [
+        """
+        CREATE TABLE IF NOT EXISTS league_summary (
+            league_id INTEGER PRIMARY KEY,
+            teams INTEGER,
+            played INTEGER,
+            wins INTEGER,
+            draws INTEGER,
+            losses INTEGER,
+            points INTEGER,
+            goals_for INTEGER,
+            goals_against INTEGER,
+            played_mean REAL,
+            points_mean REAL,
+            goals_against_mean REAL,
+            matches_drawn REAL,
+            win_rate REAL,
+            draw_rate REAL,
+            avg_goals_against REAL,
+            avg_league_goals REAL,
+            mean_league_pts_match REAL,
+            FOREIGN KEY(league_id) REFERENCES league(id_league)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS team_summary (
+            team_id INTEGER PRIMARY KEY,
+            league_id INTEGER NOT NULL,
+            played INTEGER,
+            points INTEGER,
+            wins INTEGER,
+            draws INTEGER,
+            losses INTEGER,
+            goals_for INTEGER,
+            goals_against INTEGER,
+            goal_diff INTEGER,
+            points_per_game REAL,
+            avg_goals_for REAL,
+            avg_goals_against REAL,
+            FOREIGN KEY(team_id) REFERENCES teams(id),
+            FOREIGN KEY(league_id) REFERENCES league(id_league)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_team_summary_league_id ON team_summary(league_id)",
+        f"INSERT INTO league_summary ({_LEAGUE_SUMMARY_COLUMNS}) {_LEAGUE_SUMMARY_SELECT.format(where='')}",
+        f"INSERT INTO team_summary ({_TEAM_SUMMARY_COLUMNS}) {_TEAM_SUMMARY_SELECT.format(where='')}",
+        *_data_version_triggers("league_summary", "team_summary"),
+    ],
+    # 6. Diario de la carga de plantillas: cada ejecución y, por equipo (URL), la última etapa
+    #    alcanzada y el hash del contenido descargado, para poder reanudar una carga interrumpida
+    [
+        """
+        CREATE TABLE IF NOT EXISTS ingest_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TEXT NOT NULL,
+            finished_at TEXT,
+            status TEXT NOT NULL DEFAULT 'running'
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ingest_units (
+            run_id INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            league TEXT NOT NULL,
+            team TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            content_hash TEXT,
+            error TEXT,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (run_id, url),
+            FOREIGN KEY(run_id) REFERENCES ingest_runs(id)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_ingest_units_url ON ingest_units(url, stage)",
+    ],
+    # 7. Reintento de los equipos fallidos: una carga completa con fallos se cierra como 'failed' y
+    #    la siguiente (que la indica en retry_of) solo vuelve a procesar sus equipos no confirmados
+    [
+        "ALTER TABLE ingest_runs ADD COLUMN retry_of INTEGER REFERENCES ingest_runs(id)",
+    ],
+]
+
+def migrate():
+    """
+    Aplica las migraciones pendientes del esquema según PRAGMA user_version.
+    Cada migración se ejecuta en su propia transacción junto con el cambio de versión,
+    y si se ha aplicado alguna se actualizan las estadísticas del planificador (ANALYZE).
+
+    :return: Versión del esquema tras la migración.
+    """
+    conn = get_connection()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    for target, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        # BEGIN explícito: sqlite3 no abre transacciones implícitas para sentencias DDL
+        conn.execute("BEGIN")
+        try:
+            for sql in statements:
+                conn.execute(sql)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Esquema migrado a la versión {target}")
+
+    if version < len(MIGRATIONS):
+        conn.execute("ANALYZE")
+        version = len(MIGRATIONS)
+    return version
+
+def get_data_version():
+    """
+    Versión actual de los datos (ver migración 4): cambia con cualquier escritura en las
+    tablas de clasificaciones, resúmenes y jugadores.
+
+    :return: Texto "token:contador", o None si la base de datos aún no tiene la migración.
+    """
+    try:
+        fila = get_connection().execute("SELECT token, version FROM data_version WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return None if fila is None else f"{fila[0]}:{fila[1]}"
+
+# =============================================================================
+# DIARIO DE LA CARGA DE PLANTILLAS (ver migraciones 6 y 7)
+# =============================================================================
+
+# Etapas de una unidad (equipo) en el diario: 'fetched' -> 'parsed' -> 'committed', o 'failed' con su error
+# Estados de una ejecución: 'running' mientras dura (o si se interrumpió), 'done' o 'failed' al terminar
+
+def start_ingest_run():
+    """
+    Devuelve la ejecución de carga en curso:
+    - la última, si quedó interrumpida ('running'): se reanuda;
+    - una de reintento, si la última terminó con equipos fallidos y no era ya un reintento:
+      copia sus equipos confirmados, de modo que solo se vuelven a procesar los demás;
+    - una nueva en cualquier otro caso (se recargan todos los equipos).
+
+    :return: Tupla (id de la ejecución, True si se reanuda una ejecución anterior,
+             id de la ejecución que se reintenta o None).
+    """
+    conn = get_connection()
+    with conn:
+        fila = conn.execute("SELECT id, status, retry_of FROM ingest_runs ORDER BY id DESC LIMIT 1").fetchone()
+        if fila is not None and fila[1] == "running":
+            return fila[0], True, fila[2]
+        # Un reintento que vuelve a fallar no genera otro: así un equipo que falla siempre
+        # no impide refrescar los demás en la carga siguiente
+        retry_of = fila[0] if fila is not None and fila[1] == "failed" and fila[2] is None else None
+        cursor = conn.execute("INSERT INTO ingest_runs (started_at, retry_of) VALUES (datetime('now'), ?)", (retry_of,))
+        if retry_of is not None:
+            conn.execute(
+                """
+                INSERT INTO ingest_units (run_id, url, league, team, stage, content_hash, error, updated_at)
+                SELECT ?, url, league, team, stage, content_hash, error, updated_at
+                FROM ingest_units WHERE run_id = ? AND stage = 'committed'
+                """,
+                (cursor.lastrowid, retry_of),
+            )
+        return cursor.lastrowid, False, retry_of
+
+def finish_ingest_run(run_id, failed=False):
+    """
+    Cierra una ejecución de carga tras una pasada completa.
+
+    :param run_id: Id de la ejecución.
+    :param failed: True si algún equipo ha fallado (la siguiente ejecución lo reintentará).
+    """
+    conn = get_connection()
+    with conn:
+        conn.execute(
+            "UPDATE ingest_runs SET status = ?, finished_at = datetime('now') WHERE id = ?",
+            ("failed" if failed else "done", run_id),
+        )
+
+def get_ingest_units(run_id):
+    """
+    Estado de las unidades de una ejecución.
+
+    :return: Diccionario url -> (etapa, hash del contenido).
+    """
+    rows = get_connection().execute(
+        "SELECT url, stage, content_hash FROM ingest_units WHERE run_id = ?", (run_id,)
+    ).fetchall()
+    return {url: (stage, content_hash) for url, stage, content_hash in rows}
+
+def get_committed_hashes():
+    """
+    Hash del último contenido confirmado de cada URL, en cualquier ejecución.
+
+    :return: Diccionario url -> hash del contenido.
+    """
+    rows = get_connection().execute(
+        """
+        SELECT u.url, u.content_hash
+        FROM ingest_units u
+        INNER JOIN (SELECT url, MAX(run_id) AS run_id FROM ingest_units WHERE stage = 'committed' GROUP BY url) ultima
+            ON u.url = ultima.url AND u.run_id = ultima.run_id
+        """
+    ).fetchall()
+    return dict(rows)
+
+def record_ingest_units(run_id, units):
+    """
+    Guarda en bloque el estado de varias unidades de una ejecución.
+
+    :param run_id: Id de la ejecución.
+    :param units: Lista de tuplas (url, liga, equipo, etapa, hash del contenido, error).
+    """
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO ingest_units (run_id, url, league, team, stage, content_hash, error, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
+            ON CONFLICT(run_id, url) DO UPDATE SET
+                stage = excluded.stage,
+                content_hash = COALESCE(excluded.content_hash, ingest_units.content_hash),
+                error = excluded.error,
+                updated_at = excluded.updated_at
+            """,
+            [(run_id, *unit) for unit in units],
+        )
+
+def reset_ingest_league(run_id, league):
+    """
+    Olvida las unidades de una liga en la ejecución indicada, para volver a procesarlas.
+
+    :return: Número de unidades eliminadas.
+    """
+    conn = get_connection()
+    with conn:
+        return conn.execute("DELETE FROM ingest_units WHERE run_id = ? AND league = ?", (run_id, league)).rowcount
+
+def init_db():
+    """
+    Prepara la base de datos completa: crea las tablas que falten y aplica las migraciones pendientes.
+    """
+    create_tables()
+    create_player_tables()
+    migrate()
 
 def normalize_text(text):
     """
@@ -250,132 +770,231 @@ def normalize_text(text):
     # 4. Eliminar espacios al inicio/final
     return text.strip()
 
-def insert_players_from_dataframe(df_porteros, df_campo):
+def normalize_expr(column):
     """
-    Limpia las tablas de jugadores e inserta los nuevos datos normalizando nombres
-    y usando un diccionario de alias para emparejar diferencias entre Web y API.
+    Versión vectorizada de `normalize_text` como expresión de Polars:
+    minúsculas, eliminación de tildes (NFD + marcas diacríticas) y espacios extremos.
+
+    :param column: Nombre de la columna de texto a normalizar.
+    :return: pl.Expr con el texto normalizado.
     """
-    conn = sqlite3.connect("soccer.db")
-    cursor = conn.cursor()
+    return (
+        pl.col(column)
+        .str.to_lowercase()
+        .str.normalize("NFD")
+        .str.replace_all(r"\p{Mn}", "")
+        .str.strip_chars()
+    )
 
-    print("--- Iniciando actualización de jugadores ---")
+# Correspondencia entre las columnas de los DataFrames del scraping y las de cada tabla de jugadores
+COLUMNAS_CAMPO = {
+    "NOMBRE": "name", "DORSAL": "dorsal", "POS": "position", "EDAD": "age", "NAC": "nationality",
+    "ALTURA_M": "height", "PESO_KG": "weight", "PARTIDOS_JUGADOS": "games_played",
+    "TITULAR": "starts", "SUPLENTE": "subs", "GOLES": "goals", "ASISTENCIAS": "assists",
+    "TIROS_PUERTA": "shots_on_target", "FALTAS_COMETIDAS": "fouls_committed", "FALTAS_RECIBIDAS": "fouls_received",
+    "TARJETAS_AMARILLAS": "yellow_cards", "TARJETAS_ROJAS": "red_cards",
+}
+COLUMNAS_PORTEROS = {
+    "NOMBRE": "name", "DORSAL": "dorsal", "POS": "position", "EDAD": "age", "NAC": "nationality",
+    "ALTURA_M": "height", "PESO_KG": "weight", "PARTIDOS_JUGADOS": "games_played",
+    "ATAJADAS": "saves", "GOLES_EN_CONTRA": "goals_conceded",
+    "FALTAS_COMETIDAS": "fouls_committed", "FALTAS_RECIBIDAS": "fouls_received",
+    "TARJETAS_AMARILLAS": "yellow_cards", "TARJETAS_ROJAS": "red_cards",
+}
 
-    # 1. LIMPIEZA PREVIA (Borrar datos antiguos)
-    cursor.execute("DELETE FROM field_players")
-    cursor.execute("DELETE FROM goalkeepers")
-    cursor.execute("DELETE FROM sqlite_sequence WHERE name='field_players'")
-    cursor.execute("DELETE FROM sqlite_sequence WHERE name='goalkeepers'")
-    conn.commit()
+def load_team_map():
+    """
+    Construye la tabla de resolución de equipos a partir de 'teams': nombre normalizado
+    junto con el id del equipo, el de su liga y la temporada vigente de la liga.
 
-    # 2. CARGAR MAPA DE EQUIPOS (Con Normalización)
-    equipos_db = cursor.execute("SELECT name, id, league_id FROM teams").fetchall()
-    
-    mapa_equipos = {}
-    for fila in equipos_db:
-        nombre_original = fila[0]
-        id_equipo = fila[1]
-        id_liga = fila[2]
-        
-        clave_normalizada = normalize_text(nombre_original)
-        mapa_equipos[clave_normalizada] = {'id': id_equipo, 'league_id': id_liga}
-
-    # Diccionario de alias para corregir discrepancias en los nombres de equipos extraídos de diferentes fuentes
-    ALIAS_EQUIPOS = {
-        "atletico de madrid": "atletico madrid",
-        "sevilla fc": "sevilla",
-        "brighton hove albion" : "brighton & hove albion",
-        "bolonia" : "bologna",
-        "genova" : "genoa",
-        "1 fc heidenheim 1846" : "1. fc heidenheim 1846",
-        "1 fc union berlin" : "1. fc union berlin",
-        "f c augsburgo" : "fc augsburg",
-        "st pauli" : "st. pauli"
-    }
-
-    def obtener_ids(nombre_equipo_df):
-        """
-        Función auxiliar interna. Mapea el nombre crudo extraído (Scraping/API) con el ID real 
-        de la base de datos aplicando la lógica de normalización y alias.
-        """
-        # 1. Normalizamos lo que viene del DataFrame (ej: "Atletico De Madrid" -> "atletico de madrid")
-        nombre_limpio = normalize_text(nombre_equipo_df)
-        
-        # 2. Aplicamos el parche del diccionario si existe en nuestros alias
-        if nombre_limpio in ALIAS_EQUIPOS:
-            nombre_limpio = ALIAS_EQUIPOS[nombre_limpio]
-            
-        # 3. Buscamos en la base de datos
-        datos = mapa_equipos.get(nombre_limpio)
-        if datos:
-            return datos['id'], datos['league_id']
-        else:
-            print(f"⚠️ AVISO: No se ha encontrado el equipo '{nombre_equipo_df}' en la BD. Sus jugadores no se insertarán.")
-            return None, None
-
-    # 3. INSERTAR JUGADORES DE CAMPO
-    sql_campo = """
-        INSERT INTO field_players (
-            name, dorsal, position, age, nationality, height, weight,
-            games_played, starts, subs, goals, assists, shots_on_target,
-            fouls_committed, fouls_received, yellow_cards, red_cards,
-            team_id, league_id
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    :return: pl.DataFrame con las columnas team_key, team_id, league_id y season.
     """
-    
-    batch_campo = []
-    
-    for row in df_campo.iter_rows(named=True):
-        # Resolvemos las claves foráneas usando la función auxiliar
-        team_id, league_id = obtener_ids(row['EQUIPO'])
-
-        if team_id:
-            batch_campo.append((
-                row['NOMBRE'], row['DORSAL'], row['POS'], row['EDAD'], row['NAC'],
-                row['ALTURA_M'], row['PESO_KG'], row['PARTIDOS_JUGADOS'],
-                row['TITULAR'], row['SUPLENTE'], row['GOLES'], row['ASISTENCIAS'],
-                row['TIROS_PUERTA'], row['FALTAS_COMETIDAS'], row['FALTAS_RECIBIDAS'],
-                row['TARJETAS_AMARILLAS'], row['TARJETAS_ROJAS'],
-                team_id, league_id
-            ))
-    
-    print(f"JUGADORES: {len(batch_campo)}")
-    
-    # Inserción masiva (bulk insert) para optimizar el rendimiento de SQLite
-    if batch_campo:
-        cursor.executemany(sql_campo, batch_campo)
-        conn.commit()
-
-    # 4. INSERTAR PORTEROS    
-    sql_porteros = """
-        INSERT INTO goalkeepers (
-            name, dorsal, position, age, nationality, height, weight,
-            games_played, saves, goals_conceded,
-            fouls_committed, fouls_received, yellow_cards, red_cards,
-            team_id, league_id
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    rows = get_connection().execute(
+        "SELECT t.name, t.id, t.league_id, l.year FROM teams t INNER JOIN league l ON t.league_id = l.id_league"
+    ).fetchall()
+    teams = pl.DataFrame(
+        rows,
+        schema={"team_name": pl.String, "team_id": pl.Int64, "league_id": pl.Int64, "season": pl.String},
+        orient="row",
+    )
+    return teams.select(normalize_expr("team_name").alias("team_key"), "team_id", "league_id", "season")
+
+def resolve_team_ids(df, team_map):
     """
-    
-    batch_porteros = []
-    
-    for row in df_porteros.iter_rows(named=True):
-        # Resolvemos las claves foráneas usando la función auxiliar
-        team_id, league_id = obtener_ids(row['EQUIPO'])
-        
-        if team_id:
-            batch_porteros.append((
-                row['NOMBRE'], row['DORSAL'], row['POS'], row['EDAD'], row['NAC'],
-                row['ALTURA_M'], row['PESO_KG'], row['PARTIDOS_JUGADOS'],
-                row['ATAJADAS'], row['GOLES_EN_CONTRA'],
-                row['FALTAS_COMETIDAS'], row['FALTAS_RECIBIDAS'],
-                row['TARJETAS_AMARILLAS'], row['TARJETAS_ROJAS'],
-                team_id, league_id
-            ))
-            
-    print(f"PORTEROS: {len(batch_porteros)}")
-    
-    # Inserción masiva para los porteros
-    if batch_porteros:
-        cursor.executemany(sql_porteros, batch_porteros)
-        conn.commit()
+    Añade team_id, league_id y season a los jugadores de `df` a partir de su columna EQUIPO.
+    Solo se normalizan los nombres de equipo distintos (no cada fila), se aplican los alias
+    del registro de ligas (`team_aliases` en ligas.json) y se cruzan con `team_map`; los jugadores de equipos no encontrados se descartan.
+
+    :param df: pl.DataFrame de jugadores con la columna EQUIPO.
+    :param team_map: Resultado de `load_team_map`.
+    :return: pl.DataFrame con los jugadores resueltos.
+    """
+    equipos = (
+        df.lazy()
+        .select(pl.col("EQUIPO").unique())
+        .with_columns(normalize_expr("EQUIPO").replace(league_registry.team_aliases()).alias("team_key"))
+        .join(team_map.lazy(), on="team_key", how="left")
+        .collect()
+    )
+
+    for nombre in equipos.filter(pl.col("team_id").is_null())["EQUIPO"].to_list():
+        print(f"⚠️ AVISO: No se ha encontrado el equipo '{nombre}' en la BD. Sus jugadores no se insertarán.")
+
+    return df.join(
+        equipos.filter(pl.col("team_id").is_not_null()).select("EQUIPO", "team_id", "league_id", "season"),
+        on="EQUIPO",
+        how="inner",
+    )
+
+# Clave natural de un jugador dentro de su tabla
+CLAVE_JUGADOR = ["team_id", "season", "name", "dorsal"]
+
+def _player_batch(df, columnas):
+    """
+    Selecciona y renombra en bloque las columnas de la tabla destino, descarta claves
+    naturales repetidas y calcula el hash de cada fila para detectar cambios.
+    Las columnas que no vengan en el scraping se insertan como nulas.
+    """
+    batch = df.select(
+        [
+            (pl.col(origen) if origen in df.columns else pl.lit(None)).alias(destino)
+            for origen, destino in columnas.items()
+        ]
+        + ["team_id", "league_id", "season"]
+    ).unique(subset=CLAVE_JUGADOR, keep="last", maintain_order=True)
+
+    # Representación canónica de la fila (valores separados y nulos explícitos), construida por
+    # Polars en bloque -> SHA-1, estable entre versiones (el hash nativo de Polars no lo es)
+    canonica = batch.select(
+        pl.concat_str(
+            [pl.col(c).cast(pl.String).fill_null("\\N") for c in batch.columns],
+            separator="\x1f",
+        )
+    ).to_series()
+    row_hash = pl.Series("row_hash", [hashlib.sha1(fila.encode()).hexdigest() for fila in canonica], dtype=pl.String)
+    return batch.with_columns(row_hash)
+
+def _existing_players(tabla, team_ids):
+    """
+    Recupera las filas vigentes (temporada actual de su liga) de los equipos indicados.
+
+    :return: pl.DataFrame con id, clave natural, row_hash y active.
+    """
+    marcadores = ", ".join("?" * len(team_ids))
+    rows = get_connection().execute(
+        f"""
+        SELECT p.id, p.team_id, p.season, p.name, p.dorsal, p.row_hash, p.active
+        FROM {tabla} p
+        INNER JOIN league l ON p.league_id = l.id_league AND p.season = l.year
+        WHERE p.team_id IN ({marcadores})
+        """,
+        list(team_ids),
+    ).fetchall()
+    return pl.DataFrame(
+        rows,
+        schema={"id": pl.Int64, "team_id": pl.Int64, "season": pl.String, "name": pl.String,
+                "dorsal": pl.Int64, "row_hash": pl.String, "active": pl.Int64},
+        orient="row",
+    )
+
+def _sync_players(cursor, tabla, batch):
+    """
+    Sincroniza una tabla de jugadores con el lote recibido, equipo a equipo:
+    inserta los jugadores nuevos, actualiza los que han cambiado (o vuelven a la plantilla)
+    y marca como inactivos los que ya no aparecen en la plantilla de su equipo.
+
+    :return: Diccionario con el número de filas insertadas, actualizadas, sin cambios y dadas de baja.
+    """
+    team_ids = batch["team_id"].unique().to_list()
+    existentes = _existing_players(tabla, team_ids)
+
+    # El dorsal puede ser nulo: usamos un valor centinela para poder cruzar por la clave natural
+    clave = ["team_id", "season", "name", "dorsal_key"]
+    dorsal_key = pl.col("dorsal").fill_null(-1).alias("dorsal_key")
+    cruce = batch.with_columns(dorsal_key).join(
+        existentes.with_columns(dorsal_key).select(*clave, "id", pl.col("row_hash").alias("prev_hash"), "active"),
+        on=clave,
+        how="left",
+    )
+
+    nuevos = cruce.filter(pl.col("id").is_null())
+    cambiados = cruce.filter(
+        pl.col("id").is_not_null() & ((pl.col("row_hash") != pl.col("prev_hash")) | pl.col("prev_hash").is_null() | (pl.col("active") == 0))
+    )
+    sin_cambios = cruce.height - nuevos.height - cambiados.height
+    bajas = existentes.filter(pl.col("active") == 1).join(
+        cruce.filter(pl.col("id").is_not_null()).select("id"), on="id", how="anti"
+    )
+
+    columnas = batch.columns
+    if not nuevos.is_empty():
+        cursor.executemany(
+            f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))})",
+            nuevos.select(columnas).iter_rows(),
+        )
+    if not cambiados.is_empty():
+        cursor.executemany(
+            f"UPDATE {tabla} SET {', '.join(f'{c} = ?' for c in columnas)}, active = 1 WHERE id = ?",
+            cambiados.select(*columnas, "id").iter_rows(),
+        )
+    if not bajas.is_empty():
+        cursor.executemany(f"UPDATE {tabla} SET active = 0 WHERE id = ?", bajas.select("id").iter_rows())
+
+    return {"inserted": nuevos.height, "updated": cambiados.height, "unchanged": sin_cambios, "deleted": bajas.height}
+
+@instrumentation.timed("db.players")
+def insert_players_from_dataframe(df_porteros, df_campo, team_map=None, verbose=True):
+    """
+    Carga incremental de jugadores de campo y porteros, normalizando nombres y usando
+    los alias del registro de ligas para emparejar diferencias entre Web y API.
+
+    Cada jugador se identifica por su clave natural (equipo, temporada, nombre, dorsal) y un
+    hash de la fila: solo se insertan los nuevos y se actualizan los que han cambiado, sin
+    reescribir el resto ni alterar sus ids. Los jugadores que ya no aparecen en la plantilla
+    de un equipo cargado se marcan como inactivos (active = 0). Los equipos que no vienen en
+    la carga y las temporadas anteriores no se modifican.
+
+    Puede llamarse con toda la carga o equipo a equipo (carga en streaming): cada llamada
+    es una transacción propia que solo afecta a los equipos que incluye.
+
+    :param df_porteros: pl.DataFrame de porteros (`convert_to_polars`).
+    :param df_campo: pl.DataFrame de jugadores de campo.
+    :param team_map: Resultado de `load_team_map`, para reutilizarlo entre llamadas (por defecto se consulta).
+    :param verbose: Si es False no se muestra el resumen de cada tabla.
+    :return: Diccionario con el número de filas insertadas, actualizadas, sin cambios y dadas de baja.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    if verbose:
+        print("--- Iniciando actualización de jugadores ---")
+
+    # 1. RESOLUCIÓN DE EQUIPOS (una sola vez por nombre de equipo distinto)
+    if team_map is None:
+        team_map = load_team_map()
+    lotes = {}
+    for tabla, df, columnas in (
+        ("field_players", df_campo, COLUMNAS_CAMPO),
+        ("goalkeepers", df_porteros, COLUMNAS_PORTEROS),
+    ):
+        # convert_to_polars devuelve un DataFrame vacío (sin columnas) si no hubo datos
+        if df.is_empty() or "EQUIPO" not in df.columns:
+            continue
+        lotes[tabla] = _player_batch(resolve_team_ids(df, team_map), columnas)
+
+    # 2. SINCRONIZACIÓN INCREMENTAL (en una única transacción)
+    totales = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+    with conn:
+        for tabla, lote in lotes.items():
+            if lote.is_empty():
+                continue
+            resultado = _sync_players(cursor, tabla, lote)
+            if verbose:
+                print(f"{tabla}: {resultado['inserted']} nuevos, {resultado['updated']} actualizados, "
+                      f"{resultado['unchanged']} sin cambios, {resultado['deleted']} bajas")
+            for clave, valor in resultado.items():
+                totales[clave] += valor
 
-    conn.close()
\ No newline at end of file
+    for clave, valor in totales.items():
+        instrumentation.count(f"db.players_{clave}", valor)
+    return totales
@@ -0,0 +1,111 @@
+"""
+Caché persistente en disco de las respuestas HTTP de ESPN.
+
+Descripción:
+    Guarda el cuerpo de cada respuesta junto con sus cabeceras de validación
+    (ETag y Last-Modified) y la fecha de descarga, usando la URL como clave.
+    `http_client.fetch` la utiliza para servir respuestas frescas sin tocar la red,
+    enviar peticiones condicionales (If-None-Match / If-Modified-Since) cuando la
+    entrada ha caducado y reproducir las descargas en modo offline.
+
+    Cada entrada ocupa dos ficheros en CACHE_DIR: `<sha256(url)>.json` con los
+    metadatos y `<sha256(url)>.body` con el cuerpo en bruto.
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+# Directorio de la caché (configurable por variable de entorno)
+CACHE_DIR = os.environ.get("ESPN_CACHE_DIR", ".http_cache")
+
+
+class CacheEntry:
+    """Entrada de la caché: cuerpo de la respuesta y metadatos de validación."""
+
+    def __init__(self, url, body, etag=None, last_modified=None, fetched_at=0.0):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def is_fresh(self, ttl):
+        """Indica si la entrada tiene menos de `ttl` segundos de antigüedad."""
+        return ttl is not None and time.time() - self.fetched_at < ttl
+
+
+def _paths(url):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    base = os.path.join(CACHE_DIR, key)
+    return base + ".json", base + ".body"
+
+def _write_atomic(path, data, mode):
+    # Escritura en un fichero temporal + rename para que un lector concurrente
+    # nunca vea una entrada a medio escribir. El temporal tiene un nombre único
+    # en cada llamada: dos hilos que guardan la misma URL no se pisan
+    directorio, nombre = os.path.split(path)
+    tmp = tempfile.NamedTemporaryFile(mode, dir=directorio, prefix=nombre + ".", suffix=".tmp", delete=False)
+    try:
+        with tmp:
+            tmp.write(data)
+        os.replace(tmp.name, path)
+    except OSError:
+        os.unlink(tmp.name)
+        raise
+
+def load(url):
+    """
+    Recupera la entrada de caché de `url`.
+
+    :param url: URL de la petición.
+    :return: CacheEntry o None si la URL no está en caché.
+    """
+    meta_path, body_path = _paths(url)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "rb") as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return None
+    return CacheEntry(url, body, meta.get("etag"), meta.get("last_modified"), meta.get("fetched_at", 0.0))
+
+def store(url, body, headers):
+    """
+    Guarda (o reemplaza) la respuesta de `url` en la caché.
+
+    :param url: URL de la petición.
+    :param body: Cuerpo de la respuesta en bytes.
+    :param headers: Cabeceras de la respuesta (para ETag y Last-Modified).
+    :return: CacheEntry almacenada.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    entry = CacheEntry(url, body, headers.get("ETag"), headers.get("Last-Modified"), time.time())
+    meta_path, body_path = _paths(url)
+    _write_atomic(body_path, body, "wb")
+    _write_atomic(meta_path, json.dumps({
+        "url": url,
+        "etag": entry.etag,
+        "last_modified": entry.last_modified,
+        "fetched_at": entry.fetched_at,
+    }), "w")
+    return entry
+
+def touch(entry):
+    """
+    Renueva la fecha de descarga de una entrada tras una respuesta 304,
+    reiniciando su TTL sin reescribir el cuerpo.
+    """
+    entry.fetched_at = time.time()
+    meta_path, _ = _paths(entry.url)
+    _write_atomic(meta_path, json.dumps({
+        "url": entry.url,
+        "etag": entry.etag,
+        "last_modified": entry.last_modified,
+        "fetched_at": entry.fetched_at,
+    }), "w")
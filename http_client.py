@@ -0,0 +1,323 @@
+"""
+Cliente HTTP compartido para todas las peticiones a ESPN.
+
+Descripción:
+    Centraliza el acceso a la red de los scripts de carga (`carga_datos.py` y
+    `carga_datos_jugadores.py`) en una única `requests.Session` con pool de
+    conexiones, de modo que las peticiones reutilizan las conexiones TCP/TLS
+    abiertas (keep-alive) en lugar de negociar una nueva por página.
+
+    Además:
+    - Solicita las respuestas comprimidas (gzip/deflate).
+    - Aplica timeouts configurables y reintentos con backoff exponencial y jitter.
+    - Limita el ritmo de peticiones por host con un 'token bucket'.
+    - Registra la latencia y el tamaño de cada petición para poder auditar la carga.
+    - Mantiene una caché en disco (`http_cache`) con peticiones condicionales y
+      un modo offline que solo reproduce respuestas ya guardadas.
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import http_cache
+import instrumentation
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+# Cabeceras HTTP para simular un navegador real y evitar bloqueos (User-Agent Spoofing)
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# Timeout de conexión y de lectura (segundos)
+TIMEOUT = (5, 30)
+
+# Tamaño del pool de conexiones por host (debe cubrir el número de hilos de descarga)
+POOL_SIZE = 16
+
+# Reintentos ante errores de red o respuestas transitorias del servidor
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 20.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Errores de requests que se consideran transitorios y se reintentan (conexión, timeout,
+# respuesta truncada o mal comprimida); el resto (p. ej. TooManyRedirects) falla sin reintentar
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError)
+
+# Límite de peticiones por segundo (y ráfaga máxima) que se permiten contra cada host de ESPN
+REQUESTS_PER_SECOND = 4.0
+BURST = 4
+
+# Tiempo (segundos) durante el que una respuesta en caché se sirve sin consultar a ESPN
+DEFAULT_TTL = int(os.environ.get("ESPN_CACHE_TTL", 3600))
+
+# Modo offline: solo se sirven respuestas de la caché, nunca se accede a la red
+OFFLINE = os.environ.get("ESPN_OFFLINE", "0") == "1"
+
+
+class HTTPClientError(Exception):
+    """Error definitivo de una petición tras agotar todos los reintentos."""
+
+
+# =============================================================================
+# 2. CONTROL DE CONCURRENCIA (RATE LIMITING POR HOST)
+# =============================================================================
+
+class TokenBucket:
+    """
+    Limitador de peticiones tipo 'token bucket', seguro entre hilos.
+
+    El cubo se rellena a razón de `rate` tokens por segundo hasta un máximo de
+    `capacity`. Cada petición consume un token; si no hay tokens disponibles,
+    el hilo espera el tiempo justo hasta que se genere el siguiente.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible y lo consume."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+# Un limitador por host, creado bajo demanda y compartido por todos los hilos
+_host_limiters = {}
+_host_limiters_lock = threading.Lock()
+
+def wait_for_slot(url, rate=None, capacity=None):
+    """
+    Espera a que el limitador del host de `url` permita una nueva petición.
+
+    :param url: URL que se va a solicitar.
+    :param rate: Peticiones por segundo del host (por defecto REQUESTS_PER_SECOND).
+    :param capacity: Ráfaga máxima permitida (por defecto BURST).
+    """
+    host = urlparse(url).netloc
+    with _host_limiters_lock:
+        limiter = _host_limiters.get(host)
+        if limiter is None:
+            limiter = TokenBucket(rate or REQUESTS_PER_SECOND, capacity or BURST)
+            _host_limiters[host] = limiter
+    limiter.acquire()
+
+
+# =============================================================================
+# 3. SESIÓN COMPARTIDA Y REGISTRO DE PETICIONES
+# =============================================================================
+
+_session = None
+_session_lock = threading.Lock()
+
+# Registro de todas las peticiones realizadas: url, estado, latencia, bytes e intentos
+request_log = []
+_request_log_lock = threading.Lock()
+
+def get_session():
+    """
+    Devuelve la sesión HTTP del proceso, creándola la primera vez.
+    Los reintentos de urllib3 se desactivan porque los gestiona `get`.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HEADERS)
+            _session = session
+        return _session
+
+def _record(url, status, elapsed, size, attempts):
+    instrumentation.record("http.request", elapsed)
+    instrumentation.count("http.requests")
+    instrumentation.count("http.bytes", size)
+    if status is None or status >= 400:
+        instrumentation.count("http.errors")
+    with _request_log_lock:
+        request_log.append({
+            "url": url,
+            "status": status,
+            "elapsed": elapsed,
+            "bytes": size,
+            "attempts": attempts,
+        })
+
+def _backoff(attempt, retry_after=None):
+    """Tiempo de espera antes del siguiente intento: exponencial con 'full jitter'."""
+    if retry_after is not None:
+        return min(BACKOFF_MAX, retry_after)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def _retry_after(resp):
+    value = resp.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+# =============================================================================
+# 4. INTERFAZ PÚBLICA
+# =============================================================================
+
+def get(url, timeout=TIMEOUT, retries=MAX_RETRIES, **kwargs):
+    """
+    Realiza una petición GET a través de la sesión compartida.
+
+    Reintenta ante errores de conexión, timeouts, respuestas truncadas y códigos de
+    estado transitorios (429 y 5xx), esperando entre intentos con backoff exponencial
+    y jitter. Los errores definitivos (p. ej. 404 o TooManyRedirects) no se reintentan;
+    cualquier error de requests se devuelve como HTTPClientError.
+
+    :param url: URL a descargar.
+    :param timeout: Timeout (conexión, lectura) en segundos.
+    :param retries: Número máximo de reintentos.
+    :return: requests.Response con la respuesta correcta.
+    :raises HTTPClientError: Si la petición falla definitivamente.
+    """
+    session = get_session()
+    last_error = None
+
+    for attempt in range(retries + 1):
+        wait_for_slot(url)
+        start = time.perf_counter()
+        retry_after = None
+        try:
+            resp = session.get(url, timeout=timeout, **kwargs)
+        except RETRY_EXCEPTIONS as e:
+            _record(url, None, time.perf_counter() - start, 0, attempt + 1)
+            last_error = e
+        except requests.RequestException as e:
+            _record(url, None, time.perf_counter() - start, 0, attempt + 1)
+            raise HTTPClientError(f"GET {url} falló: {e}") from e
+        else:
+            _record(url, resp.status_code, time.perf_counter() - start, len(resp.content), attempt + 1)
+            if resp.status_code not in RETRY_STATUS:
+                try:
+                    resp.raise_for_status()
+                except requests.HTTPError as e:
+                    raise HTTPClientError(f"GET {url} -> {resp.status_code}") from e
+                return resp
+            last_error = requests.HTTPError(f"{resp.status_code} para {url}")
+            retry_after = _retry_after(resp)
+
+        if attempt < retries:
+            time.sleep(_backoff(attempt, retry_after))
+
+    raise HTTPClientError(f"GET {url} falló tras {retries + 1} intentos: {last_error}") from last_error
+
+def get_json(url, **kwargs):
+    """Descarga `url` y devuelve el cuerpo decodificado como JSON."""
+    return get(url, **kwargs).json()
+
+
+class CachedResponse:
+    """
+    Respuesta devuelta por `fetch`.
+
+    `from_cache` indica que el cuerpo no se ha descargado en esta llamada y
+    `unchanged` que es idéntico al de la descarga anterior (entrada fresca,
+    304 Not Modified o mismo contenido), por lo que puede omitirse su procesado.
+    """
+
+    def __init__(self, url, content, from_cache, unchanged):
+        self.url = url
+        self.content = content
+        self.from_cache = from_cache
+        self.unchanged = unchanged
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+def set_offline(offline=True):
+    """Activa o desactiva el modo offline (solo caché) para todo el proceso."""
+    global OFFLINE
+    OFFLINE = offline
+
+def fetch(url, ttl=None, **kwargs):
+    """
+    Descarga `url` pasando por la caché en disco.
+
+    - Entrada fresca (menos de `ttl` segundos): se sirve sin acceder a la red.
+    - Entrada caducada: petición condicional con If-None-Match / If-Modified-Since;
+      un 304 renueva la entrada y reutiliza el cuerpo guardado.
+    - Modo offline: se sirve cualquier entrada existente, aunque esté caducada.
+
+    :param url: URL a descargar.
+    :param ttl: Vigencia de la caché en segundos (por defecto DEFAULT_TTL).
+    :return: CachedResponse.
+    :raises HTTPClientError: Si la petición falla, o en modo offline si la URL no está en caché.
+    """
+    ttl = DEFAULT_TTL if ttl is None else ttl
+    entry = http_cache.load(url)
+
+    if entry is not None and (OFFLINE or entry.is_fresh(ttl)):
+        instrumentation.count("http.cache_hits")
+        return CachedResponse(url, entry.body, from_cache=True, unchanged=True)
+    if OFFLINE:
+        raise HTTPClientError(f"Modo offline: {url} no está en la caché")
+
+    headers = dict(kwargs.pop("headers", None) or {})
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    resp = get(url, headers=headers, **kwargs)
+    if resp.status_code == 304 and entry is not None:
+        http_cache.touch(entry)
+        instrumentation.count("http.not_modified")
+        return CachedResponse(url, entry.body, from_cache=True, unchanged=True)
+
+    http_cache.store(url, resp.content, resp.headers)
+    unchanged = entry is not None and entry.body == resp.content
+    return CachedResponse(url, resp.content, from_cache=False, unchanged=unchanged)
+
+def summary():
+    """
+    Resume el registro de peticiones realizadas hasta el momento.
+
+    :return: Diccionario con número de peticiones, errores, bytes y latencias.
+    """
+    with _request_log_lock:
+        log = list(request_log)
+    latencies = sorted(r["elapsed"] for r in log)
+    return {
+        "requests": len(log),
+        "errors": sum(1 for r in log if r["status"] is None or r["status"] >= 400),
+        "bytes": sum(r["bytes"] for r in log),
+        "total_time": sum(latencies),
+        "max_latency": latencies[-1] if latencies else 0.0,
+        "p50_latency": latencies[len(latencies) // 2] if latencies else 0.0,
+    }
@@ -0,0 +1,130 @@
+"""
+Exportación de los gráficos a imágenes estáticas (PNG/SVG/PDF).
+
+Descripción:
+    Genera las imágenes de todos los gráficos registrados a partir de sus
+    especificaciones JSON (`graficos/specs/`), para poder incluirlas en correos o
+    informes sin navegador.
+
+    - Todas las figuras pendientes se renderizan en un único lote con
+      `plotly.io.write_images`, que reutiliza el mismo proceso de kaleido en lugar
+      de arrancar un renderizador por figura.
+    - Cada imagen se guarda junto con la huella de su figura (datos y layout), el
+      formato, el tamaño y la escala; si nada ha cambiado no se vuelve a renderizar.
+
+    Requiere el paquete opcional `kaleido` (pip install kaleido).
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import hashlib
+import json
+import os
+
+# Formatos, tamaño (px) y escala por defecto de las imágenes (configurables por variable de entorno)
+IMAGE_FORMATS = [f.strip() for f in os.environ.get("ESPN_IMAGE_FORMATS", "png").split(",") if f.strip()]
+WIDTH = int(os.environ.get("ESPN_IMAGE_WIDTH", 1200))
+HEIGHT = int(os.environ.get("ESPN_IMAGE_HEIGHT", 800))
+SCALE = float(os.environ.get("ESPN_IMAGE_SCALE", 1))
+
+SUPPORTED_FORMATS = {"png", "jpg", "jpeg", "webp", "svg", "pdf"}
+
+# Índice de la caché: ruta de la imagen -> huella con la que se generó
+CACHE_FILE = ".cache.json"
+
+
+class ImageExportError(Exception):
+    """Error al exportar las imágenes (p. ej. kaleido no está instalado)."""
+
+
+def figure_fingerprint(spec, formato, width, height, scale):
+    """
+    Huella de una imagen: datos y layout de la figura más los parámetros de renderizado.
+
+    :param spec: Especificación de la figura (diccionario con 'data' y 'layout').
+    :return: Cadena hexadecimal sha256.
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps(spec, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    h.update(f"|{formato}|{width}|{height}|{scale}".encode("utf-8"))
+    return h.hexdigest()
+
+def _load_cache(out_dir):
+    try:
+        with open(os.path.join(out_dir, CACHE_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(out_dir, cache):
+    with open(os.path.join(out_dir, CACHE_FILE), "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+def _render(specs, paths, width, height, scale):
+    """Renderiza en un único lote las figuras indicadas."""
+    try:
+        import plotly.io as pio
+    except ImportError as e:
+        raise ImageExportError("plotly no está instalado") from e
+
+    figs = [pio.from_json(json.dumps(spec), skip_invalid=True) for spec in specs]
+    try:
+        if hasattr(pio, "write_images"):
+            # kaleido >= 1: un solo navegador para todo el lote
+            pio.write_images(figs, paths, width=width, height=height, scale=scale)
+        else:
+            # kaleido < 1 mantiene por sí mismo un proceso persistente entre llamadas
+            for fig, path in zip(figs, paths):
+                pio.write_image(fig, path, width=width, height=height, scale=scale)
+    except (ImportError, ValueError, RuntimeError) as e:
+        raise ImageExportError(f"No se pudieron renderizar las imágenes: {e}") from e
+
+def export_images(nombres, specs_dir, out_dir, formats=None, width=None, height=None, scale=None):
+    """
+    Exporta a imagen los gráficos indicados, renderizando solo los que han cambiado.
+
+    :param nombres: Nombres de los gráficos (su especificación es `<specs_dir>/<nombre>.json`).
+    :param specs_dir: Directorio de las especificaciones JSON.
+    :param out_dir: Directorio de las imágenes.
+    :param formats: Formatos de imagen (por defecto IMAGE_FORMATS).
+    :param width: Ancho en píxeles (por defecto WIDTH).
+    :param height: Alto en píxeles (por defecto HEIGHT).
+    :param scale: Factor de escala (por defecto SCALE).
+    :return: Tupla (imágenes renderizadas, imágenes reutilizadas de la caché).
+    :raises ImageExportError: Si algún formato no está soportado o falla el renderizado.
+    """
+    formats = IMAGE_FORMATS if formats is None else formats
+    width = WIDTH if width is None else width
+    height = HEIGHT if height is None else height
+    scale = SCALE if scale is None else scale
+
+    desconocidos = [f for f in formats if f not in SUPPORTED_FORMATS]
+    if desconocidos:
+        raise ImageExportError(f"Formatos de imagen no soportados: {', '.join(desconocidos)}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    cache = _load_cache(out_dir)
+
+    pendientes = []  # (spec, ruta, huella)
+    reutilizadas = 0
+    for nombre in nombres:
+        try:
+            with open(os.path.join(specs_dir, nombre + ".json"), encoding="utf-8") as f:
+                spec = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for formato in formats:
+            path = os.path.join(out_dir, f"{nombre}.{formato}")
+            huella = figure_fingerprint(spec, formato, width, height, scale)
+            if cache.get(os.path.basename(path)) == huella and os.path.exists(path):
+                reutilizadas += 1
+            else:
+                pendientes.append((spec, path, huella))
+
+    if pendientes:
+        _render([p[0] for p in pendientes], [p[1] for p in pendientes], width, height, scale)
+        for _, path, huella in pendientes:
+            cache[os.path.basename(path)] = huella
+        _save_cache(out_dir, cache)
+
+    return len(pendientes), reutilizadas
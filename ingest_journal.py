@@ -0,0 +1,104 @@
+"""
+Diario de control (checkpoints) de la carga de plantillas.
+
+Descripción:
+    Registra en SQLite (tablas `ingest_runs` e `ingest_units`, ver las migraciones 6
+    y 7 de `db.py`) qué equipos de la ejecución en curso se han descargado, analizado
+    y confirmado, junto con el hash del contenido de su página.
+
+    - Si una carga se interrumpe, la siguiente reanuda la misma ejecución y omite
+      los equipos ya confirmados (sin volver a descargarlos ni esperar al limitador).
+    - Si una carga termina con equipos fallidos, la siguiente solo reintenta esos
+      equipos; la posterior vuelve a recargarlos todos, aunque alguno siga fallando.
+    - Una página cuyo contenido coincide con el último confirmado no se vuelve a
+      analizar ni a escribir.
+    - `force` permite rehacer por completo las ligas indicadas.
+
+    Las etapas de descarga y análisis se ejecutan en otros hilos: sus marcas se
+    acumulan en memoria y solo el hilo escritor las guarda (`flush`), de modo que
+    SQLite sigue teniendo un único escritor.
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import hashlib
+import threading
+
+import db
+
+
+def content_hash(content):
+    """Hash (SHA-1) del contenido descargado de una página."""
+    return hashlib.sha1(content).hexdigest()
+
+
+class IngestJournal:
+    """
+    Diario de una ejecución de carga.
+
+    :param force: Ligas que se rehacen aunque ya estén confirmadas o no hayan cambiado.
+    """
+
+    content_hash = staticmethod(content_hash)
+
+    def __init__(self, force=()):
+        self.force = set(force)
+        self.run_id, self.resumed, self.retry_of = db.start_ingest_run()
+        for league in self.force:
+            db.reset_ingest_league(self.run_id, league)
+        self.units = db.get_ingest_units(self.run_id)
+        self.committed_hashes = db.get_committed_hashes()
+        self.failed = 0
+        self._pending = []
+        self._lock = threading.Lock()
+
+        if self.resumed:
+            hechos = sum(1 for stage, _ in self.units.values() if stage == "committed")
+            print(f"Reanudando la carga {self.run_id}: {hechos} equipos ya confirmados")
+        elif self.retry_of is not None:
+            print(f"Reintentando los equipos fallidos de la carga {self.retry_of}")
+
+    def is_done(self, team_info):
+        """Indica si el equipo ya se confirmó en esta ejecución."""
+        estado = self.units.get(team_info["url"])
+        return estado is not None and estado[0] == "committed"
+
+    def is_unchanged(self, team_info, huella):
+        """Indica si el contenido descargado coincide con el último confirmado del equipo."""
+        if team_info["league_name"] in self.force:
+            return False
+        return self.committed_hashes.get(team_info["url"]) == huella
+
+    def mark(self, team_info, stage, huella=None, error=None):
+        """Anota la etapa alcanzada por un equipo (seguro entre hilos; se guarda en `flush`)."""
+        with self._lock:
+            self._pending.append((team_info["url"], team_info["league_name"], team_info["team_name"], stage, huella, error))
+            if stage == "failed":
+                self.failed += 1
+
+    def flush(self):
+        """Guarda en la base de datos las marcas pendientes. Solo debe llamarse desde el hilo escritor."""
+        with self._lock:
+            pendientes, self._pending = self._pending, []
+        if pendientes:
+            db.record_ingest_units(self.run_id, pendientes)
+        for url, _, _, stage, huella, _ in pendientes:
+            anterior = self.units.get(url, (None, None))
+            self.units[url] = (stage, huella or anterior[1])
+
+    def finish(self):
+        """
+        Cierra la ejecución tras una pasada completa. Si algún equipo ha fallado se cierra
+        como fallida: la próxima carga solo reintentará esos equipos (salvo que esta ya
+        fuera un reintento, en cuyo caso la próxima los recarga todos).
+
+        :return: True si todos los equipos se han confirmado.
+        """
+        self.flush()
+        db.finish_ingest_run(self.run_id, failed=bool(self.failed))
+        if self.failed:
+            if self.retry_of is None:
+                print(f"Carga {self.run_id} incompleta: {self.failed} equipos fallidos se reintentarán en la próxima ejecución")
+            else:
+                print(f"Carga {self.run_id} incompleta: {self.failed} equipos siguen fallando; la próxima ejecución recargará todos los equipos")
+        return not self.failed
@@ -0,0 +1,203 @@
+"""
+Pipeline de ingesta por etapas con colas acotadas.
+
+Descripción:
+    Encadena tres etapas que trabajan a la vez sobre una secuencia de unidades
+    (p. ej. los equipos de las ligas):
+
+        origen -> descarga (N hilos) -> [cola] -> análisis (M hilos) -> [cola] -> escritura (1 hilo)
+
+    - Las colas entre etapas son acotadas: si la escritura o el análisis se
+      retrasan, las etapas anteriores se bloquean (back-pressure) en lugar de
+      acumular páginas en memoria. El pico de memoria depende del tamaño de las
+      colas, no del número de unidades.
+    - La escritura se hace siempre desde un único hilo (el que llama a
+      `run_pipeline`), de modo que SQLite tiene un solo escritor y cada unidad se
+      confirma en cuanto se termina de analizar.
+    - Un fallo en una unidad se registra en la etapa correspondiente y no detiene
+      el resto.
+    - Cada etapa mide unidades procesadas, errores, tiempo de trabajo, tiempo
+      esperando entrada, tiempo bloqueada por la etapa siguiente y ocupación
+      máxima de su cola de salida.
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import queue
+import threading
+import time
+
+# Tamaño por defecto de cada cola entre etapas
+QUEUE_SIZE = 8
+
+# Marca de fin de datos que circula por las colas
+_FIN = object()
+
+
+class StageMetrics:
+    """Métricas de progreso y rendimiento de una etapa, seguras entre hilos."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.idle = 0.0
+        self.blocked = 0.0
+        self.max_queue = 0
+        self.started = None
+        self.finished = None
+        self.lock = threading.Lock()
+
+    def run(self, func, *args, label=None):
+        """
+        Ejecuta el trabajo de una unidad midiendo su duración.
+
+        :return: Tupla (correcto, resultado); si falla, se cuenta el error y el resultado es None.
+        """
+        start = time.perf_counter()
+        with self.lock:
+            if self.started is None:
+                self.started = start
+        try:
+            resultado = func(*args)
+        except Exception as e:
+            with self.lock:
+                self.errors += 1
+                self.busy += time.perf_counter() - start
+            print(f"Error en la etapa '{self.name}'" + (f" ({label})" if label else "") + f": {e}")
+            return False, None
+        with self.lock:
+            self.items += 1
+            self.busy += time.perf_counter() - start
+        return True, resultado
+
+    def get(self, cola):
+        """Toma la siguiente entrada de `cola`, contando el tiempo de espera."""
+        start = time.perf_counter()
+        entrada = cola.get()
+        with self.lock:
+            self.idle += time.perf_counter() - start
+        return entrada
+
+    def put(self, cola, salida):
+        """Deja `salida` en `cola`, contando el tiempo bloqueado si está llena."""
+        start = time.perf_counter()
+        cola.put(salida)
+        with self.lock:
+            self.blocked += time.perf_counter() - start
+            self.max_queue = max(self.max_queue, cola.qsize())
+
+    def finish(self):
+        with self.lock:
+            self.finished = time.perf_counter()
+
+    def as_dict(self):
+        """Resumen de la etapa: unidades, errores, tiempos (s) y unidades por segundo."""
+        with self.lock:
+            elapsed = (self.finished - self.started) if self.started is not None and self.finished is not None else 0.0
+            return {
+                "items": self.items,
+                "errors": self.errors,
+                "elapsed": elapsed,
+                "busy": self.busy,
+                "idle": self.idle,
+                "blocked": self.blocked,
+                "max_queue": self.max_queue,
+                "throughput": self.items / elapsed if elapsed > 0 else 0.0,
+            }
+
+
+def run_pipeline(source, fetch, parse, write, fetch_workers=4, parse_workers=1,
+                 queue_size=QUEUE_SIZE, label=None):
+    """
+    Procesa las unidades de `source` por las etapas de descarga, análisis y escritura.
+
+    :param source: Iterable de unidades; se consume bajo demanda desde los hilos de descarga.
+    :param fetch: fetch(unidad) -> datos descargados.
+    :param parse: parse(unidad, datos) -> resultado analizado.
+    :param write: write(unidad, resultado); se invoca siempre desde el hilo que llama.
+    :param fetch_workers: Hilos de descarga.
+    :param parse_workers: Hilos de análisis.
+    :param queue_size: Capacidad de cada cola entre etapas.
+    :param label: Función opcional unidad -> texto, para los mensajes de error.
+    :return: Diccionario etapa ("fetch", "parse", "write") -> StageMetrics.
+    """
+    metrics = {nombre: StageMetrics(nombre) for nombre in ("fetch", "parse", "write")}
+    descargadas = queue.Queue(max(1, queue_size))
+    analizadas = queue.Queue(max(1, queue_size))
+    describe = label or (lambda unidad: None)
+
+    origen = iter(source)
+    origen_lock = threading.Lock()
+
+    def siguiente():
+        # El origen puede ser un generador (no es seguro entre hilos): se consume bajo un cerrojo
+        with origen_lock:
+            try:
+                return next(origen, _FIN)
+            except Exception as e:
+                print(f"Error obteniendo las unidades a procesar: {e}")
+                with metrics["fetch"].lock:
+                    metrics["fetch"].errors += 1
+                return _FIN
+
+    def descargar():
+        etapa = metrics["fetch"]
+        while True:
+            unidad = siguiente()
+            if unidad is _FIN:
+                return
+            ok, datos = etapa.run(fetch, unidad, label=describe(unidad))
+            if ok:
+                etapa.put(descargadas, (unidad, datos))
+
+    def analizar():
+        etapa = metrics["parse"]
+        while True:
+            entrada = etapa.get(descargadas)
+            if entrada is _FIN:
+                return
+            unidad, datos = entrada
+            ok, resultado = etapa.run(parse, unidad, datos, label=describe(unidad))
+            if ok:
+                etapa.put(analizadas, (unidad, resultado))
+
+    def coordinar(descargadores, analizadores):
+        # Cierra cada etapa cuando termina la anterior, propagando la marca de fin
+        for hilo in descargadores:
+            hilo.join()
+        metrics["fetch"].finish()
+        for _ in analizadores:
+            descargadas.put(_FIN)
+        for hilo in analizadores:
+            hilo.join()
+        metrics["parse"].finish()
+        analizadas.put(_FIN)
+
+    # Hilos con nombre para identificarlos en perfiladores como py-spy (--threads)
+    descargadores = [threading.Thread(target=descargar, name=f"descarga-{i}", daemon=True) for i in range(max(1, fetch_workers))]
+    analizadores = [threading.Thread(target=analizar, name=f"analisis-{i}", daemon=True) for i in range(max(1, parse_workers))]
+    coordinador = threading.Thread(target=coordinar, args=(descargadores, analizadores), name="coordinador", daemon=True)
+    for hilo in descargadores + analizadores + [coordinador]:
+        hilo.start()
+
+    # Etapa de escritura: un único escritor en el hilo actual
+    etapa = metrics["write"]
+    while True:
+        entrada = etapa.get(analizadas)
+        if entrada is _FIN:
+            break
+        unidad, resultado = entrada
+        etapa.run(write, unidad, resultado, label=describe(unidad))
+    etapa.finish()
+    coordinador.join()
+    return metrics
+
+def print_metrics(metrics):
+    """Muestra las métricas de cada etapa del pipeline."""
+    print(f"{'Etapa':<6} {'uds':>5} {'err':>4} {'total':>8} {'trabajo':>8} {'espera':>8} {'bloqueo':>8} {'uds/s':>7} {'cola':>5}")
+    for nombre, etapa in metrics.items():
+        m = etapa.as_dict()
+        print(f"{nombre:<6} {m['items']:>5} {m['errors']:>4} {m['elapsed']:>7.2f}s {m['busy']:>7.2f}s "
+              f"{m['idle']:>7.2f}s {m['blocked']:>7.2f}s {m['throughput']:>7.1f} {m['max_queue']:>5}")
@@ -0,0 +1,185 @@
+"""
+Instrumentación de las ejecuciones: tiempos por etapa, contadores y perfilado.
+
+Descripción:
+    - `span(nombre)` (gestor de contexto) y `timed(nombre)` (decorador) acumulan,
+      por nombre, el número de llamadas y el tiempo total y máximo. Los nombres
+      usan prefijos por capa: "http.", "scrape.", "db.", "analysis.", "render.", ...
+    - `count(nombre, n)` acumula contadores (filas, bytes, peticiones...).
+    - `write_summary` guarda el resumen de la ejecución en JSON
+      (`metricas/<script>_<fecha>.json` y `metricas/<script>_latest.json`) para
+      poder comparar una ejecución con las anteriores.
+    - `profiling` activa cProfile de forma opcional (`--profile` o ESPN_PROFILE=1)
+      y guarda un `.prof` junto al resumen (se abre con `snakeviz` o `pstats`).
+      Para py-spy no hace falta nada: los hilos de la carga tienen nombre propio
+      (`py-spy record --threads -- python carga_datos.py`).
+
+    Todas las funciones son seguras entre hilos. En los procesos del pool de
+    `analysis_runner` se toma una instantánea (`snapshot`) que el proceso
+    principal incorpora con `merge`.
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import cProfile
+import functools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Directorio de los resúmenes y perfiles (configurable por variable de entorno)
+DIRECTORY = os.environ.get("ESPN_METRICS_DIR", "metricas")
+
+# Perfilado con cProfile activado por defecto (ESPN_PROFILE=1)
+PROFILE = os.environ.get("ESPN_PROFILE", "0") == "1"
+
+_lock = threading.Lock()
+_spans = {}     # nombre -> [llamadas, total (s), máximo (s)]
+_counters = {}  # nombre -> valor
+_started = time.perf_counter()
+_started_at = datetime.now()
+
+
+def record(nombre, segundos, llamadas=1):
+    """Acumula una duración ya medida en el span `nombre`."""
+    with _lock:
+        span_ = _spans.setdefault(nombre, [0, 0.0, 0.0])
+        span_[0] += llamadas
+        span_[1] += segundos
+        span_[2] = max(span_[2], segundos)
+
+@contextmanager
+def span(nombre):
+    """Mide el tiempo del bloque y lo acumula en el span `nombre` (también si lanza una excepción)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(nombre, time.perf_counter() - start)
+
+def timed(nombre):
+    """Decorador: mide cada llamada a la función en el span `nombre`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(nombre):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(nombre, n=1):
+    """Suma `n` al contador `nombre`."""
+    with _lock:
+        _counters[nombre] = _counters.get(nombre, 0) + n
+
+def reset():
+    """Vacía los spans y contadores y reinicia el reloj de la ejecución."""
+    global _started, _started_at
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _started = time.perf_counter()
+        _started_at = datetime.now()
+
+def snapshot():
+    """Copia de los spans y contadores acumulados (serializable, para enviarla entre procesos)."""
+    with _lock:
+        return {
+            "spans": {nombre: list(valores) for nombre, valores in _spans.items()},
+            "counters": dict(_counters),
+        }
+
+def merge(instantanea):
+    """Incorpora los spans y contadores de una instantánea tomada en otro proceso."""
+    with _lock:
+        for nombre, (llamadas, total, maximo) in instantanea["spans"].items():
+            span_ = _spans.setdefault(nombre, [0, 0.0, 0.0])
+            span_[0] += llamadas
+            span_[1] += total
+            span_[2] = max(span_[2], maximo)
+        for nombre, valor in instantanea["counters"].items():
+            _counters[nombre] = _counters.get(nombre, 0) + valor
+
+def summary(extra=None):
+    """
+    Resumen de la ejecución.
+
+    :param extra: Diccionario opcional con información adicional (p. ej. resultados o errores).
+    :return: Diccionario con la duración total, los spans (llamadas, total, media y máximo) y los contadores.
+    """
+    instantanea = snapshot()
+    resumen = {
+        "started_at": _started_at.isoformat(timespec="seconds"),
+        "wall_time": time.perf_counter() - _started,
+        "argv": sys.argv[1:],
+        "python": platform.python_version(),
+        "spans": {
+            nombre: {"calls": llamadas, "total": total, "mean": total / llamadas if llamadas else 0.0, "max": maximo}
+            for nombre, (llamadas, total, maximo) in sorted(instantanea["spans"].items())
+        },
+        "counters": dict(sorted(instantanea["counters"].items())),
+    }
+    if extra:
+        resumen.update(extra)
+    return resumen
+
+def _run_path(directory, script, extension):
+    return os.path.join(directory, f"{script}_{_started_at.strftime('%Y%m%d-%H%M%S')}{extension}")
+
+def write_summary(script, extra=None, directory=None):
+    """
+    Guarda el resumen de la ejecución en JSON, con fecha y como `<script>_latest.json`.
+
+    :param script: Nombre del script ("carga_datos", "main").
+    :param extra: Información adicional para el resumen.
+    :param directory: Directorio de salida (por defecto DIRECTORY).
+    :return: Ruta del resumen fechado.
+    """
+    directory = DIRECTORY if directory is None else directory
+    os.makedirs(directory, exist_ok=True)
+    resumen = summary(extra)
+    path = _run_path(directory, script, ".json")
+    for destino in (path, os.path.join(directory, f"{script}_latest.json")):
+        with open(destino, "w", encoding="utf-8") as f:
+            json.dump(resumen, f, indent=2, ensure_ascii=False)
+    return path
+
+@contextmanager
+def profiling(script, enabled=None):
+    """
+    Perfila el bloque con cProfile si está activado y guarda `<script>_<fecha>.prof`.
+    Solo cubre el hilo que lo activa (los hilos de descarga y los procesos del pool no).
+
+    :param script: Nombre del script, para el fichero de salida.
+    :param enabled: Activa el perfilado (por defecto PROFILE).
+    """
+    enabled = PROFILE if enabled is None else enabled
+    if not enabled:
+        yield None
+        return
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield perfil
+    finally:
+        perfil.disable()
+        os.makedirs(DIRECTORY, exist_ok=True)
+        path = _run_path(DIRECTORY, script, ".prof")
+        perfil.dump_stats(path)
+        print(f"Perfil guardado en {path}")
+
+def print_summary(limit=12):
+    """Muestra los spans con más tiempo acumulado y los contadores."""
+    resumen = summary()
+    spans = sorted(resumen["spans"].items(), key=lambda item: item[1]["total"], reverse=True)[:limit]
+    if spans:
+        ancho = max(len(nombre) for nombre, _ in spans)
+        for nombre, s in spans:
+            print(f"{nombre:<{ancho}}  {s['calls']:>6} x  {s['total']:8.2f} s  (máx {s['max']:.3f} s)")
+    for nombre, valor in resumen["counters"].items():
+        print(f"{nombre}: {valor}")
@@ -0,0 +1,115 @@
+"""
+Registro de ligas: qué competiciones se cargan y cómo.
+
+Descripción:
+    Lee `ligas.json` (o el fichero indicado en ESPN_LEAGUES), compartido por la
+    carga de clasificaciones (`carga_datos.py`) y la de plantillas
+    (`carga_datos_jugadores.py`):
+
+    - `leagues`: cada liga con su nombre, la URL de su clasificación (API de
+      standings) y la de su página de equipos. Opcionalmente:
+        - `enabled`: si es false, la liga no se carga.
+        - `concurrency`: descargas simultáneas de plantillas de la liga.
+        - `standings_refresh` / `squads_refresh`: segundos que se reutilizan la
+          clasificación y las páginas de equipos y plantillas de la caché HTTP.
+      Los valores que falten se toman de `defaults`.
+    - `team_aliases`: nombres de equipo (normalizados) del scraping que difieren
+      de los de la API de clasificación.
+    - `country_codes`: nacionalidad (en español) -> código ISO alpha-3 para los mapas.
+
+    Añadir o quitar una liga es solo un cambio en el fichero.
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import json
+import os
+import threading
+
+# Fichero del registro (por defecto, junto a este módulo)
+REGISTRY_PATH = os.environ.get(
+    "ESPN_LEAGUES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "ligas.json")
+)
+
+# Valores por defecto de cada liga si ni la liga ni `defaults` los indican
+DEFAULTS = {
+    "enabled": True,
+    "concurrency": 4,
+    "standings_refresh": 3600,
+    "squads_refresh": 24 * 3600,
+}
+
+REQUIRED = ("name", "standings_url", "teams_url")
+
+_registry = None
+_lock = threading.Lock()
+
+
+def set_registry_path(path):
+    """Cambia el fichero del registro (p. ej. en los benchmarks) y descarta el ya leído."""
+    global REGISTRY_PATH, _registry
+    with _lock:
+        REGISTRY_PATH = path
+        _registry = None
+
+def _league(entrada, defaults, path):
+    faltan = [clave for clave in REQUIRED if not entrada.get(clave)]
+    if faltan:
+        raise ValueError(f"{path}: a la liga {entrada.get('name', '?')!r} le falta {', '.join(faltan)}")
+    liga = {**DEFAULTS, **defaults, **entrada}
+    for clave in ("concurrency", "standings_refresh", "squads_refresh"):
+        # bool es subclase de int en Python: 'true' en el JSON no es un número válido
+        valor = liga[clave]
+        if isinstance(valor, bool) or not isinstance(valor, int) or valor < (1 if clave == "concurrency" else 0):
+            raise ValueError(f"{path}: valor no válido de '{clave}' en la liga {liga['name']!r}: {valor!r}")
+    return liga
+
+def load():
+    """
+    Lee y valida el registro (una sola vez; las llamadas siguientes devuelven el mismo).
+
+    :return: Diccionario con "leagues" (todas, con los valores por defecto aplicados),
+             "team_aliases" y "country_codes".
+    :raises ValueError: Si falta algún campo obligatorio, hay ligas repetidas o un valor no es válido.
+    """
+    global _registry
+    with _lock:
+        if _registry is None:
+            with open(REGISTRY_PATH, encoding="utf-8") as f:
+                datos = json.load(f)
+            ligas = [_league(entrada, datos.get("defaults", {}), REGISTRY_PATH) for entrada in datos.get("leagues", [])]
+            nombres = [liga["name"] for liga in ligas]
+            repetidas = sorted({nombre for nombre in nombres if nombres.count(nombre) > 1})
+            if repetidas:
+                raise ValueError(f"{REGISTRY_PATH}: ligas repetidas: {', '.join(repetidas)}")
+            _registry = {
+                "leagues": ligas,
+                "team_aliases": datos.get("team_aliases", {}),
+                "country_codes": datos.get("country_codes", {}),
+            }
+        return _registry
+
+def leagues(names=None):
+    """
+    Ligas activas, en el orden del registro.
+
+    :param names: Nombres de las ligas a las que limitarse (por defecto, todas las activas).
+    :return: Lista de diccionarios con name, standings_url, teams_url, concurrency,
+             standings_refresh y squads_refresh.
+    """
+    return [
+        liga for liga in load()["leagues"]
+        if liga["enabled"] and (names is None or liga["name"] in names)
+    ]
+
+def league_names():
+    """Nombres de las ligas activas."""
+    return [liga["name"] for liga in leagues()]
+
+def team_aliases():
+    """Alias de nombres de equipo normalizados (scraping -> clasificación)."""
+    return load()["team_aliases"]
+
+def country_codes():
+    """Nacionalidad en español -> código ISO alpha-3."""
+    return load()["country_codes"]
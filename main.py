@@ -1,23 +1,31 @@
 import polars as pl
+import argparse
 import sys
 import os
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import time
+import db
+import analysis_runner
+import dashboard
+import image_export
+import instrumentation
+import league_registry
+import output_sink
+from data_access import produces, requires
 
+# plotly solo se importa si se van a generar gráficos (ver `load_plotly`)
+px = go = make_subplots = None
 
-sys.stdout.reconfigure(encoding='utf-8')
-# Definir la ruta de la base de datos
-db_path = "soccer.db"
-# Crear la URI de conexión para SQLite
-uri = f"sqlite://{db_path}"
+# RENDER: generar los gráficos HTML. SHOW: abrirlos además en el navegador.
+RENDER = True
+SHOW = True
 
-# Consulta SQL principal para extraer estadísticas generales ligadas a equipos y ligas
-query = "SELECT name, played, wins, draws, points, goals_against, goals_for, name_league  FROM stats s INNER JOIN teams t ON team_id=id INNER JOIN league l ON league_id=id_league"
+# Cómo incluye plotly.js cada HTML: "inline" (bundle completo en cada fichero),
+# "directory" (un único plotly.min.js compartido en DIRECTORIO_GRAFICOS) o "cdn"
+PLOTLYJS_MODES = {"inline": True, "directory": "directory", "cdn": "cdn"}
+PLOTLYJS = os.environ.get("ESPN_PLOTLYJS", "inline")
 
-# Leer la base de datos con Polars empleando la query generada
-df = pl.read_database_uri(query=query, uri=uri)
 
+sys.stdout.reconfigure(encoding='utf-8')
 # Crear directorio de almacenamiento de CSV si no existe
 DIRECTORIO_CSV = "data_output"
 os.makedirs(DIRECTORIO_CSV, exist_ok=True)
@@ -26,37 +34,74 @@ os.makedirs(DIRECTORIO_CSV, exist_ok=True)
 DIRECTORIO_GRAFICOS = "graficos"
 os.makedirs(DIRECTORIO_GRAFICOS, exist_ok=True)
 
+# Especificación JSON de cada figura (datos y layout), a partir de la que se monta el dashboard
+# y se exportan las imágenes estáticas
+DIRECTORIO_SPECS = os.path.join(DIRECTORIO_GRAFICOS, "specs")
+DIRECTORIO_IMAGENES = os.path.join(DIRECTORIO_GRAFICOS, "img")
+
+def load_plotly():
+    """Importa plotly bajo demanda, para que el modo sin gráficos no lo cargue nunca."""
+    global px, go, make_subplots
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+@instrumentation.timed("render.save_figure")
+def save_figure(fig, nombre):
+    """
+    Guarda la figura como HTML en DIRECTORIO_GRAFICOS (incluyendo plotly.js según
+    PLOTLYJS) junto con su especificación JSON y, salvo en modo headless, la muestra.
+
+    :param fig: Figura de plotly.
+    :param nombre: Nombre del fichero sin extensión.
+    """
+    fig.write_html(f"{DIRECTORIO_GRAFICOS}/{nombre}.html", include_plotlyjs=PLOTLYJS_MODES[PLOTLYJS])
+    os.makedirs(DIRECTORIO_SPECS, exist_ok=True)
+    fig.write_json(f"{DIRECTORIO_SPECS}/{nombre}.json")
+    if SHOW:
+        fig.show()
+
+# Columnas que lee cada análisis. `data_access` solo consulta en SQLite las columnas declaradas.
+# Los análisis por liga y por equipo leen los resúmenes que `db` materializa al cargar la
+# clasificación (`league_summary` y `team_summary`); cada uno solo selecciona sus columnas.
+COLUMNAS_VICTORIAS_EMPATES = ["name_league", "wins", "matches_drawn", "played", "win_rate", "draw_rate"]
+COLUMNAS_EQUIPOS = ["name", "played", "points", "goals_against", "goals_for", "name_league"]
+COLUMNAS_EQUIPOS_EFICIENTES = COLUMNAS_EQUIPOS + ["goal_diff", "points_per_game"]
+COLUMNAS_ATAQUES_DEFENSAS = COLUMNAS_EQUIPOS + ["avg_goals_for", "avg_goals_against"]
+COLUMNAS_GOLES_EN_CONTRA_LIGA = ["name_league", "goals_against", "played", "avg_goals_against"]
+COLUMNAS_MEDIA_GOLES_LIGA = ["name_league", "played_mean", "goals_against_mean", "avg_league_goals"]
+COLUMNAS_PUNTOS_LIGA = ["name_league", "played_mean", "points_mean", "mean_league_pts_match"]
+# Columnas de la consulta completa de jugadores de campo: los informes de extremos mantienen
+# todas salvo las que descartan explícitamente
+COLUMNAS_JUGADORES = [
+    "player_id", "player_name", "dorsal", "position", "age", "nationality", "height", "weight",
+    "games_played", "starts", "subs", "goals", "assists", "shots_on_target", "fouls_committed",
+    "fouls_received", "yellow_cards", "red_cards", "player_team_id", "player_league_id",
+    "team_id", "team_name", "team_logo", "team_league_id", "id_league", "name_league", "league_year",
+]
+COLUMNAS_EXTREMOS = [c for c in COLUMNAS_JUGADORES if c not in ("team_name", "games_played")]
+COLUMNAS_FALTAS_EXTREMOS = [c for c in COLUMNAS_JUGADORES if c not in ("team_name", "name_league", "goals", "assists")]
+COLUMNAS_EDADES = ["player_name", "age", "team_name", "name_league"]
+COLUMNAS_NACIONALIDAD = ["player_name", "nationality", "goals", "team_name", "name_league"]
+
+@produces("Victorias_Empates_Por_Liga")
+@requires(league_summary=COLUMNAS_VICTORIAS_EMPATES)
 def get_df_victory_draw_for_league(df):
     """
     Docstring para get_df_victory_draw_for_league
 
     Este método nos permite visualizar las victorias y empates por ligas
     
-    :param df: DataFrame con los datos a tratar y graficar
+    :param df: DataFrame con el resumen por liga (`league_summary`)
     """
-    # Nos quedamos solo con los datos que nos interesan
-    # que son los partidos jugados para hacer el porcentaje, las victorias, empates, y el nombre de la liga
-    df_ve_liga = df.drop(["name", "goals_against", "goals_for", "points"])
-    df_ve_liga = (
-        df_ve_liga.group_by("name_league").agg([ # Agrupamos por ligas
-            pl.sum("wins").alias("wins"), # Sumamos el numero de victorias totales por liga
-            pl.sum("draws").alias("draws"), # El número de empates por ligas
-            pl.sum("played").alias("played") # El número de partidos para hacer el porcentaje
-        ])
-    )
-
-    # Cuando un equipo empata, empata dos equipos, por lo que se divide entre dos para quedarnos con el empate único
+    # Nos quedamos con las victorias, los empates, los partidos jugados y el win-rate y draw-rate de cada liga.
+    # Cuando un equipo empata, empata dos equipos, por lo que el resumen ya cuenta cada empate una sola vez (`matches_drawn`)
+    df_ve_liga = df.select(COLUMNAS_VICTORIAS_EMPATES).rename({"matches_drawn": "draws"})
 
-    df_ve_liga = df_ve_liga.with_columns([
-        (pl.col("draws") / 2).alias("draws")
-    ])
+    output_sink.write(df_ve_liga, "Victorias_Empates_Por_Liga") # Una vez calculado todo, lo guardamos en data_output
 
-    df_ve_liga = df_ve_liga.with_columns([
-        (pl.col("wins") / pl.col("played")).alias("win_rate"), # Calculamos el win-rate de la liga correspondiente
-            (pl.col("draws") / pl.col("played")).alias("draw_rate") # Calculamos el draw-rate de la liga correspondiente
-    ])
-
-    df_ve_liga.write_csv(DIRECTORIO_CSV+"/Victorias_Empates_Por_Liga.csv") # Una vez calculado todo, lo escribimos en un csv
+    if not RENDER: # Modo sin gráficos: solo se generan las tablas de resultados
+        return df_ve_liga
 
     labels = df_ve_liga["name_league"].to_list() # Obtenemos los labels de las diferentes ligas para ponerlo en los gráficos
     win_values = df_ve_liga["win_rate"].to_list() # Obtenemos los valores de las victorias
@@ -79,10 +124,11 @@ def get_df_victory_draw_for_league(df):
                     dict(text='Draws', x=sum(fig.get_subplot(1, 2).x) / 2, y=0.5,
                         font_size=20, showarrow=False, xanchor="center")])
     
-    fig.write_html(DIRECTORIO_GRAFICOS+"/Victorias_Empates_Por_Liga.html")
-    fig.show()
+    save_figure(fig, "Victorias_Empates_Por_Liga")
     return df_ve_liga
 
+@produces("Equipos_Eficientes_GD_Puntos_Por_Partido")
+@requires(team_summary=COLUMNAS_EQUIPOS_EFICIENTES)
 def get_df_efficients_teams(df):
     """
     Docstring para get_df_efficients_teams
@@ -90,17 +136,18 @@ def get_df_efficients_teams(df):
     Nos permite ver cuales son los equipos más eficientes, es decir,
     cuantos puntos por partido consigue cada equipo comparandolo con sus goles de diferencia
 
-    :param df: DataFrame con los datos a tratar y graficar
+    :param df: DataFrame con el resumen por equipo (`team_summary`)
     """
-    df_efficient_equipos = df.drop(["wins", "draws"]) # Quitamos valores que no nos interesan como las victorias y los empates
-    df_efficient_equipos = df_efficient_equipos.with_columns([
-        (pl.col("goals_for") - pl.col("goals_against")).alias("goal_diff"), # Calculamos los goles de diferencia restadno los goles a fovr menos los goles en contra
-        ((pl.col("points") / pl.col("played")).alias("points_per_game")) # Calculamos los puntos por partido dividiendo los puntos por los partidos jugados
-    ])
+    # Nos quedamos con los goles de diferencia (goles a favor menos goles en contra) y los puntos
+    # por partido (puntos entre partidos jugados), ya calculados en el resumen por equipo
+    df_efficient_equipos = df.select(COLUMNAS_EQUIPOS_EFICIENTES)
+
+    # Una vez hecho los cálculos, los guardamos en data_output
 
-    # Una vez hecho los cálculos, los esribimos en un csv
+    output_sink.write(df_efficient_equipos, "Equipos_Eficientes_GD_Puntos_Por_Partido") 
 
-    df_efficient_equipos.write_csv(DIRECTORIO_CSV+"/Equipos_Eficientes_GD_Puntos_Por_Partido.csv") 
+    if not RENDER: # Modo sin gráficos: solo se generan las tablas de resultados
+        return df_efficient_equipos
 
     # Luego lo pintamos en un scatter
 
@@ -115,10 +162,11 @@ def get_df_efficients_teams(df):
     )
 
     # Podemos ver que la diferencia de goles y los puntos por partido tiene una correlación positiva, cuanto más diferencia de goles tengas, mayor puntos por partido obtienes
-    fig.write_html(DIRECTORIO_GRAFICOS+"/Equipos_Eficientes_GD_Puntos_Por_Partido.html")
-    fig.show()
+    save_figure(fig, "Equipos_Eficientes_GD_Puntos_Por_Partido")
     return df_efficient_equipos
 
+@produces("Ataques_vs_Defensas_Por_Equipo")
+@requires(team_summary=COLUMNAS_ATAQUES_DEFENSAS)
 def get_df_goals_against_goals_for_teams(df):
     """
     Docstring para get_df_goals_against_goals_for_teams
@@ -126,17 +174,16 @@ def get_df_goals_against_goals_for_teams(df):
     Este método nos permite visualizar los goles a favor y en contra de cada equipo,
     clasificándolo por quien tiene buena/mala defensa buen/mal ataque comparándolo con la media
 
-    :param df: DataFrame con los datos a tratar y graficar
+    :param df: DataFrame con el resumen por equipo (`team_summary`)
     """
-    # Por otro lado, vamos a hacer una comparación de los goles a favor y en contra de cada equipo, para ver si un equipo es mejor atacando o defendiendo
-    df_goals_against_goals_for_team = df.drop(["wins", "draws"])
+    # Por otro lado, vamos a hacer una comparación de los goles a favor y en contra de cada equipo, para ver si un equipo es mejor atacando o defendiendo.
+    # El resumen por equipo ya trae la media de goles a favor y en contra por partido
+    df_goals_against_goals_for_team = df.select(COLUMNAS_ATAQUES_DEFENSAS)
 
-    df_goals_against_goals_for_team = df_goals_against_goals_for_team.with_columns([
-        (pl.col("goals_for") / pl.col("played")).alias("avg_goals_for"), # Calculamos la media de goles a favor por partido
-        (pl.col("goals_against")/pl.col("played")).alias("avg_goals_against") # Calculamos la media de goles en contra por partido
-    ])
+    output_sink.write(df_goals_against_goals_for_team, "Ataques_vs_Defensas_Por_Equipo") # Lo guardamos en data_output
 
-    df_goals_against_goals_for_team.write_csv(DIRECTORIO_CSV+"/Ataques_vs_Defensas_Por_Equipo.csv") # Lo guardamos en un csv
+    if not RENDER: # Modo sin gráficos: solo se generan las tablas de resultados
+        return df_goals_against_goals_for_team
 
     fig = px.scatter(
         df_goals_against_goals_for_team.to_pandas(),  # Plotly trabaja mejor con pandas
@@ -202,31 +249,27 @@ def get_df_goals_against_goals_for_teams(df):
         font=dict(size=12, color="gray")
     )
     fig.update_layout(template="plotly_white")
-    fig.write_html(DIRECTORIO_GRAFICOS+"/Ataques_vs_Defensas_Por_Equipo.html")
-    fig.show()
+    save_figure(fig, "Ataques_vs_Defensas_Por_Equipo")
     return df_goals_against_goals_for_team
 
+@produces("Ligas_Mas_Defensivas")
+@requires(league_summary=COLUMNAS_GOLES_EN_CONTRA_LIGA)
 def get_df_goals_against_leagues(df):
     """
     Docstring para get_df_goals_against_leagues
     
     Esta función nos permite ver los goles en contra por cada liga para poder analizar que liga es más defensiva y cuales menos
 
-    :param df: DataFrame con los datos a tratar y graficar
+    :param df: DataFrame con el resumen por liga (`league_summary`)
     """
-    # Ahora vamos a ver que ligas tiene menos promedio de goles en contra por partido, por lo que cogemos los datos que nos interese
-    df_goals_against_liga = df.drop(["name", "wins", "draws", "points"])
-
-    df_goals_against_liga = (
-        df_goals_against_liga.group_by("name_league").agg([ # Agrupamos por las diferentes ligas
-            pl.sum("goals_against").alias("goals_against"), # Sumamos todos los goles en contra de cada liga
-            pl.sum("played").alias("played") # Sumamos los partidos jugados de la liga
-        ]).with_columns([
-            (pl.col("goals_against")/pl.col("played")).alias("avg_goals_against") # Calculamos la media de goles en contra por partido de cada liga
-        ])
-    )
+    # Ahora vamos a ver que ligas tiene menos promedio de goles en contra por partido, por lo que cogemos
+    # los goles en contra y partidos jugados totales de cada liga y su media de goles en contra por partido
+    df_goals_against_liga = df.select(COLUMNAS_GOLES_EN_CONTRA_LIGA)
 
-    df_goals_against_liga.write_csv(DIRECTORIO_CSV+"/Ligas_Mas_Defensivas.csv") # Lo guardamos en un csv
+    output_sink.write(df_goals_against_liga, "Ligas_Mas_Defensivas") # Lo guardamos en data_output
+
+    if not RENDER: # Modo sin gráficos: solo se generan las tablas de resultados
+        return df_goals_against_liga
 
     # Pintamos gráficos de barra para mostrar los resultados
     fig = px.bar(
@@ -245,170 +288,70 @@ def get_df_goals_against_leagues(df):
     )
     fig.add_hline(y=global_avg, line_dash="dash", line_color="black")
     
-    fig.write_html(DIRECTORIO_GRAFICOS+"/Ligas_Mas_Defensivas.html")
-    fig.show()
+    save_figure(fig, "Ligas_Mas_Defensivas")
     return df_goals_against_liga
 
+@produces("Media_Goles_Partido_Ligas")
+@requires(league_summary=COLUMNAS_MEDIA_GOLES_LIGA)
 def get_df_avg_league_match_goals(df):
     """
     Docstring para get_df_avg_league_match_goals
 
     Método para mostrar gráficamente la media de los goles por partido por cada liga.
     
-    :param df: DataFrame con los datos a tratar y graficar
+    :param df: DataFrame con el resumen por liga (`league_summary`)
     """
-    # Descartamos variables irrelevantes para enfocarnos únicamente en los cálculos de goles
-    df_goals_league = df.drop(["name", "wins", "goals_for", "points", "draws"])
-    
-    # Agrupamos por la liga para extraer la media aritmética de las columnas numéricas
-    avg_league_matches_goals = df_goals_league.group_by("name_league").mean()
-    
-    # Calculamos la media de goles general dividiendo goles en contra entre los partidos jugados
-    avg_league_goals = avg_league_matches_goals.with_columns((pl.col("goals_against") / pl.col("played")).alias("avg_league_goals"))
+    # Nos quedamos con las medias por equipo de partidos y goles en contra de cada liga y
+    # con la media de goles por partido (goles en contra entre partidos jugados)
+    avg_league_goals = df.select(COLUMNAS_MEDIA_GOLES_LIGA).rename({
+        "played_mean": "played",
+        "goals_against_mean": "goals_against",
+    })
+
+    # Exportamos el DataFrame transformado a los formatos de salida configurados
+    output_sink.write(avg_league_goals, "Media_Goles_Partido_Ligas")
 
-    # Exportamos el DataFrame transformado a formato CSV
-    avg_league_goals.write_csv(DIRECTORIO_CSV+"/Media_Goles_Partido_Ligas.csv")
+    if not RENDER: # Modo sin gráficos: solo se generan las tablas de resultados
+        return avg_league_goals
 
     # Representamos la proporción de goles mediante un gráfico de tipo Pie (Tarta)
     fig = px.pie(avg_league_goals, values='avg_league_goals', names='name_league', title='Media de goles por partido de cada liga')
-    fig.write_html(DIRECTORIO_GRAFICOS+"/Media_Goles_Partido_Ligas.html")
-    fig.show()
+    save_figure(fig, "Media_Goles_Partido_Ligas")
     return avg_league_goals
 
+@produces("Media_Puntos_Partidos_Ligas")
+@requires(league_summary=COLUMNAS_PUNTOS_LIGA)
 def get_df_avg_league_match_pts(df):
     """
     Docstring para get_df_avg_league_match_pts
 
     Método para mostrar gráficamente la media de puntos que se consiguen por partido en cada liga.
 
-    :param df: DataFrame con los datos a tratar y graficar
+    :param df: DataFrame con el resumen por liga (`league_summary`)
     """
-    # Eliminamos columnas que no intervienen en el cálculo de eficiencia por puntos
-    df_pts_league = df.drop(["name", "wins", "goals_for", "draws", "goals_against"])
-    
-    # Obtenemos las medias base agrupando los datos según la liga
-    avg_league_pts = df_pts_league.group_by("name_league").mean()
-    
-    # Generamos la métrica final de puntos por partido (puntos obtenidos / partidos disputados)
-    avg_league_matches_pts = avg_league_pts.with_columns((pl.col("points") / pl.col("played")).alias("mean_league_pts_match"))
+    # Nos quedamos con las medias por equipo de partidos y puntos de cada liga y con la
+    # métrica final de puntos por partido (puntos obtenidos / partidos disputados)
+    avg_league_matches_pts = df.select(COLUMNAS_PUNTOS_LIGA).rename({
+        "played_mean": "played",
+        "points_mean": "points",
+    })
 
     # Guardamos los resultados para alimentar visualizaciones externas si es necesario
-    avg_league_matches_pts.write_csv(DIRECTORIO_CSV+"/Media_Puntos_Partidos_Ligas.csv")
+    output_sink.write(avg_league_matches_pts, "Media_Puntos_Partidos_Ligas")
+
+    if not RENDER: # Modo sin gráficos: solo se generan las tablas de resultados
+        return avg_league_matches_pts
 
     # Representamos los datos en un gráfico de tarta para comparar el peso relativo de cada liga
     fig = px.pie(avg_league_matches_pts, values='mean_league_pts_match', names='name_league', title='Media de puntos por partido de cada liga')
-    fig.write_html(DIRECTORIO_GRAFICOS+"/Media_Puntos_Partidos_Ligas.html")
-    fig.show()
+    save_figure(fig, "Media_Puntos_Partidos_Ligas")
     return avg_league_matches_pts
 
-# =========================================================================
-# EJECUCIÓN: ANÁLISIS A NIVEL DE EQUIPOS Y LIGAS
-# =========================================================================
-
-df_avg_league_goals = get_df_avg_league_match_goals(df)
-
-df_avg_league_match_pts = get_df_avg_league_match_pts(df)
-
-df_ve_ligue = get_df_victory_draw_for_league(df)
-
-df_efficient_teams = get_df_efficients_teams(df)
-
-df_goals_against_goals_for_teams = get_df_goals_against_goals_for_teams(df)
-
-df_goals_against_leagues = get_df_goals_against_leagues(df)
-
-
-# Gráficos de jugadores
-
+# Extremos analizados en los gráficos de jugadores
 wings_players = ["Vinícius Júnior", "Nico Williams", "Antony", "Lamine Yamal", "Raphinha", "Marcus Rashford", "Mohamed Salah", "Rafael Leão", "Jérémy Doku", "Alejandro Garnacho", "Arnaut Danjuma", "Thiago Almada", "Chidera Ejuke"]
-# Convertimos la lista en string SQL
-players_sql_wingers = ", ".join([f"'{player}'" for player in wings_players])
-
-# Consulta SQL estructurada para extraer las estadísticas exhaustivas de jugadores de campo (field_players)
-query = f"""
-SELECT 
-    -- Columnas de la tabla field_players (Jugadores)
-    fp.id AS player_id,
-    fp.name AS player_name,
-    fp.dorsal,
-    fp.position,
-    fp.age,
-    fp.nationality,
-    fp.height,
-    fp.weight,
-    fp.games_played,
-    fp.starts,
-    fp.subs,
-    fp.goals,
-    fp.assists,
-    fp.shots_on_target,
-    fp.fouls_committed,
-    fp.fouls_received,
-    fp.yellow_cards,
-    fp.red_cards,
-    fp.team_id AS player_team_id,
-    fp.league_id AS player_league_id,
-
-    -- Columnas de la tabla teams (Equipos)
-    t.id AS team_id,
-    t.name AS team_name,
-    t.logo AS team_logo,
-    t.league_id AS team_league_id,
-
-    -- Columnas de la tabla league (Ligas)
-    l.id_league,
-    l.name_league,
-    CAST(l.year AS TEXT) AS league_year
-    
-FROM field_players fp
-INNER JOIN teams t ON fp.team_id = t.id
-INNER JOIN league l ON fp.league_id = l.id_league
-"""
-
-# Generación del DataFrame para jugadores de campo
-df_players = pl.read_database_uri(query=query, uri=uri)
-
-# Consulta SQL estructurada para aislar las estadísticas específicas y únicas de los porteros (goalkeepers)
-query_porteros = f"""
-SELECT 
-    -- Columnas de la tabla goalkeepers (Porteros)
-    gk.id AS player_id,
-    gk.name AS player_name,
-    gk.dorsal,
-    gk.position,
-    gk.age,
-    gk.nationality,
-    gk.height,
-    gk.weight,
-    gk.games_played,
-    gk.saves,              -- Atajadas (específico de porteros)
-    gk.goals_conceded,     -- Goles encajados (específico de porteros)
-    gk.fouls_committed,
-    gk.fouls_received,
-    gk.yellow_cards,
-    gk.red_cards,
-    gk.team_id AS player_team_id,
-    gk.league_id AS player_league_id,
-
-    -- Columnas de la tabla teams (Equipos)
-    t.id AS team_id,
-    t.name AS team_name,
-    t.logo AS team_logo,
-    t.league_id AS team_league_id,
-
-    -- Columnas de la tabla league (Ligas)
-    l.id_league,
-    l.name_league,
-    CAST(l.year AS TEXT) AS league_year
-    
-FROM goalkeepers gk
-INNER JOIN teams t ON gk.team_id = t.id
-INNER JOIN league l ON gk.league_id = l.id_league
-"""
-
-# Generación del DataFrame exclusivamente para porteros
-df_goalkeepers = pl.read_database_uri(query=query_porteros, uri=uri)
 
+@produces("Goles_Asistencias_Extremos")
+@requires(field_players=COLUMNAS_EXTREMOS)
 def get_df_goals_assist_wingers(df, wingers):
     """
     Docstring para get_df_goals_assist_wingers
@@ -425,7 +368,7 @@ def get_df_goals_assist_wingers(df, wingers):
     df_wingers = df.filter(pl.col("player_name").is_in(wingers))
     
     # Descartamos columnas prescindibles para el contexto de contribución de goles
-    df_wingers = df_wingers.drop(["team_name", "games_played"])
+    df_wingers = df_wingers.select(COLUMNAS_EXTREMOS)
     
     # Computamos la contribución total agregando goles y asistencias, y ordenamos los resultados de mayor a menor
     df_wingers = (
@@ -435,8 +378,11 @@ def get_df_goals_assist_wingers(df, wingers):
     .sort("total_contribution", descending=True)
     )
     
-    # Volcamos a CSV para posibilitar análisis independientes
-    df_wingers.write_csv(DIRECTORIO_CSV+"/Goles_Asistencias_Extremos.csv")
+    # Volcamos los resultados a disco para posibilitar análisis independientes
+    output_sink.write(df_wingers, "Goles_Asistencias_Extremos")
+
+    if not RENDER: # Modo sin gráficos: solo se generan las tablas de resultados
+        return df_wingers
     
     # Convertimos a Pandas para integrarlo sin incidencias con la librería Plotly
     df_pd = df_wingers.to_pandas()
@@ -502,10 +448,11 @@ def get_df_goals_assist_wingers(df, wingers):
     fig.update_xaxes(title_text="Goles", row=1, col=2)
     fig.update_yaxes(title_text="Asistencias", row=1, col=2)
 
-    fig.write_html(DIRECTORIO_GRAFICOS+"/Goles_Asistencias_Extremos.html")
-    fig.show()
+    save_figure(fig, "Goles_Asistencias_Extremos")
     return df_wingers
 
+@produces("Faltas_Recibidas_Extremos")
+@requires(field_players=COLUMNAS_FALTAS_EXTREMOS)
 def get_df_fouls_received_per_game(df, wingers):
     """
     Docstring para get_df_fouls_received_per_game
@@ -521,7 +468,7 @@ def get_df_fouls_received_per_game(df, wingers):
     df_wingers = df.filter(pl.col("player_name").is_in(wingers))
     
     # Descartamos columnas irrelevantes para aligerar la carga de procesamiento
-    df_wingers = df_wingers.drop(["team_name", "name_league", "goals", "assists"])
+    df_wingers = df_wingers.select(COLUMNAS_FALTAS_EXTREMOS)
     
     # Ejecutamos la métrica dividiendo las faltas recibidas entre los partidos disputados
     df_fouls_per_game = df_wingers.with_columns(
@@ -529,7 +476,10 @@ def get_df_fouls_received_per_game(df, wingers):
     )
 
     # Guardado físico de la extracción de datos
-    df_fouls_per_game.write_csv(DIRECTORIO_CSV+"/Faltas_Recibidas_Extremos.csv")
+    output_sink.write(df_fouls_per_game, "Faltas_Recibidas_Extremos")
+
+    if not RENDER: # Modo sin gráficos: solo se generan las tablas de resultados
+        return df_fouls_per_game
 
     # Pintamos gráficos de barra para mostrar los resultados de las faltas
     fig = px.bar(
@@ -541,10 +491,11 @@ def get_df_fouls_received_per_game(df, wingers):
         title="Faltas cometidas a los extremos por partido"
     )
 
-    fig.write_html(DIRECTORIO_GRAFICOS+"/Faltas_Recibidas_Extremos.html")
-    fig.show()
+    save_figure(fig, "Faltas_Recibidas_Extremos")
     return df_fouls_per_game
 
+@produces("Media_Edades_Equipos", graficos=["Media_Edades_Equipos", "Boxplot_Edades_Equipos"])
+@requires(field_players=COLUMNAS_EDADES, goalkeepers=COLUMNAS_EDADES)
 def get_df_avg_team_ages(df_players, df_goalkeepers):
     """
     Calcula y grafica la edad media de cada equipo utilizando un gráfico 
@@ -553,14 +504,15 @@ def get_df_avg_team_ages(df_players, df_goalkeepers):
     
     :param df_players: pl.DataFrame con los datos de los jugadores de campo.
     :param df_goalkeepers: pl.DataFrame con los datos de los porteros.
-    :return: pl.DataFrame con la edad media calculada por equipo.
+    :return: pl.DataFrame con una fila por equipo: nº de jugadores, media, mediana,
+             cuartiles, IQR, bigotes y edades mínima y máxima.
     """
     # 1. CONSOLIDACIÓN DE DATOS
     # Unimos a los jugadores de campo y a los porteros para obtener la plantilla completa.
     # Seleccionamos únicamente las columnas necesarias para optimizar la memoria.
     df_team_ages = pl.concat([
-        df_players['player_name', 'age', 'team_name', 'name_league'], 
-        df_goalkeepers['player_name', 'age', 'team_name', 'name_league']
+        df_players.select(COLUMNAS_EDADES), 
+        df_goalkeepers.select(COLUMNAS_EDADES)
     ])
 
     # 2. LIMPIEZA DE DATOS (DATA IMPUTATION)
@@ -571,17 +523,36 @@ def get_df_avg_team_ages(df_players, df_goalkeepers):
     )
 
     # 3. AGREGACIÓN Y CÁLCULO
-    # Agrupamos por equipo y calculamos la media aritmética de la columna 'age'.
-    df_avg_team_ages = df_team_ages.with_columns(
-        pl.col("age").mean().over("team_name").alias("avg_age")
+    # Una fila por equipo: tamaño de la plantilla, media, mediana y cuartiles de la edad.
+    # Los bigotes del boxplot (regla de 1,5 x IQR) se calculan aquí para no tener
+    # que enviar a la gráfica la edad de cada jugador.
+    edad = pl.col("age")
+    q1 = edad.quantile(0.25, interpolation="linear")
+    q3 = edad.quantile(0.75, interpolation="linear")
+    df_avg_team_ages = (
+        df_team_ages.group_by("team_name", "name_league").agg(
+            edad.count().alias("players"),
+            edad.mean().alias("avg_age"),
+            edad.median().alias("median_age"),
+            q1.alias("q1_age"),
+            q3.alias("q3_age"),
+            (q3 - q1).alias("iqr_age"),
+            edad.filter(edad >= q1 - 1.5 * (q3 - q1)).min().alias("lower_fence"),
+            edad.filter(edad <= q3 + 1.5 * (q3 - q1)).max().alias("upper_fence"),
+            edad.min().alias("min_age"),
+            edad.max().alias("max_age"),
+        )
     )
-    
+
     # 4. ORDENACIÓN
     # Ordenar los datos de menor a mayor es crucial en un Dot Plot para crear 
     # un efecto de "escalera" visual y facilitar el ranking de equipos.
-    df_avg_team_ages = df_avg_team_ages.sort("avg_age", descending=False)
+    df_avg_team_ages = df_avg_team_ages.sort("avg_age", "team_name", descending=False)
 
-    df_avg_team_ages.write_csv(DIRECTORIO_CSV+"/Media_Edades_Equipos.csv")
+    output_sink.write(df_avg_team_ages, "Media_Edades_Equipos")
+
+    if not RENDER: # Modo sin gráficos: solo se generan las tablas de resultados
+        return df_avg_team_ages
 
     # 5. CREACIÓN DEL GRÁFICO (SCATTER / DOT PLOT)
     fig = px.scatter(
@@ -640,28 +611,61 @@ def get_df_avg_team_ages(df_players, df_goalkeepers):
     )
 
     # Renderizar el gráfico
-    fig.write_html(DIRECTORIO_GRAFICOS+"/Media_Edades_Equipos.html")
-    fig.show()
+    save_figure(fig, "Media_Edades_Equipos")
     show_avg_team_ages_boxplot(df_avg_team_ages)
     
     # Retornamos el DataFrame procesado por si se requiere en otras funciones
     return df_avg_team_ages
 
 def show_avg_team_ages_boxplot(df_avg_team_ages):
-    fig = px.box(df_avg_team_ages, x="team_name", y="age")
-    fig.write_html(DIRECTORIO_GRAFICOS+"/Boxplot_Edades_Equipos.html")
-    fig.show()
+    """
+    Boxplot de la edad de cada plantilla construido a partir de los cuartiles
+    ya calculados por equipo, sin los puntos de cada jugador.
 
-def get_df_avg_goals_by_nationality_map(df_players):
+    :param df_avg_team_ages: pl.DataFrame agregado por equipo (ver `get_df_avg_team_ages`).
+    """
+    fig = go.Figure(go.Box(
+        x=df_avg_team_ages["team_name"].to_list(),
+        q1=df_avg_team_ages["q1_age"].to_list(),
+        median=df_avg_team_ages["median_age"].to_list(),
+        q3=df_avg_team_ages["q3_age"].to_list(),
+        lowerfence=df_avg_team_ages["lower_fence"].to_list(),
+        upperfence=df_avg_team_ages["upper_fence"].to_list(),
+        mean=df_avg_team_ages["avg_age"].to_list(),
+        name="age",
+    ))
+
+    # Edades extremas fuera de los bigotes (outliers), una por lado como máximo
+    outliers = pl.concat([
+        df_avg_team_ages.filter(pl.col("max_age") > pl.col("upper_fence")).select("team_name", age="max_age"),
+        df_avg_team_ages.filter(pl.col("min_age") < pl.col("lower_fence")).select("team_name", age="min_age"),
+    ])
+    fig.add_trace(go.Scatter(
+        x=outliers["team_name"].to_list(),
+        y=outliers["age"].to_list(),
+        mode="markers",
+        name="outliers",
+    ))
+    fig.update_layout(xaxis_title="team_name", yaxis_title="age", showlegend=False)
+    save_figure(fig, "Boxplot_Edades_Equipos")
+
+@produces("Media_Goles_Nacionalidad")
+@requires(field_players=COLUMNAS_NACIONALIDAD)
+def get_df_avg_goals_by_nationality_map(df_players, country_codes=None):
     """
     Calcula la MEDIA de goles por nacionalidad y lo representa 
     en un mapa geográfico interactivo (Choropleth).
+
+    :param df_players: DataFrame con la nacionalidad y los goles de los jugadores de campo.
+    :param country_codes: Diccionario nacionalidad (en español) -> código ISO alpha-3
+                          (por defecto, `country_codes` del registro de ligas).
+    :return: DataFrame con la media de goles por nacionalidad.
     """
     
     # 1. Seleccionamos columnas y rellenamos nulos con 0
     df_team_country_goals = (
         df_players
-        .select(["player_name", "nationality", "goals", "team_name", "name_league"])
+        .select(COLUMNAS_NACIONALIDAD)
         .with_columns(pl.col("goals").fill_null(0))
     )
     
@@ -679,34 +683,18 @@ def get_df_avg_goals_by_nationality_map(df_players):
         .sort("avg_goals", descending=True)
     )
 
-    df_avg_country_goals.write_csv(DIRECTORIO_CSV+"/Media_Goles_Nacionalidad.csv")
+    output_sink.write(df_avg_country_goals, "Media_Goles_Nacionalidad")
 
-    # =========================================================================
-    # MAPEO DE PAÍSES PARA PLOTLY (De Español a Código ISO Alpha-3)
-    # =========================================================================
-    PAISES_ISO = {
-        "España": "ESP", "Argentina": "ARG", "Brasil": "BRA", "Francia": "FRA",
-        "Uruguay": "URY", "Alemania": "DEU", "Inglaterra": "GBR", "Portugal": "PRT",
-        "Italia": "ITA", "Países Bajos": "NLD", "Holanda": "NLD", "Bélgica": "BEL",
-        "Croacia": "HRV", "Marruecos": "MAR", "Colombia": "COL", "Senegal": "SEN",
-        "Suiza": "CHE", "Polonia": "POL", "Serbia": "SRB", "Gales": "WAL",
-        "Estados Unidos": "USA", "México": "MEX", "Ecuador": "ECU", "Ghana": "GHA",
-        "Camerún": "CMR", "Corea del Sur": "KOR", "Japón": "JPN", "Canadá": "CAN",
-        "Costa Rica": "CRI", "Dinamarca": "DNK", "Túnez": "TUN", "Arabia Saudita": "SAU",
-        "Australia": "AUS", "Malasia": "MYS", "Finlandia": "FIN", "Grecia": "GRC",
-        "Rumania": "ROU", "Chile": "CHL", "Paraguay": "PRY", "Perú": "PER",
-        "Venezuela": "VEN", "Noruega": "NOR", "Suecia": "SWE", "Turquía": "TUR",
-        "Argelia": "DZA", "Costa de Marfil": "CIV", "Egipto": "EGY", "Nigeria": "NGA",
-        "Mali": "MLI", "Guinea": "GIN", "República Democrática del Congo": "COD",
-        "Ucrania": "UKR", "República Checa": "CZE", "Austria": "AUT", "Escocia": "SCO",
-        "Irlanda": "IRL", "Islandia": "ISL", "Albania": "ALB", "Bosnia y Herzegovina": "BIH"
-    }
+    if not RENDER: # Modo sin gráficos: solo se generan las tablas de resultados
+        return df_avg_country_goals
 
     # Convertimos a Pandas para graficar y aplicamos el mapeo
     df_pandas = df_avg_country_goals.to_pandas()
     
     # Creamos una nueva columna con el código ISO. Si el país no está en el dicc, lo deja tal cual.
-    df_pandas['iso_alpha'] = df_pandas['nationality'].map(PAISES_ISO).fillna(df_pandas['nationality'])
+    if country_codes is None:
+        country_codes = league_registry.country_codes()
+    df_pandas['iso_alpha'] = df_pandas['nationality'].map(country_codes).fillna(df_pandas['nationality'])
 
     # 4. Creación del Mapa (Choropleth) con Plotly
     fig = px.choropleth(
@@ -742,18 +730,163 @@ def get_df_avg_goals_by_nationality_map(df_players):
         )
     )
     
-    fig.write_html(DIRECTORIO_GRAFICOS+"/Media_Goles_Nacionalidad.html")
-    fig.show()
+    save_figure(fig, "Media_Goles_Nacionalidad")
     return df_avg_country_goals
 
 # =========================================================================
-# EJECUCIÓN: ANÁLISIS ESPECÍFICO DE JUGADORES
+# EJECUCIÓN
 # =========================================================================
 
-df_wingers = get_df_goals_assist_wingers(df_players, wings_players)
-
-df_fouls_wingers_per_game = get_df_fouls_received_per_game(df_players, wings_players)
+# Registro de análisis: (función, argumentos extra) en el orden en que se informan.
+# Cada función declara con `requires` las fuentes y columnas que lee.
+ANALISIS = [
+    # Análisis a nivel de equipos y ligas
+    (get_df_avg_league_match_goals, ()),
+    (get_df_avg_league_match_pts, ()),
+    (get_df_victory_draw_for_league, ()),
+    (get_df_efficients_teams, ()),
+    (get_df_goals_against_goals_for_teams, ()),
+    (get_df_goals_against_leagues, ()),
+    # Análisis específico de jugadores
+    (get_df_goals_assist_wingers, (wings_players,)),
+    (get_df_fouls_received_per_game, (wings_players,)),
+    (get_df_avg_team_ages, ()),
+    (get_df_avg_goals_by_nationality_map, ()),
+]
+
+def configure(render, show, formats=None, plotlyjs=None):
+    """
+    Fija el modo de renderizado y los formatos de salida del proceso
+    (también en cada proceso del pool).
 
-df_avg_team_ages = get_df_avg_team_ages(df_players, df_goalkeepers)
+    :param render: Generar los gráficos HTML.
+    :param show: Abrir además los gráficos en el navegador.
+    :param formats: Formatos de las tablas de resultados (ver `output_sink`).
+    :param plotlyjs: Modo de inclusión de plotly.js (ver PLOTLYJS_MODES).
+    """
+    global RENDER, SHOW, PLOTLYJS
+    output_sink.configure(formats, DIRECTORIO_CSV)
+    if plotlyjs is not None:
+        PLOTLYJS = plotlyjs
+    RENDER = render
+    SHOW = render and show
+    if RENDER:
+        load_plotly()
+
+# Huellas de entradas y código de cada análisis, junto a sus resultados
+DIRECTORIO_HUELLAS = os.path.join(DIRECTORIO_CSV, ".huellas")
+
+def output_paths(func, render=True):
+    """Rutas de los ficheros que genera un análisis (según su declaración `produces`)."""
+    paths = [path for nombre in func.outputs for path in output_sink.paths(nombre)]
+    if render:
+        paths += [f"{DIRECTORIO_GRAFICOS}/{nombre}.html" for nombre in func.figures]
+        paths += [f"{DIRECTORIO_SPECS}/{nombre}.json" for nombre in func.figures]
+    return paths
+
+def main(argv=None):
+    """
+    Ejecuta todos los análisis en un pool de procesos. Las fuentes se leen de la
+    base de datos una sola vez y un análisis que falla no detiene al resto.
+    Solo se regeneran los análisis cuyos datos de entrada o código han cambiado.
 
-df_total_goals_nationality = get_df_avg_goals_by_nationality_map(df_players)
\ No newline at end of file
+    :param argv: Argumentos de línea de comandos (por defecto sys.argv).
+    :return: Código de salida: 0 si todos los análisis terminan, 1 si alguno falla.
+    """
+    parser = argparse.ArgumentParser(description="Genera los CSV y gráficos de análisis a partir de soccer.db")
+    parser.add_argument("--headless", action="store_true",
+                        help="Genera los gráficos HTML sin abrirlos en el navegador")
+    parser.add_argument("--no-render", action="store_true",
+                        help="Solo genera los CSV, sin gráficos ni importar plotly")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos en paralelo (por defecto uno por CPU; 1 = sin pool)")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenera todos los análisis aunque sus entradas no hayan cambiado")
+    parser.add_argument("--formats", default=",".join(output_sink.OUTPUT_FORMATS),
+                        help="Formatos de los resultados separados por comas: csv, parquet, ipc")
+    parser.add_argument("--plotlyjs", choices=sorted(PLOTLYJS_MODES), default=PLOTLYJS,
+                        help="inline: plotly.js dentro de cada HTML; directory: un plotly.min.js compartido; cdn: desde internet")
+    parser.add_argument("--dashboard", action="store_true",
+                        help="Genera además graficos/dashboard.html con todas las figuras en una sola página")
+    parser.add_argument("--images", nargs="?", const=",".join(image_export.IMAGE_FORMATS), default=None,
+                        help="Exporta los gráficos a imagen en graficos/img (formatos separados por comas, p. ej. png,svg)")
+    parser.add_argument("--image-size", default=f"{image_export.WIDTH}x{image_export.HEIGHT}",
+                        help="Tamaño de las imágenes en píxeles, ANCHOxALTO")
+    parser.add_argument("--image-scale", type=float, default=image_export.SCALE,
+                        help="Factor de escala de las imágenes")
+    parser.add_argument("--profile", action="store_true",
+                        help="Perfila la ejecución con cProfile (fichero .prof en metricas/; con --workers 1 incluye los análisis)")
+    args = parser.parse_args(argv)
+    render = not args.no_render
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    try:
+        ancho, alto = (int(v) for v in args.image_size.lower().split("x"))
+    except ValueError:
+        parser.error(f"--image-size debe tener el formato ANCHOxALTO: {args.image_size}")
+    try:
+        output_sink.configure(formats, DIRECTORIO_CSV)
+    except ValueError as e:
+        parser.error(str(e))
+
+    with instrumentation.profiling("main", enabled=args.profile or None):
+        # Nos aseguramos de que el esquema está al día antes de lanzar las consultas
+        db.init_db()
+
+        # El bundle compartido se escribe una sola vez antes de lanzar el pool
+        if render and (args.plotlyjs == "directory" or args.dashboard):
+            dashboard.ensure_plotlyjs(DIRECTORIO_GRAFICOS)
+
+        inicio = time.perf_counter()
+        resultados = analysis_runner.run_analyses(
+            ANALISIS,
+            workers=args.workers,
+            configure=configure,
+            configure_args=(render, not args.headless, formats, args.plotlyjs),
+            state_dir=DIRECTORIO_HUELLAS,
+            outputs=lambda func: output_paths(func, render),
+            force=args.force,
+            # Los códigos de país del registro solo afectan al mapa, pero se incluyen para regenerarlo si cambian
+            salt=f"render={render}|plotlyjs={args.plotlyjs}|paises={sorted(league_registry.country_codes().items())}",
+        )
+        analysis_runner.print_report(resultados, time.perf_counter() - inicio)
+        output_sink.write_manifest([nombre for func, _ in ANALISIS for nombre in func.outputs])
+
+        if render and args.dashboard:
+            figuras = [nombre for func, _ in ANALISIS for nombre in func.figures]
+            with instrumentation.span("render.dashboard"):
+                incluidas = dashboard.build(figuras, DIRECTORIO_SPECS, f"{DIRECTORIO_GRAFICOS}/dashboard.html")
+            print(f"Dashboard con {incluidas} gráficos en {DIRECTORIO_GRAFICOS}/dashboard.html")
+
+        errores_imagenes = False
+        if render and args.images is not None:
+            figuras = [nombre for func, _ in ANALISIS for nombre in func.figures]
+            formatos_imagen = [f.strip() for f in args.images.split(",") if f.strip()]
+            try:
+                with instrumentation.span("render.images"):
+                    renderizadas, reutilizadas = image_export.export_images(
+                        figuras, DIRECTORIO_SPECS, DIRECTORIO_IMAGENES,
+                        formats=formatos_imagen, width=ancho, height=alto, scale=args.image_scale,
+                    )
+                instrumentation.count("render.images_rendered", renderizadas)
+                print(f"Imágenes: {renderizadas} renderizadas, {reutilizadas} sin cambios ({DIRECTORIO_IMAGENES})")
+            except image_export.ImageExportError as e:
+                print(f"Error exportando las imágenes: {e}")
+                errores_imagenes = True
+
+    fallidos = [nombre for nombre, _, error in resultados if error is not None]
+
+    # Resumen de la ejecución (tiempos por etapa y contadores) para compararla con las anteriores
+    path = instrumentation.write_summary("main", extra={
+        "analyses": {nombre: {"seconds": segundos, "error": error} for nombre, segundos, error in resultados},
+        "image_errors": errores_imagenes,
+    })
+    print(f"Resumen de la ejecución en {path}")
+
+    if fallidos:
+        print(f"{len(fallidos)} análisis fallidos: {', '.join(fallidos)}")
+        return 1
+    return 1 if errores_imagenes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Escritura de los resultados de los análisis en `data_output/`.
+
+Descripción:
+    Los análisis de `main.py` no escriben directamente sus tablas, sino que las
+    entregan a `write`, que las guarda en los formatos configurados:
+
+    - csv:     texto plano, como hasta ahora.
+    - parquet: columnar con compresión zstd; las columnas de texto se guardan
+               como categóricas (codificación por diccionario), de modo que los
+               nombres de equipos y ligas no se repiten en cada fila.
+    - ipc:     Arrow IPC sin comprimir, para recargas directas (`pl.read_ipc`).
+
+    Los formatos se eligen con la variable de entorno ESPN_OUTPUT_FORMATS
+    (p. ej. "csv,parquet") o con `configure`. Cada escritura deja en
+    `.manifiesto/` el número de filas, los ficheros generados y el esquema con el
+    que se ha escrito cada uno (categóricas incluidas), y `write_manifest` los
+    reúne en `manifest.json`.
+
+Autor: [David Caraballo Bulnes y Adrián García García]
+"""
+
+import json
+import os
+
+import polars as pl
+
+import instrumentation
+
+# Extensión de cada formato soportado
+FORMATS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "ipc": ".arrow",
+}
+
+# Directorio de salida y formatos activos (configurables por variable de entorno)
+DIRECTORY = "data_output"
+OUTPUT_FORMATS = [f.strip() for f in os.environ.get("ESPN_OUTPUT_FORMATS", "csv").split(",") if f.strip()]
+
+
+def configure(formats=None, directory=None):
+    """
+    Fija los formatos y el directorio de salida del proceso.
+
+    :param formats: Lista de formatos ("csv", "parquet", "ipc").
+    :param directory: Directorio donde se escriben los resultados.
+    :raises ValueError: Si algún formato no está soportado.
+    """
+    global OUTPUT_FORMATS, DIRECTORY
+    if formats is not None:
+        desconocidos = [f for f in formats if f not in FORMATS]
+        if desconocidos:
+            raise ValueError(f"Formatos de salida no soportados: {', '.join(desconocidos)}")
+        OUTPUT_FORMATS = list(formats)
+    if directory is not None:
+        DIRECTORY = directory
+
+def paths(nombre):
+    """Rutas que genera `write` para un resultado con los formatos activos."""
+    return [os.path.join(DIRECTORY, nombre + FORMATS[f]) for f in OUTPUT_FORMATS]
+
+def _manifest_dir():
+    return os.path.join(DIRECTORY, ".manifiesto")
+
+@instrumentation.timed("output.write")
+def write(df, nombre):
+    """
+    Guarda un resultado en todos los formatos activos y registra su entrada del manifiesto.
+
+    :param df: pl.DataFrame con el resultado del análisis.
+    :param nombre: Nombre del resultado (sin extensión).
+    :return: Lista de rutas escritas.
+    """
+    os.makedirs(DIRECTORY, exist_ok=True)
+    escritos = []
+    esquemas = {}
+    columnar = None  # Texto como categórico para parquet e ipc (se convierte una sola vez)
+    for formato, path in zip(OUTPUT_FORMATS, paths(nombre)):
+        if formato == "csv":
+            escrito = df
+            escrito.write_csv(path)
+        else:
+            if columnar is None:
+                columnar = df.with_columns(pl.col(pl.String).cast(pl.Categorical))
+            escrito = columnar
+            if formato == "parquet":
+                escrito.write_parquet(path, compression="zstd")
+            elif formato == "ipc":
+                escrito.write_ipc(path, compression="uncompressed")
+        escritos.append(path)
+        esquemas[os.path.basename(path)] = {col: str(dtype) for col, dtype in escrito.schema.items()}
+    instrumentation.count("output.rows", df.height)
+
+    # "schema" describe los ficheros columnares si los hay (son los que conservan los tipos)
+    # y "schemas" el de cada fichero escrito
+    os.makedirs(_manifest_dir(), exist_ok=True)
+    with open(os.path.join(_manifest_dir(), nombre + ".json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "rows": df.height,
+            "schema": {col: str(dtype) for col, dtype in (columnar if columnar is not None else df).schema.items()},
+            "schemas": esquemas,
+            "files": [os.path.basename(p) for p in escritos],
+        }, f, indent=2, ensure_ascii=False)
+    return escritos
+
+def write_manifest(nombres):
+    """
+    Reúne en `manifest.json` las entradas de los resultados indicados.
+    Se llama desde el proceso principal al terminar, porque los análisis
+    pueden ejecutarse en procesos distintos.
+
+    :param nombres: Nombres de los resultados a incluir.
+    :return: Diccionario con el manifiesto escrito.
+    """
+    manifiesto = {}
+    for nombre in nombres:
+        try:
+            with open(os.path.join(_manifest_dir(), nombre + ".json"), encoding="utf-8") as f:
+                manifiesto[nombre] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    with open(os.path.join(DIRECTORY, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+    return manifiesto
@@ -0,0 +1,34 @@
+"""
+Configuración común de los tests.
+
+Los módulos del proyecto están en la raíz del repositorio (sin paquete), así que
+se añade al path. Cada test que usa la base de datos trabaja sobre un fichero
+SQLite temporal.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Base de datos temporal con todas las migraciones aplicadas."""
+    anterior = db.DB_PATH
+    db.set_db_path(str(tmp_path / "soccer.db"))
+    db.init_db()
+    yield db.get_connection()
+    db.set_db_path(anterior)
+
+@pytest.fixture
+def empty_database(tmp_path):
+    """Base de datos temporal vacía (sin tablas ni migraciones)."""
+    anterior = db.DB_PATH
+    db.set_db_path(str(tmp_path / "soccer.db"))
+    yield db.get_connection()
+    db.set_db_path(anterior)
@@ -0,0 +1,44 @@
+"""Tests de la ejecución incremental de los análisis (`analysis_runner`)."""
+
+import sys
+
+import analysis_runner
+import data_access
+
+COLUMNAS = ["team_id", "points"]
+
+
+def _resumen(df):
+    return df.select(COLUMNAS)
+
+@data_access.requires(team_summary=["team_id", "points"])
+def analisis(df):
+    return _resumen(df)
+
+
+def test_code_fingerprint_follows_globals(monkeypatch):
+    huella = analysis_runner.code_fingerprint(analisis, ())
+    assert analysis_runner.code_fingerprint(analisis, ()) == huella
+
+    # Una lista de columnas usada por una función auxiliar también forma parte del código
+    monkeypatch.setattr(sys.modules[__name__], "COLUMNAS", ["team_id"])
+    assert analysis_runner.code_fingerprint(analisis, ()) != huella
+    monkeypatch.undo()
+
+    assert analysis_runner.code_fingerprint(analisis, ("otro",)) != huella
+    assert analysis_runner.code_fingerprint(analisis, (), salt="render=False") != huella
+
+
+def test_is_unchanged_requires_same_data_version(tmp_path):
+    salida = tmp_path / "salida.csv"
+    salida.write_text("x\n")
+    estado = str(tmp_path / ".huellas")
+    analysis_runner.save_state(estado, analisis, {"inputs": {}, "code": "c1"}, "token:1")
+
+    assert analysis_runner.is_unchanged(estado, analisis, "c1", "token:1", [str(salida)])
+    assert not analysis_runner.is_unchanged(estado, analisis, "c1", "token:2", [str(salida)])
+    assert not analysis_runner.is_unchanged(estado, analisis, "c2", "token:1", [str(salida)])
+    assert not analysis_runner.is_unchanged(estado, analisis, "c1", None, [str(salida)])
+    assert not analysis_runner.is_unchanged(estado, analisis, "c1", "token:1", [str(tmp_path / "falta.csv")])
+    # Sin versión de datos se sigue comparando el contenido de las entradas
+    assert analysis_runner.is_up_to_date(estado, analisis, {"inputs": {}, "code": "c1"}, [str(salida)])
@@ -0,0 +1,65 @@
+"""Tests del análisis de las tablas de plantillas (`carga_datos_jugadores.parse_table`)."""
+
+import lxml.html
+
+from carga_datos_jugadores import parse_table
+
+
+def _table(html):
+    return lxml.html.fromstring(html)
+
+
+def test_parse_table_thead_last_row_is_header():
+    tabla = _table("""
+        <table>
+          <thead>
+            <tr><th colspan="3">Plantilla</th></tr>
+            <tr><th>Nombre</th><th>Pos</th><th>Edad</th></tr>
+          </thead>
+          <tbody>
+            <tr><td>Isco 22</td><td>M</td><td>33</td></tr>
+            <tr><td>Fornals 8</td><td>M</td><td>--</td></tr>
+          </tbody>
+        </table>
+    """)
+    assert parse_table(tabla) == {
+        "NOMBRE": ["Isco 22", "Fornals 8"],
+        "POS": ["M", "M"],
+        "EDAD": ["33", None],
+    }
+
+
+def test_parse_table_th_row_without_thead():
+    tabla = _table("""
+        <table>
+          <tr><th>Nombre</th><th>G</th></tr>
+          <tr><td>Isco</td><td>5</td></tr>
+        </table>
+    """)
+    assert parse_table(tabla) == {"NOMBRE": ["Isco"], "G": ["5"]}
+
+
+def test_parse_table_colspan_hidden_and_duplicate_names():
+    tabla = _table("""
+        <table>
+          <thead>
+            <tr><th>Nombre</th><th>G</th><th style="display: none">Oculta</th><th>G</th><th></th></tr>
+          </thead>
+          <tbody>
+            <tr><td colspan="2">Isco</td><td style="display:none">x</td><td>1</td><td>2</td><td>extra</td></tr>
+          </tbody>
+        </table>
+    """)
+    # colspan repite el valor, lo oculto desaparece, los repetidos se numeran
+    # y las columnas sin nombre (o de más en el cuerpo) se llaman 'Unnamed: N'
+    assert parse_table(tabla) == {
+        "NOMBRE": ["Isco"],
+        "G": ["Isco"],
+        "G.1": ["1"],
+        "UNNAMED: 3": ["2"],
+        "UNNAMED: 4": ["extra"],
+    }
+
+
+def test_parse_table_without_rows():
+    assert parse_table(_table("<table><thead><tr><th>Nombre</th></tr></thead><tbody></tbody></table>")) is None
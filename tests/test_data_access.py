@@ -0,0 +1,59 @@
+"""Tests de las fuentes perezosas de `data_access`."""
+
+import data_access
+import db
+
+
+def _two_teams(conn):
+    """Dos equipos insertados en orden de clasificación, con ids al revés que su nombre alfabético."""
+    conn.execute("INSERT INTO league (id_league, name_league, year) VALUES (1, 'LALIGA', 2025)")
+    conn.execute("INSERT INTO teams (id, name, logo, league_id) VALUES (1, 'Real Madrid', 'rm.png', 1)")
+    conn.execute("INSERT INTO teams (id, name, logo, league_id) VALUES (2, 'Barcelona', 'fcb.png', 1)")
+
+
+def test_sources_keep_insertion_order(database):
+    conn = database
+    _two_teams(conn)
+    for team_id, points in [(1, 60), (2, 64)]:
+        conn.execute(
+            "INSERT INTO stats (team_id, points, played, goals_against, goals_for, wins, draws, losses, position) "
+            "VALUES (?, ?, 25, 20, 50, 18, 6, 1, '1')",
+            (team_id, points),
+        )
+    # El jugador del segundo equipo se inserta antes: las fuentes de jugadores siguen el id
+    for name, team_id in [("Lamine Yamal", 2), ("Vinícius Júnior", 1), ("Raphinha", 2)]:
+        conn.execute(
+            "INSERT INTO field_players (name, dorsal, position, team_id, league_id, season) VALUES (?, 10, 'A', ?, 1, '2025')",
+            (name, team_id),
+        )
+    conn.commit()
+    # SQLite invierte el orden de las consultas sin ORDER BY: el orden no puede depender
+    # del índice que elija el planificador
+    conn.execute("PRAGMA reverse_unordered_selects = ON")
+
+    assert data_access.scan_standings().select("name").collect()["name"].to_list() == ["Real Madrid", "Barcelona"]
+    jugadores = data_access.scan_field_players().select("player_name").collect()["player_name"].to_list()
+    assert jugadores == ["Lamine Yamal", "Vinícius Júnior", "Raphinha"]
+
+
+def test_summaries_follow_standings_order(database):
+    conn = database
+    _two_teams(conn)
+    conn.execute("INSERT INTO league (id_league, name_league, year) VALUES (2, 'Bundesliga', 2025)")
+    conn.execute("INSERT INTO teams (id, name, logo, league_id) VALUES (3, 'Bayern Munich', 'fcb.png', 2)")
+    for team_id in (1, 2, 3):
+        conn.execute(
+            "INSERT INTO stats (team_id, points, played, goals_against, goals_for, wins, draws, losses, position) "
+            "VALUES (?, 50, 20, 20, 40, 15, 5, 0, '1')",
+            (team_id,),
+        )
+    # Los resúmenes de la segunda liga se calculan antes
+    for league_id in (2, 1):
+        db._refresh_summaries(conn.cursor(), league_id)
+    conn.commit()
+    conn.execute("PRAGMA reverse_unordered_selects = ON")
+
+    equipos = data_access.scan_team_summary().select("name").collect()["name"].to_list()
+    assert equipos == ["Real Madrid", "Barcelona", "Bayern Munich"]
+    ligas = data_access.scan_league_summary().select("name_league").collect()["name_league"].to_list()
+    assert ligas == ["LALIGA", "Bundesliga"]
@@ -0,0 +1,111 @@
+"""Tests de las migraciones y de la carga incremental de jugadores (`db.py`)."""
+
+import hashlib
+
+import polars as pl
+
+import db
+
+
+def _baseline_rows(conn):
+    """Datos con la forma de una base de datos creada antes de las migraciones."""
+    conn.execute("INSERT INTO league (id_league, name_league, year) VALUES (1, 'LALIGA', 2025)")
+    conn.execute("INSERT INTO teams (id, name, logo, league_id) VALUES (10, 'Real Betis', 'logo.png', 1)")
+    conn.execute(
+        "INSERT INTO stats (team_id, points, played, goals_against, goals_for, wins, draws, losses, position) "
+        "VALUES (10, 20, 10, 8, 15, 6, 2, 2, '3')"
+    )
+    # La carga original insertaba de nuevo toda la plantilla en cada ejecución
+    for _ in range(2):
+        conn.execute(
+            "INSERT INTO field_players (name, dorsal, position, goals, team_id, league_id) "
+            "VALUES ('Isco', 22, 'M', 5, 10, 1)"
+        )
+    conn.commit()
+
+
+def test_migrate_baseline_database(empty_database):
+    conn = empty_database
+    db.create_tables()
+    db.create_player_tables()
+    _baseline_rows(conn)
+
+    assert db.migrate() == len(db.MIGRATIONS)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(db.MIGRATIONS)
+
+    # Migración 3: se conserva una sola fila por clave natural, con la temporada de su liga
+    assert conn.execute("SELECT name, season, active FROM field_players").fetchall() == [("Isco", "2025", 1)]
+    # Migración 2: la clasificación vigente es la primera foto del histórico
+    assert conn.execute("SELECT team_id, season, matchday, points FROM stats_history").fetchall() == [(10, "2025", 10, 20)]
+    # Migración 5: resúmenes calculados a partir de los datos existentes
+    assert conn.execute("SELECT teams, points, goals_for FROM league_summary WHERE league_id = 1").fetchone() == (1, 20, 15)
+    assert conn.execute("SELECT points_per_game FROM team_summary WHERE team_id = 10").fetchone() == (2.0,)
+    # Migración 4: versión de los datos
+    assert db.get_data_version() is not None
+
+    # Volver a migrar no hace nada
+    assert db.migrate() == len(db.MIGRATIONS)
+
+
+def test_data_version_changes_on_write(database):
+    version = db.get_data_version()
+    database.execute("INSERT INTO league (name_league, year) VALUES ('LALIGA', 2025)")
+    database.commit()
+    assert db.get_data_version() != version
+    assert db.get_data_version().split(":")[0] == version.split(":")[0]
+
+
+# =============================================================================
+# CARGA INCREMENTAL DE JUGADORES
+# =============================================================================
+
+def _squad(filas):
+    """Lote de jugadores de campo de un equipo ya resuelto (team_id, league_id y season)."""
+    df = pl.DataFrame(
+        filas,
+        schema={"NOMBRE": pl.String, "DORSAL": pl.Int64, "GOLES": pl.Int64},
+        orient="row",
+    ).with_columns(
+        pl.lit(10, dtype=pl.Int64).alias("team_id"),
+        pl.lit(1, dtype=pl.Int64).alias("league_id"),
+        pl.lit("2025", dtype=pl.String).alias("season"),
+    )
+    return db._player_batch(df, db.COLUMNAS_CAMPO)
+
+def _sync(conn, filas):
+    with conn:
+        return db._sync_players(conn.cursor(), "field_players", _squad(filas))
+
+def _active(conn):
+    return sorted(conn.execute("SELECT name, dorsal, goals, active FROM field_players").fetchall())
+
+
+def test_row_hash_is_sha1_of_canonical_row():
+    batch = _squad([("Isco", 22, None)])
+    fila = ["\\N" if valor is None else str(valor) for valor in batch.drop("row_hash").row(0)]
+    assert batch["row_hash"][0] == hashlib.sha1("\x1f".join(fila).encode()).hexdigest()
+
+
+def test_sync_players(database):
+    conn = database
+    conn.execute("INSERT INTO league (id_league, name_league, year) VALUES (1, 'LALIGA', 2025)")
+    conn.execute("INSERT INTO teams (id, name, logo, league_id) VALUES (10, 'Real Betis', 'logo.png', 1)")
+    conn.commit()
+    plantilla = [("Isco", 22, 5), ("Fornals", 8, 2), ("Canterano", None, 0)]
+
+    assert _sync(conn, plantilla) == {"inserted": 3, "updated": 0, "unchanged": 0, "deleted": 0}
+
+    # Misma plantilla: nada cambia, tampoco el jugador sin dorsal (centinela -1 en el cruce)
+    assert _sync(conn, plantilla) == {"inserted": 0, "updated": 0, "unchanged": 3, "deleted": 0}
+    ids = conn.execute("SELECT name, id FROM field_players").fetchall()
+
+    # Isco marca, Fornals deja la plantilla
+    resultado = _sync(conn, [("Isco", 22, 6), ("Canterano", None, 0)])
+    assert resultado == {"inserted": 0, "updated": 1, "unchanged": 1, "deleted": 1}
+    assert _active(conn) == [("Canterano", None, 0, 1), ("Fornals", 8, 2, 0), ("Isco", 22, 6, 1)]
+
+    # Fornals vuelve: se reactiva la misma fila
+    resultado = _sync(conn, [("Isco", 22, 6), ("Fornals", 8, 2), ("Canterano", None, 0)])
+    assert resultado == {"inserted": 0, "updated": 1, "unchanged": 2, "deleted": 0}
+    assert all(active == 1 for *_, active in _active(conn))
+    assert conn.execute("SELECT name, id FROM field_players").fetchall() == ids
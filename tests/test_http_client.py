@@ -0,0 +1,101 @@
+"""Tests de la caché HTTP y las peticiones condicionales (`http_cache`, `http_client.fetch`)."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import http_cache
+import http_client
+
+URL = "https://espn.test/standings"
+
+
+class FakeSession:
+    """Sesión que devuelve las respuestas indicadas y anota las cabeceras de cada petición."""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+
+    def reply(self, status, body=b"", headers=None):
+        resp = requests.Response()
+        resp.status_code = status
+        resp._content = body
+        resp.headers = CaseInsensitiveDict(headers or {})
+        resp.url = URL
+        self.responses.append(resp)
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(http_client, "OFFLINE", False)
+    fake = FakeSession()
+    monkeypatch.setattr(http_client, "get_session", lambda: fake)
+    return fake
+
+
+def test_fresh_entry_is_served_without_request(session):
+    session.reply(200, b'{"v": 1}', {"ETag": '"v1"'})
+    primera = http_client.fetch(URL, ttl=3600)
+    assert (primera.from_cache, primera.unchanged) == (False, False)
+
+    segunda = http_client.fetch(URL, ttl=3600)
+    assert (segunda.from_cache, segunda.unchanged) == (True, True)
+    assert segunda.json() == {"v": 1}
+    assert len(session.requests) == 1
+
+
+def test_not_modified_renews_entry(session):
+    session.reply(200, b"cuerpo", {"ETag": '"v1"', "Last-Modified": "Wed, 01 Oct 2025 10:00:00 GMT"})
+    http_client.fetch(URL)
+    antes = http_cache.load(URL).fetched_at
+
+    session.reply(304)
+    resp = http_client.fetch(URL, ttl=0)
+    assert session.requests[-1]["If-None-Match"] == '"v1"'
+    assert session.requests[-1]["If-Modified-Since"] == "Wed, 01 Oct 2025 10:00:00 GMT"
+    assert (resp.content, resp.from_cache, resp.unchanged) == (b"cuerpo", True, True)
+    assert http_cache.load(URL).fetched_at >= antes
+
+
+def test_revalidation_compares_body(session):
+    session.reply(200, b"v1")
+    http_client.fetch(URL)
+
+    # El servidor no soporta peticiones condicionales pero devuelve el mismo contenido
+    session.reply(200, b"v1")
+    mismo = http_client.fetch(URL, ttl=0)
+    assert (mismo.from_cache, mismo.unchanged) == (False, True)
+
+    session.reply(200, b"v2")
+    nuevo = http_client.fetch(URL, ttl=0)
+    assert (nuevo.content, nuevo.unchanged) == (b"v2", False)
+    assert http_cache.load(URL).body == b"v2"
+
+
+def test_offline_serves_stale_entries_only(session, monkeypatch):
+    session.reply(200, b"guardado")
+    http_client.fetch(URL)
+    monkeypatch.setattr(http_client, "OFFLINE", True)
+
+    assert http_client.fetch(URL, ttl=0).content == b"guardado"
+    with pytest.raises(http_client.HTTPClientError):
+        http_client.fetch("https://espn.test/otra")
+    assert len(session.requests) == 1
+
+
+def test_concurrent_stores_of_same_url(session):
+    cuerpos = [f"v{i}".encode() for i in range(40)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda cuerpo: http_cache.store(URL, cuerpo, {}), cuerpos))
+
+    assert http_cache.load(URL).body in cuerpos
+    assert not [f for f in os.listdir(http_cache.CACHE_DIR) if f.endswith(".tmp")]
@@ -0,0 +1,88 @@
+"""Tests del diario de la carga de plantillas (`ingest_journal.IngestJournal`)."""
+
+from ingest_journal import IngestJournal
+
+BETIS = {"url": "https://espn.test/betis", "league_name": "LaLiga", "team_name": "Real Betis"}
+SEVILLA = {"url": "https://espn.test/sevilla", "league_name": "LaLiga", "team_name": "Sevilla"}
+ARSENAL = {"url": "https://espn.test/arsenal", "league_name": "Premier League", "team_name": "Arsenal"}
+
+
+def test_interrupted_run_is_resumed(database):
+    journal = IngestJournal()
+    assert not journal.resumed
+    journal.mark(BETIS, "fetched", "h1")
+    journal.mark(BETIS, "committed", "h1")
+    journal.mark(SEVILLA, "fetched", "h2")
+    journal.flush()
+    # Interrupción: no se llama a finish()
+
+    reanudado = IngestJournal()
+    assert reanudado.resumed
+    assert reanudado.run_id == journal.run_id
+    assert reanudado.is_done(BETIS)
+    assert not reanudado.is_done(SEVILLA)
+
+
+def test_failed_units_are_retried_once(database):
+    journal = IngestJournal()
+    journal.mark(BETIS, "committed", "h1")
+    journal.mark(SEVILLA, "failed", error="timeout")
+    assert not journal.finish()
+
+    # La ejecución fallida se cierra: la siguiente solo reintenta el equipo fallido
+    reintento = IngestJournal()
+    assert not reintento.resumed
+    assert reintento.retry_of == journal.run_id
+    assert reintento.is_done(BETIS)
+    assert not reintento.is_done(SEVILLA)
+    reintento.mark(SEVILLA, "failed", error="timeout")
+    assert not reintento.finish()
+
+    # Si vuelve a fallar, la tercera carga recarga también los equipos confirmados
+    tercera = IngestJournal()
+    assert (tercera.resumed, tercera.retry_of) == (False, None)
+    assert not tercera.is_done(BETIS)
+    assert not tercera.is_done(SEVILLA)
+    assert tercera.is_unchanged(BETIS, "h1")
+
+
+def test_interrupted_retry_is_resumed(database):
+    journal = IngestJournal()
+    journal.mark(SEVILLA, "failed", error="timeout")
+    journal.finish()
+
+    reintento = IngestJournal()
+    reintento.mark(SEVILLA, "committed", "h2")
+    reintento.flush()
+    # Interrupción del reintento: se reanuda sin repetir lo ya confirmado
+    reanudado = IngestJournal()
+    assert reanudado.resumed
+    assert (reanudado.run_id, reanudado.retry_of) == (reintento.run_id, journal.run_id)
+    assert reanudado.is_done(SEVILLA)
+
+
+def test_finished_run_skips_unchanged_content(database):
+    journal = IngestJournal()
+    journal.mark(BETIS, "committed", "h1")
+    assert journal.finish()
+
+    siguiente = IngestJournal()
+    assert not siguiente.resumed
+    assert not siguiente.is_done(BETIS)
+    assert siguiente.is_unchanged(BETIS, "h1")
+    assert not siguiente.is_unchanged(BETIS, "h2")
+
+
+def test_force_redoes_league(database):
+    journal = IngestJournal()
+    journal.mark(BETIS, "committed", "h1")
+    journal.mark(ARSENAL, "committed", "h3")
+    journal.flush()
+
+    forzado = IngestJournal(force=["LaLiga"])
+    assert forzado.resumed
+    assert not forzado.is_done(BETIS)
+    assert not forzado.is_unchanged(BETIS, "h1")
+    # Las demás ligas no se ven afectadas
+    assert forzado.is_done(ARSENAL)
+    assert forzado.is_unchanged(ARSENAL, "h3")
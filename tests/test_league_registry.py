@@ -0,0 +1,41 @@
+"""Tests de la validación del registro de ligas (`league_registry`)."""
+
+import json
+
+import pytest
+
+import league_registry
+
+LIGA = {"name": "LaLiga", "standings_url": "https://espn.test/esp/standings", "teams_url": "https://espn.test/esp/teams"}
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Escribe un registro temporal y lo activa; al terminar se vuelve al original."""
+    anterior = league_registry.REGISTRY_PATH
+    path = tmp_path / "ligas.json"
+
+    def escribir(**liga):
+        path.write_text(json.dumps({"leagues": [{**LIGA, **liga}]}), encoding="utf-8")
+        league_registry.set_registry_path(str(path))
+    yield escribir
+    league_registry.set_registry_path(anterior)
+
+
+def test_valid_league_gets_defaults(registry):
+    registry(concurrency=2)
+    liga = league_registry.leagues()[0]
+    assert liga["concurrency"] == 2
+    assert liga["standings_refresh"] == league_registry.DEFAULTS["standings_refresh"]
+
+
+@pytest.mark.parametrize("clave, valor", [
+    ("concurrency", True),
+    ("concurrency", 0),
+    ("squads_refresh", False),
+    ("standings_refresh", "3600"),
+])
+def test_invalid_values_are_rejected(registry, clave, valor):
+    registry(**{clave: valor})
+    with pytest.raises(ValueError, match=clave):
+        league_registry.leagues()